@@ -1,20 +1,38 @@
+import click
 from flask import Flask
 from .config import Config
-from .extensions import db, migrate, jwt, cors
+from .utils import configure_engines
+from .extensions import (db, db_router, async_db, init_migrate, jwt, cors, redis_client, async_redis_client, jwt_redis_blocklist,
+                         response_cache, metrics)
 from .routes import register_blueprints
-from .models.user_models import *
-from .models.course_models import *
+from .commands import register_commands
+from .services import identities, password_hasher, answer_keys
+from .schemas import schema_registry
+from . import models
 
 
-def create_app():
+def create_app(config_object=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
 
+    configure_engines(app.config)
     db.init_app(app)
-    migrate.init_app(app, db)
+    db_router.init_app(app)
+    async_db.init_app(app)
+    metrics.init_app(app)
+    if click.get_current_context(silent=True) is not None:
+        # loaded by the flask command, `flask db ...` needs Flask-Migrate
+        init_migrate(app)
     jwt.init_app(app)
     cors.init_app(app)
+    redis_client.init_app(app)
+    async_redis_client.init_app(app)
+    jwt_redis_blocklist.init_app(app)
+    response_cache.init_app(app)
+    identities.init_app(app)
+    password_hasher.init_app(app)
+    answer_keys.init_app(app)
     register_blueprints(app)
+    register_commands(app)
+    schema_registry.init_app(app)
     return app
-
-
@@ -0,0 +1,250 @@
+"""ASGI deployment mode: `uvicorn asgi:app` (see asgi.py in the project root).
+
+The hot read routes (step payloads, course outlines, avatars and the auth
+check) are coroutines on an AsyncSession and the async Redis client, so
+requests waiting on the database, Redis or a slow client hold no thread.
+Every other request goes to the Flask app, which runs in the event loop's
+thread pool (ASGI_THREADS). The async routes answer with the same bodies,
+status codes and cache headers as their Flask versions and share the
+response, identity and revocation caches with them, but they skip Flask's
+request hooks, so they aren't counted by /metrics.
+"""
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+import jwt as pyjwt
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask import Flask
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from pydantic import ValidationError
+from sqlalchemy import select
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_cookie, parse_etags
+from . import create_app
+from .config import Config
+from .extensions import async_db, async_redis_client, jwt_redis_blocklist, response_cache
+from .models import Course, Profile
+from .schemas import StepQuery
+from .services import (identities, find_step_payload_async, get_course_outline_async, response_etag, response_key,
+                       avatar_path, AVATAR_SIZES, AVATAR_FORMATS)
+
+
+# what flask-cors adds to every response with the app's default CORS() setup
+CORS_HEADERS = (('Access-Control-Allow-Origin', '*'),)
+
+
+class _ThreadedWsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI call on one shared thread (thread_sensitive=True),
+    # Flask is thread safe, so spread them over the loop's thread pool instead
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False)
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _ThreadedWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+class AsgiRequest:
+    __slots__ = ('scope', 'headers', 'args', 'cookies')
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.headers = {}
+        for name, value in scope['headers']:
+            name, value = name.decode('latin1'), value.decode('latin1')
+            self.headers[name] = f'{self.headers[name]}, {value}' if name in self.headers else value
+        # the Flask routes parse the query string the same way
+        self.args = {k: v if len(v) > 1 else v[0] for k, v in
+                     parse_qs(scope['query_string'].decode(encoding='utf-8')).items()}
+        self.cookies = parse_cookie(self.headers.get('cookie', ''))
+
+
+class AbortRequest(Exception):
+    def __init__(self, status: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+        self.msg = msg
+
+
+class AsgiApp:
+    """Routes the async read endpoints itself and hands everything else to Flask."""
+
+    def __init__(self, flask_app: Flask):
+        self.flask_app = flask_app
+        self.wsgi = ThreadedWsgiToAsgi(flask_app)
+        self.routes = (
+            (re.compile(r'/api/course/(\d+)'), self.course_info),
+            (re.compile(r'/api/course/(\d+)/(\d+)/(\d+)'), self.step),
+            (re.compile(r'/api/user/ava/(\d+)'), self.avatar),
+            (re.compile(r'/api/auth/is-authorized'), self.is_authorized),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    return await self.respond(send, await self.dispatch(handler, scope, match.groups()))
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # run_in_executor(None, ...) is how Flask requests and file reads get a thread
+                asyncio.get_running_loop().set_default_executor(
+                    ThreadPoolExecutor(self.flask_app.config['ASGI_THREADS'], thread_name_prefix='flask')
+                )
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                await async_redis_client.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, handler, scope, args):
+        try:
+            return await handler(AsgiRequest(scope), *map(int, args))
+        except AbortRequest as e:
+            return self.json({'msg': e.msg}, e.status)
+        except Exception as e:
+            self.flask_app.logger.exception('Error in %s', handler.__name__)
+            return self.json({'msg': f'Server error, please report: {e}'}, 500)
+
+    @staticmethod
+    async def respond(send, response):
+        status, body, headers = response
+        raw_headers = [(name.lower().encode('latin1'), value.encode('latin1'))
+                       for name, value in (*headers, *CORS_HEADERS)]
+        if status != 304:
+            raw_headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def json(self, data, status: int = 200):
+        """What jsonify() would send."""
+        body = self.flask_app.json.dumps(data, separators=(',', ':')) + '\n'
+        return status, body.encode(), [('Content-Type', 'application/json')]
+
+    async def authenticate(self, request: AsgiRequest, session):
+        """@jwt_required() for GET requests (so no CSRF check): the access cookie
+        is decoded with the app's JWT settings, checked against the blocklist and
+        resolved to an Identity. Errors have flask-jwt-extended's statuses and messages."""
+        config = self.flask_app.config
+        cookie_name = config['JWT_ACCESS_COOKIE_NAME']
+        token = request.cookies.get(cookie_name)
+        if not token:
+            raise AbortRequest(401, f'Missing cookie "{cookie_name}"')
+        try:
+            with self.flask_app.app_context():
+                claims = decode_token(token)
+        except pyjwt.ExpiredSignatureError:
+            raise AbortRequest(401, 'Token has expired')
+        except (pyjwt.InvalidTokenError, JWTExtendedException) as e:
+            raise AbortRequest(422, str(e))
+        if claims.get('type') != 'access':
+            raise AbortRequest(422, 'Only non-refresh tokens are allowed')
+
+        if await jwt_redis_blocklist.is_revoked_async(claims['jti']):
+            raise AbortRequest(401, 'Token has been revoked')
+        user_id = claims[config['JWT_IDENTITY_CLAIM']]
+        identity = await identities.resolve_async(session, int(user_id))
+        if identity is None:
+            raise AbortRequest(401, f'Error loading the user {user_id}')
+        return identity
+
+    async def is_authorized(self, request: AsgiRequest):
+        async with async_db.session() as session:
+            await self.authenticate(request, session)
+        return self.json({'msg': 'User is authorized'})
+
+    async def step(self, request: AsgiRequest, course_id: int, section_place: int, lesson_place: int):
+        async with async_db.session() as session:
+            identity = await self.authenticate(request, session)
+            try:
+                step_place = StepQuery.model_validate(request.args).step_place
+            except ValidationError as e:
+                return self.json({'msg': f'Wrong query input: {e}'}, 400)
+            step_data = await find_step_payload_async(session, course_id, section_place, lesson_place,
+                                                      step_place, identity.id)
+
+        if step_data is None:
+            return self.json({'msg': 'Step not found'}, 404)
+        return self.json({'step_data': step_data})
+
+    async def course_info(self, request: AsgiRequest, course_id: int):
+        """versioned_json() of get_course_info: the version is read first and the
+        outline only built when neither the client nor the response cache has it."""
+        async with async_db.session() as session:
+            version = (await session.execute(
+                select(Course.version).where(Course.id == course_id)
+            )).scalar_one_or_none()
+            if not version:
+                return self.json({'msg': 'Course not found'}, 404)
+
+            etag = response_etag('course', course_id, version)
+            headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'public, no-cache')]
+            if parse_etags(request.headers.get('if-none-match')).contains(etag):
+                return 304, b'', headers
+
+            key = response_key('course', course_id, version)
+            body = await response_cache.get_async(key)
+            if body is None:
+                data = await get_course_outline_async(session, course_id)
+                if data is None:
+                    return self.json({'msg': 'Course not found'}, 404)
+                body = self.flask_app.json.dumps(data).encode()
+                await response_cache.set_async(key, body)
+
+        return 200, body, [('Content-Type', 'application/json'), *headers]
+
+    async def avatar(self, request: AsgiRequest, user_id: int):
+        try:
+            size = int(request.args.get('size', 128))
+        except (TypeError, ValueError):
+            size = 128
+        if size not in AVATAR_SIZES:
+            return self.json({'msg': f'Size must be one of {AVATAR_SIZES}'}, 400)
+
+        fmt = request.args.get('format')
+        if fmt is None:
+            accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+            fmt = 'webp' if accept['image/webp'] else 'jpeg'
+        if fmt not in AVATAR_FORMATS:
+            return self.json({'msg': f'Format must be one of {tuple(AVATAR_FORMATS)}'}, 400)
+
+        async with async_db.session() as session:
+            avatar_etag = (await session.execute(
+                select(Profile.avatar_etag).where(Profile.user_id == user_id)
+            )).scalar_one_or_none()
+        if not avatar_etag:
+            return self.json({'msg': 'No ava'}, 404)
+
+        etag = f'{avatar_etag}-{size}-{fmt}'
+        headers = [('ETag', f'"{etag}"'),
+                   ('Cache-Control', f'public, max-age={self.flask_app.config["AVATAR_MAX_AGE"]}'),
+                   ('Vary', 'Accept')]
+        if parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return 304, b'', headers
+
+        with self.flask_app.app_context():
+            path = avatar_path(user_id, size, fmt)
+        try:
+            body = await asyncio.to_thread(_read_file, path)
+        except FileNotFoundError:
+            return self.json({'msg': 'No ava'}, 404)
+        return 200, body, [('Content-Type', AVATAR_FORMATS[fmt][1]), *headers]
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def create_asgi_app(config_object=Config) -> AsgiApp:
+    return AsgiApp(create_app(config_object))
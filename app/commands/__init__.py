@@ -0,0 +1,14 @@
+from flask import Flask
+from .search import search_cli
+from .reviews import reviews_cli
+from .startup import startup_cli
+from .seed import seed_cli
+from .avatars import avatars_cli
+
+
+def register_commands(app: Flask):
+    app.cli.add_command(search_cli)
+    app.cli.add_command(reviews_cli)
+    app.cli.add_command(startup_cli)
+    app.cli.add_command(seed_cli)
+    app.cli.add_command(avatars_cli)
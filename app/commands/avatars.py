@@ -0,0 +1,13 @@
+import click
+from flask.cli import AppGroup
+from ..services import rebuild_avatars
+
+
+avatars_cli = AppGroup('avatars', help='User avatar files.')
+
+
+@avatars_cli.command('rebuild')
+def rebuild():
+    """Re-encode avatars uploaded before the size/format variants."""
+    rebuilt, failed = rebuild_avatars(echo=click.echo)
+    click.echo(f'Rebuilt {rebuilt} avatars' + (f', {failed} couldn\'t be decoded' if failed else ''))
@@ -0,0 +1,20 @@
+import click
+from flask.cli import AppGroup
+from ..services import reconcile_ratings
+
+
+reviews_cli = AppGroup('reviews', help='Course reviews and rating aggregates.')
+
+
+@reviews_cli.command('reconcile')
+@click.option('--chunk-size', default=1000, show_default=True, help='Courses checked per transaction.')
+@click.option('--dry-run', is_flag=True, help='Only report drift, don\'t fix it.')
+def reconcile(chunk_size, dry_run):
+    """Recompute course rating aggregates from reviews."""
+    drifted = reconcile_ratings(chunk_size, fix=not dry_run, echo=click.echo)
+    if not drifted:
+        click.echo('Rating aggregates are consistent')
+    elif dry_run:
+        click.echo(f'{drifted} courses drifted')
+    else:
+        click.echo(f'Fixed {drifted} courses')
@@ -0,0 +1,14 @@
+import click
+from flask.cli import AppGroup
+from ..services import rebuild_search_index
+
+
+search_cli = AppGroup('search', help='Course full-text search index.')
+
+
+@search_cli.command('rebuild')
+@click.option('--chunk-size', default=1000, show_default=True, help='Courses indexed per transaction.')
+def rebuild(chunk_size):
+    """Rebuild the search index from the courses table."""
+    rebuild_search_index(chunk_size, echo=click.echo)
+    click.echo('Search index rebuilt')
@@ -0,0 +1,30 @@
+import click
+from flask.cli import with_appcontext
+from ..services import SeedShape, seed_database, password_hasher
+
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--authors', default=100, show_default=True, help='Users among them who own the courses.')
+@click.option('--courses', default=200, show_default=True)
+@click.option('--sections', default=5, show_default=True, help='Sections per course.')
+@click.option('--lessons', default=4, show_default=True, help='Lessons per section.')
+@click.option('--steps', default=8, show_default=True, help='Steps per lesson.')
+@click.option('--enrollments', default=5, show_default=True, help='Average enrollments per user.')
+@click.option('--review-rate', default=0.3, show_default=True, help='Share of enrollments with a review.')
+@click.option('--seed', default=42, show_default=True, help='Same seed and shape, same data.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per INSERT and transaction.')
+@click.option('--password', default='password123', show_default=True, help='Password of every seeded user.')
+@with_appcontext
+def seed_cli(users, authors, courses, sections, lessons, steps, enrollments, review_rate, seed, chunk_size,
+             password):
+    """Bulk insert synthetic users, courses, steps, enrollments and reviews."""
+    shape = SeedShape(users, authors, courses, sections, lessons, steps, enrollments, review_rate, seed)
+    try:
+        stats = seed_database(shape, password_hasher.hash(password), chunk_size, echo=click.echo)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    rows = sum(count for count, _ in stats.values())
+    seconds = sum(elapsed for _, elapsed in stats.values())
+    click.echo(f'{"total":12} {rows:>10,} rows {seconds:8.1f} s {rows / seconds if seconds else 0:>10,.0f} rows/s')
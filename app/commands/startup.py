@@ -0,0 +1,25 @@
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from ..utils import measure_startup
+
+
+startup_cli = AppGroup('startup', help='Application start-up time.')
+
+
+@startup_cli.command('profile')
+@click.option('--top', default=25, show_default=True, help='Slowest imports to list.')
+@click.option('--by', type=click.Choice(['cumulative', 'self']), default='cumulative', show_default=True,
+              help='Rank imports by time including or excluding their own imports.')
+def profile(top, by):
+    """Time importing the app and create_app() in a fresh interpreter."""
+    project_dir = os.path.dirname(current_app.root_path)
+    result = measure_startup(project_dir)
+
+    click.echo(f'import app    {result.import_seconds * 1000:9.1f} ms')
+    click.echo(f'create_app()  {result.create_app_seconds * 1000:9.1f} ms')
+    click.echo(f'total         {result.total_seconds * 1000:9.1f} ms')
+    click.echo(f'\n{"self ms":>9} {"cumul. ms":>10}  module')
+    for name, self_s, cumulative_s, _ in result.slowest(top, by):
+        click.echo(f'{self_s * 1000:9.1f} {cumulative_s * 1000:10.1f}  {name}')
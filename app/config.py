@@ -13,6 +13,57 @@ class Config:
     JWT_REFRESH_COOKIE_NAME = "refresh_token_cookie"
     JWT_COOKIE_SECURE = False  # True if only https HTTPS
     JWT_COOKIE_CSRF_PROTECT = True
-    MAX_AVA_SIZE = 1024000
+    MAX_AVA_SIZE = 1024000  # bytes of the whole upload request
+    AVATAR_MAX_AGE = 3600  # Cache-Control max-age of avatar variants
     ALLOWED_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+    STEP_STORAGE = os.getenv('STEP_STORAGE', 'db')  # 'db' or 'files'
+    MAX_STEP_BATCH = 500
+    MAX_COURSE_IMPORT_SIZE = 64 * 1024 * 1024  # bytes of an NDJSON course archive
+    COURSE_IMPORT_CHUNK = 1000  # steps per INSERT while importing
 
+    DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'web')  # pool settings: 'web', 'cli' or 'pgbouncer'
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')  # reads of GET requests go here when set
+    DATABASE_REPLICA_STICKY = 5  # seconds a client keeps reading from the primary after a write
+    DATABASE_STICKY_COOKIE = 'db_primary_until'
+    # WAL: readers and the writer don't block each other; busy_timeout (ms): writers wait for the lock
+    SQLITE_PRAGMAS = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 10000,
+                      'mmap_size': 256 * 1024 * 1024}
+
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_SOCKET_TIMEOUT = 0.5  # seconds
+    REDIS_BREAKER_THRESHOLD = 5  # consecutive errors before the circuit opens
+    REDIS_BREAKER_RESET = 30  # seconds before a trial call
+    REDIS_FAIL_OPEN = os.getenv('REDIS_FAIL_OPEN', '1') == '1'  # accept tokens while Redis is down
+    REVOCATION_CACHE_TTL = 60  # seconds a "not revoked" answer is trusted locally
+    REVOCATION_VERSION_POLL = 1  # seconds between blocklist version checks
+    REVOCATION_CACHE_SIZE = 100_000
+
+    IDENTITY_CACHE_SIZE = 10_000  # 0 disables the cache
+    IDENTITY_CACHE_TTL = 60  # seconds
+
+    # serialized bodies of public read endpoints: 'memory', 'redis' or 'none'
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_SIZE = 10_000
+    RESPONSE_CACHE_TTL = 300  # seconds
+
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_SERVER_TIMING = True  # Server-Timing header with app/db/redis durations
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # when set, /metrics requires "Authorization: Bearer <token>"
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv('METRICS_N_PLUS_ONE_THRESHOLD', 0))  # repeats per request, 0 = off
+
+    # ASGI mode (`uvicorn asgi:app`): hot read routes run async, the rest is Flask in a thread pool
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')  # default: the app's database with its async driver
+    ASYNC_DATABASE_POOL_SIZE = int(os.getenv('ASYNC_DATABASE_POOL_SIZE', 20))
+    ASYNC_DATABASE_MAX_OVERFLOW = 10
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 32))  # Flask routes and file reads
+
+    GRADING_CACHE_SIZE = 10_000  # compiled quiz answer keys, 0 disables the cache
+    GRADING_CACHE_TTL = 3600  # seconds
+
+    # Full werkzeug method string; stored hashes with other parameters are upgraded on login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))  # 0 = inline
+    PASSWORD_HASH_MAX_QUEUE = 64  # jobs allowed to wait for a worker
+    PASSWORD_HASH_TIMEOUT = 10  # seconds
+    PASSWORD_HASH_MP_CONTEXT = os.getenv('PASSWORD_HASH_MP_CONTEXT')  # None = forkserver, or spawn where unavailable
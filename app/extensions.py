@@ -1,29 +1,47 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from sqlalchemy.orm import DeclarativeBase
 from flask_jwt_extended import JWTManager
-from redis import Redis
 from flask_cors import CORS
+from .utils.redis_utils import RedisClient, AsyncRedisClient, TokenBlocklist
+from .utils.response_cache_utils import ResponseCache
+from .utils.metrics_utils import Metrics
+from .utils.async_db_utils import AsyncDatabase
+from .utils.db_utils import RoutingSession, DatabaseRouter
 
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
-migrate = Migrate()
+
+def include_name(name, type_, parent_names):
+    # courses_fts* (FTS5 table and its shadow tables) are created by search_service
+    return not (type_ == 'table' and name.startswith('courses_fts'))
+
+def init_migrate(app):
+    """Flask-Migrate imports all of alembic, so it's only set up for the flask CLI."""
+    from flask_migrate import Migrate
+    migrate = Migrate(include_name=include_name)
+    migrate.init_app(app, db)
+    return migrate
+
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
+db_router = DatabaseRouter(db)
 jwt = JWTManager()
-jwt_redis_blocklist = Redis('127.0.0.1', port=6379, db=0)
+redis_client = RedisClient()
+async_redis_client = AsyncRedisClient(redis_client)
+jwt_redis_blocklist = TokenBlocklist(redis_client, async_redis_client)
+response_cache = ResponseCache(redis_client, async_redis_client)
+metrics = Metrics(redis_client)
+async_db = AsyncDatabase(db)
 cors = CORS()
 
 
 @jwt.token_in_blocklist_loader
 def check_if_token_is_revoked(jwt_header, jwt_payload: dict):
-    jti = jwt_payload["jti"]
-    token_in_redis = jwt_redis_blocklist.get(jti)
-    return token_in_redis is not None
+    return jwt_redis_blocklist.is_revoked(jwt_payload["jti"])
 
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
-    from .models import User
+    from .services import identities
     identity = jwt_data["sub"]
-    return User.query.filter_by(id=int(identity)).one_or_none()
\ No newline at end of file
+    return identities.resolve(int(identity))
\ No newline at end of file
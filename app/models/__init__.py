@@ -1,2 +1,2 @@
-from .user_models import User, Profile
-from .course_models import Course, Section, Lesson, Step
\ No newline at end of file
+from .user_models import User, Profile, Progress
+from .course_models import Course, Section, Lesson, Step, Review
\ No newline at end of file
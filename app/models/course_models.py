@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, String, DateTime, Numeric, Integer
+from sqlalchemy import ForeignKey, String, DateTime, Numeric, Integer, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.user_models import Progress
 from ..extensions import db
@@ -7,13 +7,37 @@ from datetime import datetime, timezone
 
 class Course(db.Model):
     __tablename__ = 'courses'
+    __table_args__ = (
+        # keyset pagination of the catalog, see list_courses()
+        Index('ix_courses_created_at_id', 'created_at', 'id'),
+        Index('ix_courses_rating_id', 'rating', 'id'),
+        Index('ix_courses_title_id', 'title', 'id'),
+        Index('ix_courses_author_id_created_at_id', 'author_id', 'created_at', 'id'),
+        Index('ix_courses_author_id_rating_id', 'author_id', 'rating', 'id'),
+        Index('ix_courses_author_id_title_id', 'author_id', 'title', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    author_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True)
+    # bumped by every write that changes its public representation, see cache_service
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
+    # indexed as the leading column of ix_courses_author_id_*
+    author_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     title: Mapped[str] = mapped_column(String(80))
     description: Mapped[str] = mapped_column(String(1800))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
     rating: Mapped[float] = mapped_column(Numeric(2, 1), default=0.0)
+    # kept in step with reviews by apply_rating_delta(), rating = rating_sum / rating_count
+    rating_sum: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    # last step ordinal handed out in this course, see allocate_step_ordinals()
+    step_ordinal_seq: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    # next place of a new section, see reserve_places()
+    next_section_place: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
+    # denormalized counters, kept up to date by adjust_course_counters()
+    enrollments_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    sections_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    lessons_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    steps_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
 
     enrolls: Mapped[list['Progress']] = relationship('Progress',
                                                      back_populates='course'
@@ -21,49 +45,77 @@ class Course(db.Model):
     author: Mapped['User'] = relationship('User',
                                           back_populates='courses'
                                           )
-    sections: Mapped[list['Section']] = relationship('Section', back_populates='course')
+    sections: Mapped[list['Section']] = relationship('Section', back_populates='course', order_by='Section.sort_key')
     reviews: Mapped[list["Review"]] = relationship('Review',
                                                    back_populates='course'
                                                    )
 
 class Section(db.Model):
     __tablename__ = 'sections'
+    __table_args__ = (
+        UniqueConstraint('course_id', 'place', name='uq_sections_course_id_place'),
+        Index('ix_sections_course_id_sort_key', 'course_id', 'sort_key'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    course_id: Mapped[int] = mapped_column(ForeignKey('courses.id'), index=True)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
+    course_id: Mapped[int] = mapped_column(ForeignKey('courses.id'))
     title: Mapped[str] = mapped_column(String(80))
     place: Mapped[int] = mapped_column(Integer)
+    sort_key: Mapped[int] = mapped_column(Integer, default=0)
+    next_lesson_place: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
 
     course: Mapped['Course'] = relationship('Course', back_populates='sections')
-    lessons: Mapped[list['Lesson']] = relationship('Lesson', back_populates='section')
+    lessons: Mapped[list['Lesson']] = relationship('Lesson', back_populates='section', order_by='Lesson.sort_key')
 
 
 class Lesson(db.Model):
     __tablename__ = 'lessons'
+    __table_args__ = (
+        UniqueConstraint('section_id', 'place', name='uq_lessons_section_id_place'),
+        Index('ix_lessons_section_id_sort_key', 'section_id', 'sort_key'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    section_id: Mapped[int] = mapped_column(ForeignKey('sections.id'), index=True)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
+    section_id: Mapped[int] = mapped_column(ForeignKey('sections.id'))
     title: Mapped[str] = mapped_column(String(80))
     place: Mapped[int] = mapped_column(Integer)
+    sort_key: Mapped[int] = mapped_column(Integer, default=0)
+    next_step_place: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
 
     section: Mapped['Section'] = relationship('Section', back_populates='lessons')
-    steps: Mapped[list['Step']] = relationship('Step', back_populates='lesson')
+    steps: Mapped[list['Step']] = relationship('Step', back_populates='lesson', order_by='Step.sort_key')
 
 
 class Step(db.Model):
     __tablename__ = 'steps'
+    __table_args__ = (
+        UniqueConstraint('lesson_id', 'place', name='uq_steps_lesson_id_place'),
+        Index('ix_steps_lesson_id_sort_key', 'lesson_id', 'sort_key'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    lesson_id: Mapped[int] = mapped_column(ForeignKey('lessons.id'), index=True)
+    lesson_id: Mapped[int] = mapped_column(ForeignKey('lessons.id'))
     place: Mapped[int] = mapped_column(Integer)
+    sort_key: Mapped[int] = mapped_column(Integer, default=0)
     content_type: Mapped[str] = mapped_column(String(64))
-    content_path: Mapped[str] = mapped_column(String(256))
+    # position of the step's bit in Progress.done_steps, unique within the course and never reused
+    ordinal: Mapped[int] = mapped_column(Integer)
+    # bumped whenever the payload is rewritten, compiled answer keys are cached by (id, version)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
+    content_path: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    # Validated StepIn payload, deferred so outline queries don't load it
+    payload: Mapped[dict | None] = mapped_column(JSON, nullable=True, deferred=True)
 
     lesson: Mapped['Lesson'] = relationship('Lesson', back_populates='steps')
 
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'course_id', name='uq_reviews_user_id_course_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True,)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True)
@@ -1,6 +1,6 @@
 from ..extensions import db
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Boolean, ForeignKey, DateTime, Integer
+from sqlalchemy import String, Boolean, ForeignKey, DateTime, Integer, LargeBinary, UniqueConstraint
 from datetime import datetime, timezone
 
 
@@ -34,13 +34,19 @@ class User(db.Model):
 
 class Progress(db.Model):
     __tablename__ = 'progresses'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'course_id', name='uq_progresses_user_id_course_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     course_id: Mapped[int] = mapped_column(ForeignKey('courses.id'), index=True)
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)
     enroll_datetime: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # bit n is set once the step with ordinal n is done, see progress_service
+    done_steps: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
 
     user: Mapped['User'] = relationship('User', back_populates='enrolls')
     course: Mapped['Course'] = relationship('Course', back_populates='enrolls')
@@ -56,6 +62,9 @@ class Profile(db.Model):
     age: Mapped[int | None] = mapped_column(Integer, nullable=True, default=0)
     bio: Mapped[str | None] = mapped_column(String(256), nullable=True, default='no bio')
     contacts: Mapped[str | None] = mapped_column(String(126), nullable=True)
+    avatar_etag: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # bumped on profile updates, see cache_service
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
 
     user: Mapped["User"] = relationship("User",
                                         back_populates="profile"
@@ -4,6 +4,10 @@ from .users import user_pb
 from .courses import courses_bp
 from .lessons import lesson_bp
 from .sections import section_bp
+from .reviews import review_bp
+from .progress import progress_bp
+from .docs import docs_bp
+from .metrics import metrics_bp
 
 
 def register_blueprints(app: Flask):
@@ -12,3 +16,7 @@ def register_blueprints(app: Flask):
     app.register_blueprint(courses_bp, url_prefix='/api/course')
     app.register_blueprint(lesson_bp, url_prefix='/api/lesson')
     app.register_blueprint(section_bp, url_prefix='/api/section')
+    app.register_blueprint(review_bp, url_prefix='/api/review')
+    app.register_blueprint(progress_bp, url_prefix='/api/progress')
+    app.register_blueprint(docs_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp)
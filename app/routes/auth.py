@@ -1,24 +1,25 @@
 import pydantic
 from flask import Blueprint, request, jsonify
-from ..schemas import RegisterModel, LoginModel
+from ..schemas import RegisterModel, LoginModel, api_spec, schema_registry
 from ..models import User, Profile
-from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db
 from flask_jwt_extended import (create_access_token, create_refresh_token,
                                 set_access_cookies, set_refresh_cookies,
                                 jwt_required, unset_jwt_cookies, current_user)
 from datetime import timedelta
-from ..services import logout_cookies
+from ..services import logout_cookies, password_hasher, HashingBusyError
 
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/is-authorized')
 @jwt_required()
+@api_spec(auth=True)
 def my_profile():
     return jsonify(msg='User is authorized'), 200
 
 @auth_bp.route('/register', methods=['POST'])
+@api_spec(body=RegisterModel)
 def register():
     if not request.is_json:
         return jsonify(msg='Expected json format'), 415
@@ -31,7 +32,7 @@ def register():
         elif reg_model.password != reg_model.password_again:
             return jsonify(msg='Passwords do not match'), 422
 
-        psw_hash = generate_password_hash(reg_model.password)
+        psw_hash = password_hasher.hash(reg_model.password)
         user = User(email=reg_model.email, password=psw_hash)
         db.session.add(user)
         db.session.flush()
@@ -43,8 +44,11 @@ def register():
     except pydantic.ValidationError as e:
         return jsonify(
             msg=str(e),
-            example_json=RegisterModel.model_json_schema().get('examples')
+            example_json=schema_registry.examples(RegisterModel)
         ), 422
+    except HashingBusyError:
+        db.session.rollback()
+        return jsonify(msg='Server is busy, try again later'), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify(msg=f'Server error, please report: {e}'), 500
@@ -54,6 +58,7 @@ def register():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@api_spec(body=LoginModel)
 def login():
     if not request.is_json:
         return jsonify(msg='Expected json format'), 415
@@ -62,17 +67,22 @@ def login():
         login_model = LoginModel.model_validate(request.get_json())
         user = User.query.filter_by(email=login_model.email).one_or_none()
 
-        if (not user) or (not check_password_hash(user.password, login_model.password)):
+        if (not user) or (not password_hasher.verify(user.password, login_model.password)):
             return jsonify(msg='Wrong email or password'), 401
         else:
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.hash(login_model.password)
+                db.session.commit()
             access_token = create_access_token(identity=str(user.id), fresh=True, expires_delta=timedelta(minutes=30))
             refresh_token = create_refresh_token(identity=str(user.id), expires_delta=timedelta(days=7))
 
     except pydantic.ValidationError as e:
         return jsonify(
             msg=str(e),
-            example_json=LoginModel.model_json_schema().get('examples')
+            example_json=schema_registry.examples(LoginModel)
         )
+    except HashingBusyError:
+        return jsonify(msg='Server is busy, try again later'), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
@@ -84,6 +94,7 @@ def login():
 
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
+@api_spec(auth=True)
 def refresh():
     access_token = create_access_token(identity=str(current_user.id))
     response = jsonify(msg='Access token created successfully')
@@ -92,6 +103,7 @@ def refresh():
 
 @auth_bp.route('/logout', methods=['DELETE'])
 @jwt_required(verify_type=False)
+@api_spec(auth=True)
 def logout():
     result = logout_cookies()
 
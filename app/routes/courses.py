@@ -1,21 +1,54 @@
-from flask import Blueprint, request, jsonify, current_app, make_response
+from flask import Blueprint, request, jsonify, current_app, make_response, stream_with_context
 from flask_jwt_extended import jwt_required, current_user
 from pydantic import ValidationError
-import json
-from ..schemas import CourseIn, SectionIn, LessonIn, StepIn, StepQuery
+from ..schemas import (CourseIn, SectionIn, LessonIn, StepIn, StepQuery, MoveIn, CourseListQuery, SearchQuery,
+                       AnswersIn, api_spec, schema_registry)
 import pydantic
-from ..models import Course, Section, Lesson, Step
+from ..models import Course, Section, Lesson, Step, Progress
 from ..extensions import db
-from sqlalchemy import select
+from sqlalchemy import select, insert, delete
+from sqlalchemy.exc import IntegrityError
+import io
 import os
 from urllib.parse import parse_qs
-from ..utils import update_step_place
+from werkzeug.exceptions import RequestEntityTooLarge
+from ..services import (get_course_outline, list_courses, search_courses, step_upload_dir, store_step_payload, store_step_payloads,
+                        find_step_payload, next_place, find_sibling, allocate_tail, sort_key_before,
+                        move_before, allocate_step_ordinals, adjust_course_counters, grade_lesson_answers,
+                        bump_version, versioned_json, export_course_lines, import_course_lines, CourseImportError)
 
 
 courses_bp = Blueprint('course', __name__)
 
+IMPORT_READ_BUFFER = 64 * 1024
+
+@courses_bp.route('/')
+@api_spec(query=CourseListQuery)
+def get_courses():
+    try:
+        list_query = CourseListQuery.model_validate(request.args.to_dict())
+        courses, next_cursor = list_courses(list_query)
+    except (ValidationError, ValueError) as e:
+        return jsonify(msg=f'Wrong query input: {e}'), 400
+
+    return jsonify(courses=courses, next_cursor=next_cursor)
+
+
+@courses_bp.route('/search')
+@api_spec(query=SearchQuery)
+def search():
+    try:
+        search_query = SearchQuery.model_validate(request.args.to_dict())
+    except ValidationError as e:
+        return jsonify(msg=f'Wrong query input: {e}'), 400
+
+    courses = search_courses(search_query.q, search_query.page, search_query.per_page)
+    return jsonify(courses=courses, page=search_query.page)
+
+
 @courses_bp.route('/', methods=['POST'])
 @jwt_required()
+@api_spec(body=CourseIn, auth=True, status=201)
 def create_course():
     if not request.is_json:
         return jsonify(msg='Expected json format'), 415
@@ -34,7 +67,7 @@ def create_course():
     except pydantic.ValidationError as e:
         return jsonify(
             msg=str(e),
-            example_json=CourseIn.model_json_schema().get('examples')
+            example_json=schema_registry.examples(CourseIn)
         ), 400
     except Exception as e:
         db.session.rollback()
@@ -46,6 +79,7 @@ def create_course():
 
 @courses_bp.route('/<int:course_id>/<int:section_place>/<int:lesson_place>', methods=['POST'])
 @jwt_required()
+@api_spec(body=StepIn, auth=True)
 def add_step(course_id, section_place, lesson_place):
 
     sub_query = select(Section.id).where(
@@ -60,71 +94,163 @@ def add_step(course_id, section_place, lesson_place):
     if not lesson:
         return jsonify(msg='Resource not found'), 400
 
+    before = None
+    before_place = request.args.get('before_place', type=int)
+    if before_place is not None:
+        before = find_sibling(Step, Step.lesson_id, lesson.id, before_place)
+        if not before:
+            return jsonify(msg=f'Step {before_place} not found'), 404
+
     try:
         input_model = StepIn.model_validate(request.get_json())
-        step_place = Step.query.filter_by(lesson_id=lesson.id).count() + 1
-        path = os.path.join(os.path.split(current_app.root_path)[0], 'uploads', f'user_{current_user.id}',
-                            f'course_{course_id}', f'section_{section_place}',
-                            f'lesson_{lesson_place}')
-
-        os.makedirs(path, exist_ok=True)
-        full_path = os.path.join(path, f'step_{step_place}_{input_model.model.content_type}.json')
-        step = Step(lesson_id=lesson.id, place=step_place,
-                    content_type=input_model.model.content_type, content_path=full_path)
+        # course row (ordinals) before the lesson row (place), the order delete_step locks them in
+        ordinal = allocate_step_ordinals(course_id, 1)
+        step = Step(lesson_id=lesson.id, place=next_place(Step, lesson.id),
+                    sort_key=sort_key_before(Step, Step.lesson_id, lesson.id, before),
+                    ordinal=ordinal, content_type=input_model.model.content_type)
         db.session.add(step)
         db.session.flush()
+        adjust_course_counters(course_id, steps=1)
+        bump_version(Lesson, lesson.id)
 
-        input_model.step_id = step.id
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(input_model.model_dump_json(indent=2))
+        store_step_payload(step, input_model,
+                           step_upload_dir(current_user.id, course_id, section_place, lesson_place))
     except pydantic.ValidationError as e:
         return jsonify(
             msg=str(e),
-            example_json=StepIn.model_json_schema().get("examples")
+            example_json=schema_registry.examples(StepIn)
         ), 400
     except Exception as e:
         db.session.rollback()
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
     db.session.commit()
-    return jsonify(msg='Step successfully created', step_id=step.id, content_path=full_path)
+    return jsonify(msg='Step successfully created', step_id=step.id, content_path=step.content_path)
+
+
+@courses_bp.route('/<int:course_id>/<int:section_place>/<int:lesson_place>/batch', methods=['POST'])
+@jwt_required()
+@api_spec(body=StepIn, many=True, auth=True, status=201)
+def add_steps_batch(course_id, section_place, lesson_place):
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    items = request.get_json()
+    max_batch = current_app.config['MAX_STEP_BATCH']
+    if not isinstance(items, list) or not 0 < len(items) <= max_batch:
+        return jsonify(msg=f'Expected a json list of 1..{max_batch} steps'), 400
+
+    input_models, errors = [], []
+    for i, item in enumerate(items):
+        try:
+            input_models.append(StepIn.model_validate(item))
+        except pydantic.ValidationError as e:
+            errors.append({'index': i, 'msg': str(e)})
+    if errors:
+        return jsonify(
+            msg='Batch rejected, no steps were created',
+            errors=errors,
+            example_json=schema_registry.examples(StepIn)
+        ), 400
+
+    sub_query = select(Section.id).where(
+        Section.course_id.in_(select(Course.id).where(Course.author_id == current_user.id).scalar_subquery()),
+        Section.course_id == course_id,
+        Section.place == section_place
+    )
+    lesson_id = db.session.execute(select(Lesson.id).where(
+        Lesson.section_id.in_(sub_query),
+        Lesson.place == lesson_place
+    )).scalar_one_or_none()
+    if not lesson_id:
+        return jsonify(msg='Resource not found'), 400
+
+    try:
+        first_ordinal = allocate_step_ordinals(course_id, len(input_models))
+        slots = allocate_tail(Step, Step.lesson_id, lesson_id, len(input_models))
+        rows = [
+            {'lesson_id': lesson_id, 'place': place, 'sort_key': sort_key, 'ordinal': first_ordinal + i,
+             'content_type': input_model.model.content_type}
+            for i, ((place, sort_key), input_model) in enumerate(zip(slots, input_models))
+        ]
+        db.session.execute(insert(Step), rows)
+        adjust_course_counters(course_id, steps=len(rows))
+        bump_version(Lesson, lesson_id)
+        step_ids = dict(db.session.execute(
+            select(Step.place, Step.id).where(Step.lesson_id == lesson_id, Step.place >= slots[0][0])
+        ).all())
+        for row in rows:
+            row['id'] = step_ids[row['place']]
+
+        store_step_payloads(rows, input_models,
+                            step_upload_dir(current_user.id, course_id, section_place, lesson_place))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
+
+    db.session.commit()
+    return jsonify(
+        msg=f'{len(rows)} steps successfully created',
+        results=[{'index': i, 'step_id': row['id'], 'place': row['place']} for i, row in enumerate(rows)]
+    ), 201
 
 
 @courses_bp.route('/<int:course_id>/<int:section_place>/<int:lesson_place>')
 @jwt_required()
+@api_spec(query=StepQuery, auth=True)
 def get_step(course_id, section_place, lesson_place):
     query_params = {k: v if len(v) > 1 else v[0] for k, v in
                     parse_qs(request.query_string.decode(encoding='utf-8')).items()}
 
     try:
         step_place = StepQuery.model_validate(query_params).step_place
-        path = os.path.join(
-            os.path.split(current_app.root_path)[0],
-            "uploads",
-            f"user_{current_user.id}",
-            f"course_{course_id}",
-            f"section_{section_place}",
-            f"lesson_{lesson_place}",
-        )
-        filename = f'step_{step_place}_'
-
-        if os.path.isdir(path):
-            for f in os.listdir(path):
-                if f.startswith(filename):
-                    with open(os.path.join(path, f), 'r') as file:
-                        step_data = json.load(file)
-                        return jsonify(step_data=step_data)
-
+        step_data = find_step_payload(course_id, section_place, lesson_place, step_place, current_user.id)
     except ValidationError as e:
         return jsonify(msg=f"Wrong query input: {e}"), 400
     except Exception as e:
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
-    return jsonify(msg='Step not found'), 404
+    if step_data is None:
+        return jsonify(msg='Step not found'), 404
+    return jsonify(step_data=step_data)
+
+
+@courses_bp.route('/<int:course_id>/<int:section_place>/<int:lesson_place>/answers', methods=['POST'])
+@jwt_required()
+@api_spec(body=AnswersIn, auth=True)
+def submit_answers(course_id, section_place, lesson_place):
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    try:
+        answers_model = AnswersIn.model_validate(request.get_json())
+    except pydantic.ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(AnswersIn)
+        ), 400
+
+    lesson_id = db.session.execute(
+        select(Lesson.id).join(Section, Section.id == Lesson.section_id).where(
+            Section.course_id == course_id,
+            Section.place == section_place,
+            Lesson.place == lesson_place
+        )
+    ).scalar_one_or_none()
+    if not lesson_id:
+        return jsonify(msg='Lesson not found'), 404
+
+    answers = {item.step_place: item.answer for item in answers_model.answers}
+    results, unknown = grade_lesson_answers(lesson_id, answers)
+    if unknown:
+        return jsonify(msg='Quiz steps not found in this lesson', step_places=unknown), 404
+
+    return jsonify(results=results, correct=sum(r['correct'] for r in results), total=len(results))
 
 
 @courses_bp.route('/<int:course_id>/<int:section_place>/<int:lesson_place>', methods=['DELETE'])
 @jwt_required()
+@api_spec(query=StepQuery, auth=True)
 def delete_step(course_id, section_place, lesson_place):
     query_params = {k: v if len(v) > 1 else v[0] for k, v in
                     parse_qs(request.query_string.decode(encoding='utf-8')).items()}
@@ -152,50 +278,167 @@ def delete_step(course_id, section_place, lesson_place):
 
         db.session.delete(step)
         db.session.flush()
+        adjust_course_counters(course_id, steps=-1)
+        bump_version(Lesson, step.lesson_id)
 
-        if os.path.isfile(step.content_path):
+        if step.content_path and os.path.isfile(step.content_path):
             os.remove(step.content_path)
 
-        steps = Step.query.filter_by(lesson_id=step.lesson_id).order_by(Step.place).all()
-        for p, st in enumerate(steps, start=1):
-            st.place = p
-            st.content_path = update_step_place(st.content_path, p)
-
         db.session.commit()
         return jsonify(msg=f'Successfully deleted step {step.id} from\n{step.content_path}'), 200
     except Exception as e:
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
+
+@courses_bp.route('/<int:course_id>/<int:section_place>/<int:lesson_place>/move', methods=['PATCH'])
+@jwt_required()
+@api_spec(body=MoveIn, query=StepQuery, auth=True)
+def move_step(course_id, section_place, lesson_place):
+    query_params = {k: v if len(v) > 1 else v[0] for k, v in
+                    parse_qs(request.query_string.decode(encoding='utf-8')).items()}
+
+    try:
+        step_place = StepQuery.model_validate(query_params).step_place
+    except ValidationError:
+        return jsonify(msg='Missing query parameter \'step_place\''), 400
+
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    try:
+        move_model = MoveIn.model_validate(request.get_json())
+    except ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(MoveIn)
+        ), 400
+
+    course = select(Course.id).where(Course.author_id == current_user.id,
+                                     Course.id == course_id)
+    section = select(Section.id).where(
+        Section.course_id.in_(course), Section.place == section_place
+    )
+    lesson = select(Lesson.id).where(
+        Lesson.section_id.in_(section), Lesson.place == lesson_place
+    )
+    step = db.session.execute(select(Step).where(
+        Step.lesson_id.in_(lesson), Step.place == step_place
+    )).scalar()
+    if not step:
+        return jsonify(msg='Step not found'), 400
+
+    before = None
+    if move_model.before_place is not None:
+        before = find_sibling(Step, Step.lesson_id, step.lesson_id, move_model.before_place)
+        if not before:
+            return jsonify(msg=f'Step {move_model.before_place} not found'), 404
+
+    move_before(step, Step.lesson_id, step.lesson_id, before)
+    bump_version(Lesson, step.lesson_id)
+    db.session.commit()
+    return jsonify(msg='Step moved successfully'), 200
+
 @courses_bp.route('/<int:course_id>')
 def get_course_info(course_id):
-    course = Course.query.filter_by(id=course_id).one_or_none()
-    if not course:
+    version = db.session.execute(
+        select(Course.version).where(Course.id == course_id)
+    ).scalar_one_or_none()
+    response = version and versioned_json('course', course_id, version, lambda: get_course_outline(course_id))
+    if not response:
         return jsonify(
             msg='Course not found'
         ), 404
-    return jsonify(
-        title=course.title,
-        description=course.description,
-        created_at=str(course.created_at),
-        rating=course.rating,
-        sections=[{'title': c.title, 'place': c.place, 'id': c.id, 'lessons': [
-            {'title': les.title, 'place': les.place, 'id': les.id} for les in c.lessons
-        ]}
-                    for c in course.sections]
-    )
-
-
-
+    return response
 
 
+@courses_bp.route('/<int:course_id>/enroll', methods=['POST'])
+@jwt_required()
+@api_spec(auth=True, status=201)
+def enroll(course_id):
+    if not db.session.execute(select(Course.id).where(Course.id == course_id)).scalar_one_or_none():
+        return jsonify(msg='Course not found'), 404
 
+    try:
+        db.session.add(Progress(user_id=current_user.id, course_id=course_id))
+        db.session.flush()
+        adjust_course_counters(course_id, enrollments=1)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(msg='Already enrolled in this course'), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
 
+    db.session.commit()
+    return jsonify(msg='Successfully enrolled'), 201
 
 
+@courses_bp.route('/<int:course_id>/enroll', methods=['DELETE'])
+@jwt_required()
+@api_spec(auth=True)
+def unenroll(course_id):
+    try:
+        result = db.session.execute(
+            delete(Progress).where(Progress.user_id == current_user.id, Progress.course_id == course_id)
+        )
+        if not result.rowcount:
+            return jsonify(msg='Not enrolled in this course'), 404
+        adjust_course_counters(course_id, enrollments=-1)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
 
+    db.session.commit()
+    return jsonify(msg='Successfully unenrolled'), 200
 
 
+# Download a course as an NDJSON archive, streamed as it's read
+@courses_bp.route('/<int:course_id>/export')
+@jwt_required()
+@api_spec(auth=True)
+def export_course(course_id):
+    author_id = db.session.execute(
+        select(Course.author_id).where(Course.id == course_id)
+    ).scalar_one_or_none()
+    if author_id is None:
+        return jsonify(msg='Course not found'), 404
+    # archives contain quiz answers
+    if author_id != current_user.id:
+        return jsonify(msg='Only the author can export a course'), 403
+
+    return current_app.response_class(
+        stream_with_context(export_course_lines(course_id)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=course-{course_id}.ndjson'}
+    )
 
+# Create a course of the current user from an exported archive
+@courses_bp.route('/import', methods=['POST'])
+@jwt_required()
+@api_spec(auth=True, status=201)
+def import_course():
+    if request.mimetype != 'application/x-ndjson':
+        return jsonify(msg='Expected an application/x-ndjson course archive'), 415
 
+    max_size = current_app.config['MAX_COURSE_IMPORT_SIZE']
+    if request.content_length is not None and request.content_length > max_size:
+        return jsonify(msg=f'Archive too large, max size: {max_size}'), 413
+    request.max_content_length = max_size
 
+    try:
+        # the raw input stream reads lines byte by byte, a buffer reads them in blocks
+        lines = io.BufferedReader(request.stream, IMPORT_READ_BUFFER)
+        course_id, counts = import_course_lines(lines, current_user.id,
+                                                current_app.config['COURSE_IMPORT_CHUNK'])
+    except CourseImportError as e:
+        db.session.rollback()
+        return jsonify(msg=str(e), line=e.line), 400
+    except RequestEntityTooLarge:
+        db.session.rollback()
+        return jsonify(msg=f'Archive too large, max size: {max_size}'), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
 
+    db.session.commit()
+    return jsonify(msg='Course imported successfully', course_id=course_id, **counts), 201
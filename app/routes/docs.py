@@ -0,0 +1,19 @@
+from flask import Blueprint, current_app, request
+from ..schemas import schema_registry
+
+
+docs_bp = Blueprint('docs', __name__)
+
+# OpenAPI document of the whole API, built on the first request
+@docs_bp.route('/openapi.json')
+def openapi():
+    etag = schema_registry.etag
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(schema_registry.document_json, mimetype='application/json')
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
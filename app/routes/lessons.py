@@ -3,30 +3,42 @@ from flask_jwt_extended import current_user, jwt_required
 from sqlalchemy import select
 from ..models import Course, Lesson, Section
 from ..extensions import db
-from ..schemas import LessonIn, LessonQuery
+from ..schemas import LessonIn, LessonQuery, MoveIn, api_spec, schema_registry
 from pydantic import ValidationError
+from ..services import (next_place, find_sibling, sort_key_before, move_before, adjust_course_counters,
+                        bump_version, versioned_json)
 
 
 lesson_bp = Blueprint('lesson', __name__)
 
 @lesson_bp.route('/<int:lesson_id>')
 def get_lesson_info(lesson_id):
-    lesson = Lesson.query.filter_by(id=lesson_id).one_or_none()
+    version = db.session.execute(
+        select(Lesson.version).where(Lesson.id == lesson_id)
+    ).scalar_one_or_none()
+    response = version and versioned_json('lesson', lesson_id, version, lambda: lesson_data(lesson_id))
+    if not response:
+        return jsonify(msg='Lesson not found'), 404
+    return response
+
+
+def lesson_data(lesson_id):
+    lesson = db.session.get(Lesson, lesson_id)
     if not lesson:
-        return jsonify(msg='Lesson not found')
-
-    return jsonify(
-        section_id=lesson.section_id,
-        title=lesson.title,
-        place=lesson.place,
-        steps=[
-            {'content_type': s.content_type, 'place': s.place}
-            for s in lesson.steps
+        return None
+    return {
+        'section_id': lesson.section_id,
+        'title': lesson.title,
+        'place': lesson.place,
+        'steps': [
+            {'content_type': s.content_type, 'place': s.place, 'position': pos}
+            for pos, s in enumerate(lesson.steps, start=1)
         ]
-    )
+    }
 
 @lesson_bp.route('/', methods=['POST'])
 @jwt_required()
+@api_spec(body=LessonIn, query=LessonQuery, auth=True, status=201)
 def add_lesson():
     course_id, section_place = request.args.get('course_id'), request.args.get('section_place')
     if not (course_id and section_place):
@@ -51,7 +63,13 @@ def add_lesson():
     section = db.session.execute(section_query).scalars().one_or_none()
     if not section:
         return jsonify(msg='You can\'t modify this section'), 403
-    lesson_place = len(section.lessons) + 1
+
+    before = None
+    before_place = request.args.get('before_place', type=int)
+    if before_place is not None:
+        before = find_sibling(Lesson, Lesson.section_id, section.id, before_place)
+        if not before:
+            return jsonify(msg=f'Lesson {before_place} not found'), 404
 
     try:
         lesson_model = LessonIn.model_validate(request.get_json())
@@ -65,21 +83,62 @@ def add_lesson():
         if existing_lesson:
             return jsonify(msg='Title must be unique'), 400
 
+        # lock the course row before the section's counter, like the step routes do
+        adjust_course_counters(course_id, lessons=1)
         lesson = Lesson(
             title=lesson_model.title,
             section_id=section.id,
-            place=lesson_place
+            place=next_place(Lesson, section.id),
+            sort_key=sort_key_before(Lesson, Lesson.section_id, section.id, before)
         )
         db.session.add(lesson)
+        bump_version(Section, section.id)
 
     except ValidationError as e:
         return jsonify(
             msg=str(e),
-            example_json=LessonIn.model_json_schema().get('examples')
+            example_json=schema_registry.examples(LessonIn)
         ), 400
     except Exception as e:
         db.session.rollback()
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
     db.session.commit()
-    return jsonify(msg='Lesson created successfully'), 201
\ No newline at end of file
+    return jsonify(msg='Lesson created successfully'), 201
+
+
+@lesson_bp.route('/<int:lesson_id>/move', methods=['PATCH'])
+@jwt_required()
+@api_spec(body=MoveIn, auth=True)
+def move_lesson(lesson_id):
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    lesson = db.session.execute(
+        select(Lesson)
+        .join(Section, Section.id == Lesson.section_id)
+        .join(Course, Course.id == Section.course_id)
+        .where(Lesson.id == lesson_id, Course.author_id == current_user.id)
+    ).scalar_one_or_none()
+    if not lesson:
+        return jsonify(msg='You can\'t modify this lesson'), 403
+
+    try:
+        move_model = MoveIn.model_validate(request.get_json())
+    except ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(MoveIn)
+        ), 400
+
+    before = None
+    if move_model.before_place is not None:
+        before = find_sibling(Lesson, Lesson.section_id, lesson.section_id, move_model.before_place)
+        if not before:
+            return jsonify(msg=f'Lesson {move_model.before_place} not found'), 404
+
+    move_before(lesson, Lesson.section_id, lesson.section_id, before)
+    bump_version(Section, lesson.section_id)
+    bump_version(Course, lesson.section.course_id)
+    db.session.commit()
+    return jsonify(msg='Lesson moved successfully'), 200
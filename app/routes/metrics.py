@@ -0,0 +1,14 @@
+from flask import Blueprint, current_app, jsonify, request
+from ..extensions import metrics
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Prometheus scrape target, per worker process
+@metrics_bp.route('/metrics')
+def prometheus_metrics():
+    if not metrics.enabled:
+        return jsonify(msg='Metrics are disabled'), 404
+    if not metrics.authorized(request.headers.get('Authorization')):
+        return jsonify(msg='Invalid metrics token'), 401
+    return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,54 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, current_user
+from pydantic import ValidationError
+from ..schemas import MarkStepsIn, api_spec, schema_registry
+from ..extensions import db
+from ..services import step_ordinals, get_progress, mark_steps_done, ProgressConflictError
+
+
+progress_bp = Blueprint('progress', __name__)
+
+# Progress of the current user in a course
+@progress_bp.route('/<int:course_id>')
+@jwt_required()
+@api_spec(auth=True)
+def course_progress(course_id):
+    progress = get_progress(current_user.id, course_id)
+    if progress is None:
+        return jsonify(msg='Not enrolled in this course'), 404
+    return jsonify(**progress)
+
+# Mark a batch of steps as done
+@progress_bp.route('/<int:course_id>/steps', methods=['POST'])
+@jwt_required()
+@api_spec(body=MarkStepsIn, auth=True)
+def mark_done(course_id):
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    try:
+        mark_model = MarkStepsIn.model_validate(request.get_json())
+    except ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(MarkStepsIn)
+        ), 400
+
+    ordinals = step_ordinals(course_id, mark_model.step_ids)
+    unknown = sorted(set(mark_model.step_ids) - ordinals.keys())
+    if unknown:
+        return jsonify(msg='Steps not found in this course', step_ids=unknown), 404
+
+    try:
+        progress = mark_steps_done(current_user.id, course_id, ordinals.values())
+    except ProgressConflictError as e:
+        db.session.rollback()
+        return jsonify(msg=str(e)), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
+
+    if progress is None:
+        return jsonify(msg='Not enrolled in this course'), 404
+    db.session.commit()
+    return jsonify(**progress)
@@ -0,0 +1,121 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, current_user
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from ..models import Course, Review
+from ..schemas import ReviewIn, ReviewListQuery, CourseIdQuery, api_spec, schema_registry
+from ..extensions import db
+from ..services import apply_rating_delta, list_reviews
+
+
+review_bp = Blueprint('review', __name__)
+
+# Reviews of a course, newest first
+@review_bp.route('/')
+@api_spec(query=ReviewListQuery)
+def get_reviews():
+    try:
+        list_query = ReviewListQuery.model_validate(request.args.to_dict())
+    except ValidationError as e:
+        return jsonify(msg=f'Wrong query input: {e}'), 400
+
+    reviews, next_before_id = list_reviews(list_query)
+    return jsonify(reviews=reviews, next_before_id=next_before_id)
+
+# Review a course, one review per user
+@review_bp.route('/', methods=['POST'])
+@jwt_required()
+@api_spec(body=ReviewIn, query=CourseIdQuery, auth=True, status=201)
+def create_review():
+    try:
+        course_id = CourseIdQuery(course_id=request.args.get('course_id')).course_id
+    except ValidationError as e:
+        return jsonify(msg=f'Incorrect value of query-parameter \'course_id\': {e}'), 400
+
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    author_id = db.session.execute(
+        select(Course.author_id).where(Course.id == course_id)
+    ).scalar_one_or_none()
+    if author_id is None:
+        return jsonify(msg='Course not found'), 404
+    if author_id == current_user.id:
+        return jsonify(msg='Can\'t review your own course'), 403
+
+    try:
+        review_model = ReviewIn.model_validate(request.get_json())
+        review = Review(user_id=current_user.id, course_id=course_id,
+                        text=review_model.text, score=review_model.score)
+        db.session.add(review)
+        db.session.flush()
+        apply_rating_delta(course_id, review_model.score, 1)
+    except ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(ReviewIn)
+        ), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(msg='You have already reviewed this course'), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
+
+    db.session.commit()
+    return jsonify(msg='Review successfully added', review_id=review.id), 201
+
+# Edit own review
+@review_bp.route('/<int:review_id>', methods=['PUT'])
+@jwt_required()
+@api_spec(body=ReviewIn, auth=True)
+def update_review(review_id):
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    review = db.session.execute(
+        select(Review).where(Review.id == review_id, Review.user_id == current_user.id)
+    ).scalar_one_or_none()
+    if not review:
+        return jsonify(msg='Review not found'), 404
+
+    try:
+        review_model = ReviewIn.model_validate(request.get_json())
+        score_delta = review_model.score - review.score
+        review.text = review_model.text
+        review.score = review_model.score
+        if score_delta:
+            apply_rating_delta(review.course_id, score_delta, 0)
+    except ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(ReviewIn)
+        ), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
+
+    db.session.commit()
+    return jsonify(msg='Review successfully updated'), 200
+
+# Delete own review
+@review_bp.route('/<int:review_id>', methods=['DELETE'])
+@jwt_required()
+@api_spec(auth=True)
+def delete_review(review_id):
+    review = db.session.execute(
+        select(Review).where(Review.id == review_id, Review.user_id == current_user.id)
+    ).scalar_one_or_none()
+    if not review:
+        return jsonify(msg='Review not found'), 404
+
+    try:
+        apply_rating_delta(review.course_id, -review.score, -1)
+        db.session.delete(review)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'Server error, please report: {e}'), 500
+
+    db.session.commit()
+    return jsonify(msg='Review successfully deleted'), 200
@@ -1,10 +1,13 @@
 from flask import Blueprint, jsonify, request
-from ..models import Section
+from sqlalchemy import select
+from ..models import Course, Section
 from flask_jwt_extended import jwt_required, current_user
-from ..schemas import SectionIn
+from ..schemas import SectionIn, MoveIn, api_spec, schema_registry
 from ..extensions import db
 from pydantic import ValidationError
 from ..schemas import SectionQuery
+from ..services import (next_place, find_sibling, sort_key_before, move_before, adjust_course_counters,
+                        bump_version, versioned_json)
 
 
 section_bp = Blueprint('section', __name__)
@@ -12,22 +15,33 @@ section_bp = Blueprint('section', __name__)
 # Get info about a section by its ID
 @section_bp.route('/<int:section_id>')
 def get_section_data(section_id):
-    section = Section.query.filter_by(id=section_id).one_or_none()
-    if not section:
+    version = db.session.execute(
+        select(Section.version).where(Section.id == section_id)
+    ).scalar_one_or_none()
+    response = version and versioned_json('section', section_id, version, lambda: section_data(section_id))
+    if not response:
         return jsonify(msg='Section not found'), 404
+    return response
+
 
-    return jsonify(
-        course_id=section.course_id,
-        title=section.title,
-        place=section.place,
-        lessons=[
-            {'place': les.place, 'title': les.title} for les in section.lessons
+def section_data(section_id):
+    section = db.session.get(Section, section_id)
+    if not section:
+        return None
+    return {
+        'course_id': section.course_id,
+        'title': section.title,
+        'place': section.place,
+        'lessons': [
+            {'place': les.place, 'position': pos, 'title': les.title}
+            for pos, les in enumerate(section.lessons, start=1)
         ]
-    )
+    }
 
 # Create a new section
 @section_bp.route('/', methods=['POST'])
 @jwt_required()
+@api_spec(body=SectionIn, query=SectionQuery, auth=True, status=201)
 def create_section():
     q = request.args.get('course_id')
     if not q:
@@ -40,32 +54,84 @@ def create_section():
 
     if not request.is_json:
         return jsonify(msg='Expected json format'), 415
-    if course_id not in (c.id for c in current_user.courses):
+    own_course = db.session.execute(
+        select(Course.id).where(Course.id == course_id, Course.author_id == current_user.id)
+    ).scalar_one_or_none()
+    if not own_course:
         return jsonify(msg='Can\'t edit this course'), 403
 
+    before = None
+    before_place = request.args.get('before_place', type=int)
+    if before_place is not None:
+        before = find_sibling(Section, Section.course_id, course_id, before_place)
+        if not before:
+            return jsonify(msg=f'Section {before_place} not found'), 404
+
     try:
         section_model = SectionIn.model_validate(request.get_json())
-        sections = Section.query.filter_by(course_id=course_id)
+        existing_section = db.session.execute(
+            select(Section.id).where(
+                Section.course_id == course_id,
+                Section.title == section_model.title
+            )
+        ).first()
 
-        if section_model.title in [s.title for s in sections]:
+        if existing_section:
             return jsonify(msg='Title must be unique'), 400
 
-        place = sections.count() + 1
         section = Section(
             course_id=course_id,
             title=section_model.title,
-            place=place
+            place=next_place(Section, course_id),
+            sort_key=sort_key_before(Section, Section.course_id, course_id, before)
         )
         db.session.add(section)
+        adjust_course_counters(course_id, sections=1)
 
     except ValidationError as e:
         return jsonify(
             msg=str(e),
-            example_json=SectionIn.model_json_schema().get('examples')
+            example_json=schema_registry.examples(SectionIn)
         ), 400
     except Exception as e:
         db.session.rollback()
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
     db.session.commit()
-    return jsonify(msg='Section successfully added', section_id=section.id), 201
\ No newline at end of file
+    return jsonify(msg='Section successfully added', section_id=section.id), 201
+
+# Move a section before another one (or to the end)
+@section_bp.route('/<int:section_id>/move', methods=['PATCH'])
+@jwt_required()
+@api_spec(body=MoveIn, auth=True)
+def move_section(section_id):
+    if not request.is_json:
+        return jsonify(msg='Expected json format'), 415
+
+    section = db.session.execute(
+        select(Section).join(Course, Course.id == Section.course_id).where(
+            Section.id == section_id,
+            Course.author_id == current_user.id
+        )
+    ).scalar_one_or_none()
+    if not section:
+        return jsonify(msg='Can\'t edit this section'), 403
+
+    try:
+        move_model = MoveIn.model_validate(request.get_json())
+    except ValidationError as e:
+        return jsonify(
+            msg=str(e),
+            example_json=schema_registry.examples(MoveIn)
+        ), 400
+
+    before = None
+    if move_model.before_place is not None:
+        before = find_sibling(Section, Section.course_id, section.course_id, move_model.before_place)
+        if not before:
+            return jsonify(msg=f'Section {move_model.before_place} not found'), 404
+
+    move_before(section, Section.course_id, section.course_id, before)
+    bump_version(Course, section.course_id)
+    db.session.commit()
+    return jsonify(msg='Section moved successfully'), 200
@@ -1,27 +1,32 @@
 import pydantic
-from flask import Blueprint, jsonify, request, current_app, send_from_directory
-from ..models import Profile
+from flask import Blueprint, jsonify, request, current_app, send_file
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload
+from ..models import User, Profile, Course
 from flask_jwt_extended import jwt_required, current_user
-from ..schemas import ProfileModel
+from ..schemas import ProfileModel, api_spec, schema_registry
 from ..extensions import db
 import os
-from werkzeug.utils import secure_filename
-from ..utils import delete_all_files
+from werkzeug.exceptions import RequestEntityTooLarge
+from ..services import (identities, save_avatar, avatar_path, AvatarError, AVATAR_SIZES, AVATAR_FORMATS,
+                        versioned_json)
 
 
 user_pb = Blueprint('user', __name__)
 
 @user_pb.route('/my-profile')
 @jwt_required()
+@api_spec(auth=True)
 def my_profile():
-    profile = current_user.profile
+    user = current_user.load(joinedload(User.profile))
+    profile = user.profile
     contacts = profile.contacts
 
     try:
         return jsonify(
             user_data = {
-                'id': current_user.id,
-                'reg_datetime': current_user.reg_datetime,
+                'id': user.id,
+                'reg_datetime': user.reg_datetime,
                 'first_name': profile.first_name,
                 'last_name': profile.last_name,
                 'age': profile.age,
@@ -36,105 +41,145 @@ def my_profile():
 
 @user_pb.route('/<int:user_id>')
 def user_profile(user_id):
-    profile = Profile.query.filter_by(user_id=user_id).one_or_none()
-
-    if not profile:
-        jsonify(msg='Profile not found'), 404
+    row = db.session.execute(
+        select(Profile.id, Profile.version).where(Profile.user_id == user_id)
+    ).one_or_none()
+    if not row:
+        return jsonify(msg='Profile not found'), 404
 
     try:
-        contacts = profile.contacts
-
-        return jsonify(
-            id=profile.id,
-            user_id=profile.user_id,
-            first_name=profile.first_name,
-            last_name=profile.last_name,
-            age=profile.age,
-            bio=profile.bio,
-            contacts=[{cont.split(': ')[0]: cont.split(': ')[1]} for cont in contacts.split('\n')] if contacts else [],
-            reg_datetime=profile.user.reg_datetime
-        ), 200
+        response = versioned_json('profile', row.id, row.version, lambda: profile_data(row.id))
     except Exception as e:
         return jsonify(msg=f'Server error, report please: {e}'), 500
+    if not response:
+        return jsonify(msg='Profile not found'), 404
+    return response
+
+
+def profile_data(profile_id):
+    profile = db.session.get(Profile, profile_id, options=[joinedload(Profile.user)])
+    if not profile:
+        return None
+    contacts = profile.contacts
+    return {
+        'id': profile.id,
+        'user_id': profile.user_id,
+        'first_name': profile.first_name,
+        'last_name': profile.last_name,
+        'age': profile.age,
+        'bio': profile.bio,
+        'contacts': [{cont.split(': ')[0]: cont.split(': ')[1]} for cont in contacts.split('\n')] if contacts else [],
+        'reg_datetime': profile.user.reg_datetime
+    }
 
 
 @user_pb.route('/update-profile', methods=['PUT'])
 @jwt_required()
+@api_spec(body=ProfileModel, auth=True)
 def update_profile():
     if not request.is_json:
         return jsonify(msg='Expected json format'), 415
 
     try:
         profile_model = ProfileModel.model_validate(request.get_json())
-        profile = current_user.profile
+        profile = Profile.query.filter_by(user_id=current_user.id).one()
 
         for k, v in profile_model.model_dump().items():
             if k != 'contacts':
                 setattr(profile, k, v)
             else:
                 setattr(profile, k, '\n'.join(f'{soc}: {link}' for dct in v for soc, link in dct.items()))
+        profile.version = Profile.version + 1
 
     except pydantic.ValidationError as e:
             return jsonify(
                 msg=str(e),
-                example_json=ProfileModel.model_json_schema().get('examples')
+                example_json=schema_registry.examples(ProfileModel)
             )
     except Exception as e:
         db.session.rollback()
         return jsonify(msg=f'Server error, please report: {e}'), 500
 
     db.session.commit()
+    identities.invalidate(current_user.id)
     return jsonify(msg='Profile updated successfully'), 200
 
 @user_pb.route('/upload-ava', methods=['PUT'])
 @jwt_required()
+@api_spec(upload='ava', auth=True)
 def upload_ava():
-   file = request.files.get('ava')
-   if not file or file.filename == '':
-       return jsonify(msg='File not uploaded or has empty name'), 400
-
-   ext = os.path.splitext(file.filename)[1]
-   if ext not in current_app.config['ALLOWED_IMAGE_EXTENSIONS']:
-       return jsonify(msg='File has not allowed extension'), 400
+    max_size = current_app.config['MAX_AVA_SIZE']
+    if request.content_length is not None and request.content_length > max_size:
+        return jsonify(msg=f'File too large, max size: {max_size}'), 413
 
-   max_size = current_app.config['MAX_AVA_SIZE']
-
-   file.seek(0, 2)
-   size = file.tell()
-   file.seek(0)
-   if size > max_size:
-       return jsonify(msg=f'File too large, max size: {max_size}'), 400
+    # bodies without Content-Length are cut off while streaming
+    request.max_content_length = max_size
+    try:
+        file = request.files.get('ava')
+    except RequestEntityTooLarge:
+        return jsonify(msg=f'File too large, max size: {max_size}'), 413
 
-   try:
-       filename = secure_filename(f'{current_user.id}_ava{ext}')
-       path = os.path.join(os.getcwd(), 'uploads', f'user_{current_user.id}', 'ava')
+    if not file or file.filename == '':
+        return jsonify(msg='File not uploaded or has empty name'), 400
 
-       if os.path.isdir(path) and os.listdir(path):
-           delete_all_files(path)
+    ext = os.path.splitext(file.filename)[1].lower()
+    if ext not in current_app.config['ALLOWED_IMAGE_EXTENSIONS']:
+        return jsonify(msg='File has not allowed extension'), 400
 
-       os.makedirs(path, exist_ok=True)
-       file.save(os.path.join(path, filename))
-   except Exception as e:
-       return jsonify(msg=f'File uploading error: {e}'), 500
+    try:
+        avatar_etag = save_avatar(current_user.id, file.stream)
+        db.session.execute(
+            update(Profile).where(Profile.user_id == current_user.id).values(avatar_etag=avatar_etag)
+        )
+    except AvatarError as e:
+        return jsonify(msg=str(e)), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=f'File uploading error: {e}'), 500
 
-   return jsonify(msg='Profile ava updated successfully')
+    db.session.commit()
+    return jsonify(msg='Profile ava updated successfully')
 
 
 @user_pb.route('/ava/<int:user_id>')
 def get_avatar(user_id):
-    try:
-        path = os.path.join(os.path.split(current_app.root_path)[0], 'uploads', f'user_{user_id}', 'ava')
-        if os.path.isdir(path):
-            files = os.listdir(path)
-            if files and os.path.splitext(files[0])[1] in current_app.config['ALLOWED_IMAGE_EXTENSIONS']:
-                return send_from_directory(path, files[0], mimetype='image/jpeg')
-    except Exception as e:
-        return jsonify(msg=f'File defining error: {e}'), 500
-
-    return jsonify(msg='No ava'), 404
+    size = request.args.get('size', 128, type=int)
+    if size not in AVATAR_SIZES:
+        return jsonify(msg=f'Size must be one of {AVATAR_SIZES}'), 400
+
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'webp' if request.accept_mimetypes['image/webp'] else 'jpeg'
+    if fmt not in AVATAR_FORMATS:
+        return jsonify(msg=f'Format must be one of {tuple(AVATAR_FORMATS)}'), 400
+
+    avatar_etag = db.session.execute(
+        select(Profile.avatar_etag).where(Profile.user_id == user_id)
+    ).scalar_one_or_none()
+    if not avatar_etag:
+        return jsonify(msg='No ava'), 404
+
+    etag = f'{avatar_etag}-{size}-{fmt}'
+    max_age = current_app.config['AVATAR_MAX_AGE']
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        try:
+            response = send_file(avatar_path(user_id, size, fmt), mimetype=AVATAR_FORMATS[fmt][1],
+                                 etag=False, conditional=False)
+        except FileNotFoundError:
+            return jsonify(msg='No ava'), 404
+
+    response.set_etag(etag)
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.vary.add('Accept')
+    return response
 
 @user_pb.route('/created-courses')
 @jwt_required()
+@api_spec(auth=True)
 def get_created_courses():
     courses = [ {
         'title': c.title,
@@ -142,6 +187,6 @@ def get_created_courses():
         'rating': c.rating,
         'id': c.id
     }
-        for c in current_user.courses
+        for c in Course.query.filter_by(author_id=current_user.id)
     ]
     return jsonify(created_courses=courses)
\ No newline at end of file
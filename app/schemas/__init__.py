@@ -1,2 +1,3 @@
-from .pd_schemas import RegisterModel, LoginModel, ProfileModel, CourseIn, SectionIn, LessonIn
-from .step_schemas import StepIn, StepQuery, SectionQuery, LessonQuery
\ No newline at end of file
+from .pd_schemas import RegisterModel, LoginModel, ProfileModel, CourseIn, SectionIn, LessonIn, MoveIn, ReviewIn, MarkStepsIn, AnswersIn
+from .step_schemas import StepIn, StepQuery, SectionQuery, LessonQuery, CourseListQuery, SearchQuery, ReviewListQuery, CourseIdQuery
+from .registry import SchemaRegistry, schema_registry, api_spec
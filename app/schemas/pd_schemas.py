@@ -97,18 +97,57 @@ class LessonIn(BaseModel):
     title: TitleField
 
 
+class MoveIn(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            'examples': [
+                {'before_place': 2},
+                {'before_place': None}
+            ]
+        }
+    )
+    before_place: int | None = None
 
 
+class ReviewIn(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            'examples': [
+                {'text': 'Clear explanations and good quizzes', 'score': 5}
+            ]
+        }
+    )
+    text: Annotated[str, Field(min_length=1, max_length=2048)]
+    score: Annotated[int, Field(ge=1, le=5)]
 
 
+class MarkStepsIn(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            'examples': [
+                {'step_ids': [12, 13, 14]}
+            ]
+        }
+    )
+    step_ids: Annotated[list[int], Field(min_length=1, max_length=500)]
 
 
+class AnswerIn(BaseModel):
+    step_place: int
+    # option for single choice; options for multiple choice, in order for order quizzes
+    answer: Annotated[str, Field(max_length=256)] | Annotated[list[Annotated[str, Field(max_length=256)]], Field(max_length=15)]
 
 
-
-
-
-
-
-
-
+class AnswersIn(BaseModel):
+    model_config = ConfigDict(
+        json_schema_extra={
+            'examples': [
+                {'answers': [
+                    {'step_place': 2, 'answer': '2'},
+                    {'step_place': 3, 'answer': ['apple', 'pear', 'grape']},
+                    {'step_place': 4, 'answer': ['winter', 'spring', 'summer', 'fall']}
+                ]}
+            ]
+        }
+    )
+    answers: Annotated[list[AnswerIn], Field(min_length=1, max_length=100)]
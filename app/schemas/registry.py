@@ -0,0 +1,167 @@
+import hashlib
+import json
+import re
+import threading
+from pydantic.json_schema import models_json_schema
+
+
+RULE_ARG = re.compile(r'<(?:(\w+)(?:\([^>]*\))?:)?(\w+)>')
+PARAM_TYPES = {'int': 'integer', 'float': 'number'}
+ERROR_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'msg': {'type': 'string'},
+        'example_json': {'description': 'Examples of a valid request body'}
+    },
+    'required': ['msg']
+}
+
+
+def api_spec(body=None, query=None, many: bool = False, upload: str | None = None,
+             auth: bool = False, status: int = 200):
+    """Describe a view for the OpenAPI document: the pydantic models of its
+    json body (a list of them when `many`) and query string, the name of an
+    uploaded file field, whether it needs a JWT and its success status."""
+    def decorator(fn):
+        fn.api_spec = {'body': body, 'query': query, 'many': many, 'upload': upload,
+                       'auth': auth, 'status': status}
+        return fn
+    return decorator
+
+
+class SchemaRegistry:
+    """Request examples for error responses and the OpenAPI document of every
+    registered route. Both are built once, on first use, so generating JSON
+    schemas doesn't slow down worker start."""
+
+    def __init__(self):
+        self._examples = {}
+        self._app = None
+        self._built = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        self._built = None
+        app.extensions['schemas'] = self
+
+    @property
+    def document(self) -> dict:
+        return self._build()[0]
+
+    @property
+    def document_json(self) -> bytes:
+        return self._build()[1]
+
+    @property
+    def etag(self) -> str:
+        return self._build()[2]
+
+    def _build(self):
+        if self._built is None:
+            with self._lock:
+                if self._built is None:
+                    app = self._app
+                    specs = {endpoint: getattr(view, 'api_spec', {})
+                             for endpoint, view in app.view_functions.items()}
+                    models = {spec[kind] for spec in specs.values() for kind in ('body', 'query') if spec.get(kind)}
+                    document = self.build_document(app, specs, models)
+                    document_json = json.dumps(document, separators=(',', ':'), sort_keys=True).encode()
+                    self._built = (document, document_json, hashlib.sha256(document_json).hexdigest()[:32])
+        return self._built
+
+    def examples(self, model):
+        """`examples` of the model's json_schema_extra, without generating its JSON schema."""
+        try:
+            return self._examples[model]
+        except KeyError:
+            examples = (model.model_config.get('json_schema_extra') or {}).get('examples')
+            self._examples[model] = examples
+            return examples
+
+    def build_document(self, app, specs, models):
+        ordered = sorted(models, key=lambda m: m.__name__)
+        refs, definitions = models_json_schema(
+            [(model, 'validation') for model in ordered],
+            ref_template='#/components/schemas/{model}'
+        )
+        components = definitions.get('$defs', {})
+        components['Error'] = ERROR_SCHEMA
+
+        paths = {}
+        for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+            if rule.endpoint == 'static' or rule.endpoint not in specs:
+                continue
+            spec = specs[rule.endpoint]
+            path = RULE_ARG.sub(r'{\2}', rule.rule)
+            path_params = [
+                {'name': name, 'in': 'path', 'required': True,
+                 'schema': {'type': PARAM_TYPES.get(converter, 'string')}}
+                for converter, name in RULE_ARG.findall(rule.rule)
+            ]
+            for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+                paths.setdefault(path, {})[method.lower()] = self._operation(
+                    rule.endpoint, spec, path_params, refs, components
+                )
+
+        return {
+            'openapi': '3.1.0',
+            'info': {'title': app.config.get('API_TITLE', app.import_name), 'version': app.config.get('API_VERSION', '1.0')},
+            'paths': paths,
+            'components': {
+                'schemas': components,
+                'securitySchemes': {
+                    'accessCookie': {'type': 'apiKey', 'in': 'cookie',
+                                     'name': app.config.get('JWT_ACCESS_COOKIE_NAME', 'access_token_cookie')},
+                    'csrfHeader': {'type': 'apiKey', 'in': 'header',
+                                   'name': app.config.get('JWT_ACCESS_CSRF_HEADER_NAME', 'X-CSRF-TOKEN')}
+                }
+            }
+        }
+
+    def _operation(self, endpoint, spec, path_params, refs, components):
+        blueprint, _, name = endpoint.rpartition('.')
+        operation = {
+            'operationId': endpoint,
+            'summary': name.replace('_', ' ').capitalize(),
+            'tags': [blueprint] if blueprint else [],
+            'parameters': list(path_params),
+            'responses': {
+                str(spec.get('status', 200)): {'description': 'Success'},
+                '4XX': {'description': 'Client error',
+                        'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Error'}}}}
+            }
+        }
+
+        query = spec.get('query')
+        if query:
+            query_schema = components[query.__name__]
+            required = set(query_schema.get('required', ()))
+            operation['parameters'] += [
+                {'name': field, 'in': 'query', 'required': field in required, 'schema': schema}
+                for field, schema in query_schema.get('properties', {}).items()
+            ]
+
+        body = spec.get('body')
+        if body:
+            schema = refs[(body, 'validation')]
+            if spec.get('many'):
+                schema = {'type': 'array', 'items': schema}
+            content = {'schema': schema}
+            examples = self.examples(body)
+            if examples:
+                content['example'] = examples if spec.get('many') else examples[0]
+            operation['requestBody'] = {'required': True, 'content': {'application/json': content}}
+        elif spec.get('upload'):
+            operation['requestBody'] = {'required': True, 'content': {'multipart/form-data': {'schema': {
+                'type': 'object',
+                'properties': {spec['upload']: {'type': 'string', 'format': 'binary'}},
+                'required': [spec['upload']]
+            }}}}
+
+        if spec.get('auth'):
+            operation['security'] = [{'accessCookie': [], 'csrfHeader': []}]
+        return operation
+
+
+schema_registry = SchemaRegistry()
@@ -5,18 +5,40 @@ from typing import Annotated, Literal
 # Common types
 list_options = Annotated[list[Annotated[str, Field(min_length=1, max_length=256)]], Field(min_length=2, max_length=10)]
 
+# Examples are plain dicts so composite models can reuse them without generating JSON schemas
+SINGLE_OPTION_EXAMPLE = {
+    'question': 'how much is 1 + 1?',
+    'options': [
+        '3', '2', 'bro, idk!'
+    ],
+    'answer': '2'
+}
+MULTIPLE_OPTION_EXAMPLE = {
+    'question': 'Which of the following is a fruit?',
+    'options': [
+        'apple', 'potato', 'pear', 'cucumber', 'grape'
+    ],
+    'answer': ['apple', 'pear', 'grape']
+}
+ORDERED_QUIZ_EXAMPLE = {
+    'question': 'In what order are the seasons?',
+    'options': [
+         'spring', 'winter', 'fall', 'summer'
+    ],
+    'answer': {'winter': 1, 'spring': 2, 'summer': 3, 'fall': 4}
+}
+VIDEO_EXAMPLE = {
+    'content_type': 'video',
+    'video_url': 'https://www.youtube.com/watch?v=KWtwIf-TSlo'
+}
+SINGLE_QUESTION_EXAMPLE = {'content_type': 'single_question', 'quiz_data': SINGLE_OPTION_EXAMPLE}
+MULTIPLE_QUESTION_EXAMPLE = {'content_type': 'multiple_question_choice', 'quiz_data': MULTIPLE_OPTION_EXAMPLE}
+ORDER_QUIZ_EXAMPLE = {'content_type': 'order_quiz', 'quiz_data': ORDERED_QUIZ_EXAMPLE}
+
 
 class SingleOptionModel(BaseModel):
     model_config = ConfigDict(
-        json_schema_extra={
-            'examples': [{
-                'question': 'how much is 1 + 1?',
-                'options': [
-                    '3', '2', 'bro, idk!'
-                ],
-                'answer': '2'
-            }]
-        }
+        json_schema_extra={'examples': [SINGLE_OPTION_EXAMPLE]}
     )
 
     question: Annotated[str, Field(min_length=5, max_length=512)]
@@ -26,30 +48,14 @@ class SingleOptionModel(BaseModel):
 
 class MultipleOptionModel(SingleOptionModel):
     model_config = ConfigDict(
-        json_schema_extra={
-            'examples': [{
-                'question': 'Which of the following is a fruit?',
-                'options': [
-                    'apple', 'potato', 'pear', 'cucumber', 'grape'
-                ],
-                'answer': ['apple', 'pear', 'grape']
-            }]
-        }
+        json_schema_extra={'examples': [MULTIPLE_OPTION_EXAMPLE]}
     )
     answer: list_options
 
 
 class OrderedQuizInput(SingleOptionModel):
     model_config = ConfigDict(
-        json_schema_extra={
-            'examples': [{
-                'question': 'In what order are the seasons?',
-                'options': [
-                     'spring', 'winter', 'fall', 'summer'
-                ],
-                'answer': {'winter': 1, 'spring': 2, 'summer': 3, 'fall': 4}
-            }]
-        }
+        json_schema_extra={'examples': [ORDERED_QUIZ_EXAMPLE]}
     )
     answer: Annotated[dict[str, int], Field(min_length=2, max_length=15)]
 
@@ -57,12 +63,7 @@ class OrderedQuizInput(SingleOptionModel):
 
 class VideoModel(BaseModel):
     model_config = ConfigDict(
-        json_schema_extra={
-            'examples': [{
-                'content_type': 'video',
-                'video_url': 'https://www.youtube.com/watch?v=KWtwIf-TSlo'
-            }]
-        }
+        json_schema_extra={'examples': [VIDEO_EXAMPLE]}
     )
     content_type: Literal['video']
     video_url: HttpUrl
@@ -73,11 +74,7 @@ class SingleQuestionModel(BaseModel):
     quiz_data: SingleOptionModel
 
     model_config = ConfigDict(
-        json_schema_extra={'examples': [
-            {'content_type': 'single_question',
-             'quiz_data': SingleOptionModel.model_json_schema().get('examples')[0]
-             }
-        ]}
+        json_schema_extra={'examples': [SINGLE_QUESTION_EXAMPLE]}
     )
 
 
@@ -86,10 +83,7 @@ class MultipleQuestionChoiceModel(BaseModel):
     quiz_data: MultipleOptionModel
 
     model_config = ConfigDict(
-        json_schema_extra={'examples': [
-            {'content_type': 'multiple_question_choice',
-             'quiz_data': MultipleOptionModel.model_json_schema().get('examples')[0]}
-        ]}
+        json_schema_extra={'examples': [MULTIPLE_QUESTION_EXAMPLE]}
     )
 
 
@@ -97,10 +91,7 @@ class OrderQuizModel(BaseModel):
     content_type: Literal['order_quiz']
     quiz_data: OrderedQuizInput
     model_config = ConfigDict(
-        json_schema_extra={'examples': [
-            {'content_type': 'order_quiz',
-             'quiz_data': OrderedQuizInput.model_json_schema().get('examples')[0]}
-        ]}
+        json_schema_extra={'examples': [ORDER_QUIZ_EXAMPLE]}
     )
 
 
@@ -116,19 +107,19 @@ class StepIn(BaseModel):
             'examples': [
                 {
                     'title': 'some title, min length = 2',
-                    'model': VideoModel.model_json_schema().get('examples')[0],
+                    'model': VIDEO_EXAMPLE,
                 },
                 {
                     'title': 'some title, min length = 2',
-                    'model': SingleQuestionModel.model_json_schema().get('examples')[0],
+                    'model': SINGLE_QUESTION_EXAMPLE,
                 },
                 {
                     'title': 'some title, min length = 2',
-                    'model': MultipleQuestionChoiceModel.model_json_schema().get('examples')[0],
+                    'model': MULTIPLE_QUESTION_EXAMPLE,
                 },
                 {
                     'title': 'some title, min length = 2',
-                    'model': OrderQuizModel.model_json_schema().get('examples')[0]
+                    'model': ORDER_QUIZ_EXAMPLE
                 }
             ]
         }, extra='allow'
@@ -143,4 +134,24 @@ class SectionQuery(BaseModel):
 
 class LessonQuery(BaseModel):
     course_id: int
-    section_place: int
\ No newline at end of file
+    section_place: int
+
+class CourseListQuery(BaseModel):
+    sort: Literal['created_at', 'rating', 'title'] = 'created_at'
+    author_id: int | None = None
+    min_rating: Annotated[float | None, Field(ge=0, le=5)] = None
+    cursor: str | None = None
+    limit: Annotated[int, Field(ge=1, le=100)] = 20
+
+class SearchQuery(BaseModel):
+    q: Annotated[str, Field(min_length=1, max_length=200)]
+    page: Annotated[int, Field(ge=1, le=100)] = 1
+    per_page: Annotated[int, Field(ge=1, le=50)] = 20
+
+class ReviewListQuery(BaseModel):
+    course_id: int
+    before_id: int | None = None
+    limit: Annotated[int, Field(ge=1, le=50)] = 20
+
+class CourseIdQuery(BaseModel):
+    course_id: int
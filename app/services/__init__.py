@@ -1 +1,16 @@
-from .auth_service import logout_cookies
\ No newline at end of file
+from .auth_service import logout_cookies
+from .cource_service import get_course_outline, get_course_outline_async, list_courses, adjust_course_counters
+from .step_service import (step_upload_dir, store_step_payload, store_step_payloads, find_step_payload,
+                           find_step_payload_async)
+from .ordering_service import next_place, find_sibling, allocate_tail, sort_key_before, move_before
+from .identity_service import Identity, identities
+from .password_service import password_hasher, HashingBusyError
+from .avatar_service import save_avatar, avatar_path, rebuild_avatars, AvatarError, AVATAR_SIZES, AVATAR_FORMATS
+from .search_service import search_courses, rebuild_search_index
+from .review_service import apply_rating_delta, list_reviews, reconcile_ratings
+from .cache_service import bump_version, versioned_json, response_etag, response_key
+from .grading_service import answer_keys, grade_lesson_answers, strip_answers
+from .progress_service import (allocate_step_ordinals, step_ordinals, get_progress, mark_steps_done,
+                               ProgressConflictError)
+from .seed_service import SeedShape, seed_database
+from .transfer_service import export_course_lines, import_course_lines, CourseImportError
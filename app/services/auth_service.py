@@ -17,7 +17,7 @@ def logout_cookies():
         try:
             decoded = jwt.decode(access_token, secret_key, algorithms=['HS256'])
             jti = decoded["jti"]
-            jwt_redis_blocklist.set(jti, "", ex=timedelta(minutes=1))
+            jwt_redis_blocklist.revoke(jti, timedelta(minutes=1))
             token_revoked.append('access_token')
         except Exception as e:
             errors.append({'access_token_error': str(e)})
@@ -26,7 +26,7 @@ def logout_cookies():
         try:
             decoded = jwt.decode(refresh_token, secret_key, algorithms=['HS256'])
             jti = decoded['jti']
-            jwt_redis_blocklist.set(jti, "", ex=timedelta(days=7))
+            jwt_redis_blocklist.revoke(jti, timedelta(days=7))
             token_revoked.append('refresh_token')
         except Exception as e:
             errors.append({'refresh_token_error': str(e)})
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+import re
+from flask import current_app
+from sqlalchemy import update
+from ..extensions import db
+from ..models import Profile
+
+
+AVATAR_SIZES = (64, 128, 256)
+AVATAR_FORMATS = {
+    'webp': ('webp', 'image/webp'),
+    'jpeg': ('jpg', 'image/jpeg'),
+}
+DECODABLE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+
+class AvatarError(ValueError):
+    pass
+
+
+USER_DIR = re.compile(r'^user_(\d+)$')
+
+
+def uploads_dir():
+    return os.path.join(os.path.split(current_app.root_path)[0], 'uploads')
+
+
+def avatar_dir(user_id: int):
+    return os.path.join(uploads_dir(), f'user_{user_id}', 'ava')
+
+
+def avatar_path(user_id: int, size: int, fmt: str):
+    ext, _ = AVATAR_FORMATS[fmt]
+    return os.path.join(avatar_dir(user_id), f'ava_{size}.{ext}')
+
+
+def render_variants(stream) -> dict[tuple[int, str], bytes]:
+    """Decode an uploaded image and re-encode it as square WebP/JPEG
+    variants. Re-encoding drops EXIF and every other metadata block."""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(stream) as img:
+            if img.format not in DECODABLE_FORMATS:
+                raise AvatarError(f'Unsupported image format: {img.format}')
+            img.load()
+            img = ImageOps.exif_transpose(img)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise AvatarError(f'Can\'t decode image: {e}')
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    else:
+        img = img.convert('RGB')
+
+    variants = {}
+    for size in AVATAR_SIZES:
+        resized = ImageOps.fit(img, (size, size), Image.Resampling.LANCZOS)
+        for fmt in AVATAR_FORMATS:
+            buf = io.BytesIO()
+            resized.save(buf, format=fmt.upper(), quality=85)
+            variants[(size, fmt)] = buf.getvalue()
+    return variants
+
+
+def save_avatar(user_id: int, stream) -> str:
+    """Write all variants and return the avatar version used in ETags."""
+    variants = render_variants(stream)
+
+    digest = hashlib.sha256()
+    for key in sorted(variants):
+        digest.update(variants[key])
+
+    directory = avatar_dir(user_id)
+    os.makedirs(directory, exist_ok=True)
+    keep = set()
+    for (size, fmt), data in variants.items():
+        path = avatar_path(user_id, size, fmt)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+        keep.add(os.path.basename(path))
+
+    # originals stored by older versions
+    for filename in os.listdir(directory):
+        if filename not in keep:
+            os.remove(os.path.join(directory, filename))
+
+    return digest.hexdigest()[:32]
+
+
+def legacy_avatar(user_id: int) -> str | None:
+    """The original stored by uploads before the variants, `<user_id>_ava<ext>`."""
+    directory = avatar_dir(user_id)
+    if not os.path.isdir(directory):
+        return None
+    for filename in os.listdir(directory):
+        name, ext = os.path.splitext(filename)
+        if name == f'{user_id}_ava' and ext.lower() in current_app.config['ALLOWED_IMAGE_EXTENSIONS']:
+            return os.path.join(directory, filename)
+    return None
+
+
+def rebuild_avatars(echo=print) -> tuple[int, int]:
+    """Re-encode the originals left by older uploads into variants and store
+    their etags, committing after each user. Returns (rebuilt, undecodable)."""
+    if not os.path.isdir(uploads_dir()):
+        return 0, 0
+
+    rebuilt, failed = 0, 0
+    for entry in sorted(os.listdir(uploads_dir())):
+        match = USER_DIR.match(entry)
+        if not match:
+            continue
+        user_id = int(match.group(1))
+        path = legacy_avatar(user_id)
+        if path is None:
+            continue
+        try:
+            with open(path, 'rb') as f:
+                avatar_etag = save_avatar(user_id, f)
+        except AvatarError as e:
+            failed += 1
+            echo(f'User {user_id}: {e}')
+            continue
+        db.session.execute(update(Profile).where(Profile.user_id == user_id).values(avatar_etag=avatar_etag))
+        db.session.commit()
+        rebuilt += 1
+        echo(f'Rebuilt the avatar of user {user_id}')
+    return rebuilt, failed
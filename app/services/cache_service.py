@@ -0,0 +1,47 @@
+from flask import current_app, request
+from sqlalchemy import update
+from ..extensions import db, response_cache
+
+
+# bump when the shape of cached bodies changes, so a shared cache isn't read across deploys
+BODY_FORMAT = 1
+
+
+def bump_version(model, obj_id: int):
+    """Invalidate cached responses of a course, section, lesson or profile."""
+    db.session.execute(
+        update(model).where(model.id == obj_id).values(version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def response_etag(kind: str, obj_id: int, version: int) -> str:
+    return f'{kind}-{obj_id}-{version}'
+
+
+def response_key(kind: str, obj_id: int, version: int) -> str:
+    return f'response:{BODY_FORMAT}:{kind}:{obj_id}:{version}'
+
+
+def versioned_json(kind: str, obj_id: int, version: int, build):
+    """Response for a public read endpoint, with a strong ETag made of the version stamp.
+    `build()` returns the data to serialize and only runs when the body isn't
+    cached; None from it means the object is gone and is passed through."""
+    etag = response_etag(kind, obj_id, version)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        key = response_key(kind, obj_id, version)
+        body = response_cache.get(key)
+        if body is None:
+            data = build()
+            if data is None:
+                return None
+            body = current_app.json.dumps(data).encode()
+            response_cache.set(key, body)
+        response = current_app.response_class(body, mimetype='application/json')
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,141 @@
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select, update, tuple_
+from ..extensions import db
+from ..models import Course, Section, Lesson
+from ..utils import encode_cursor, decode_cursor
+
+
+# sort name -> (column, descending, cursor value parser)
+CATALOG_SORTS = {
+    'created_at': (Course.created_at, True, datetime.fromisoformat),
+    'rating': (Course.rating, True, Decimal),
+    'title': (Course.title, False, str),
+}
+
+
+COURSE_COUNTERS = ('enrollments', 'sections', 'lessons', 'steps')
+
+
+def adjust_course_counters(course_id: int, **deltas: int):
+    """Shift denormalized counters, e.g. adjust_course_counters(1, steps=3), in the
+    current transaction. The database adds the deltas, so concurrent writes don't clash.
+    Counters are part of the course outline, so its version is bumped too."""
+    values = {Course.version: Course.version + 1}
+    for name, delta in deltas.items():
+        if name not in COURSE_COUNTERS:
+            raise ValueError(f'Unknown course counter: {name}')
+        column = getattr(Course, f'{name}_count')
+        values[column] = column + delta
+    db.session.execute(
+        update(Course).where(Course.id == course_id).values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def course_counters(row):
+    return {f'{name}_count': getattr(row, f'{name}_count') for name in COURSE_COUNTERS}
+
+
+def course_outline_queries(course_id: int):
+    """The course row and the section/lesson rows of its outline."""
+    course = (
+        select(Course.title, Course.description, Course.created_at, Course.rating, Course.rating_count,
+               Course.enrollments_count, Course.sections_count, Course.lessons_count, Course.steps_count)
+        .where(Course.id == course_id)
+    )
+    rows = (
+        select(Section.id, Section.title, Section.place,
+               Lesson.id, Lesson.title, Lesson.place)
+        .outerjoin(Lesson, Lesson.section_id == Section.id)
+        .where(Section.course_id == course_id)
+        .order_by(Section.sort_key, Lesson.sort_key)
+    )
+    return course, rows
+
+
+def build_course_outline(course, rows):
+    sections = {}
+    for sec_id, sec_title, sec_place, les_id, les_title, les_place in rows:
+        section = sections.get(sec_id)
+        if section is None:
+            section = sections[sec_id] = {'title': sec_title, 'place': sec_place, 'position': len(sections) + 1,
+                                          'id': sec_id, 'lessons': []}
+        if les_id is not None:
+            section['lessons'].append({'title': les_title, 'place': les_place,
+                                       'position': len(section['lessons']) + 1, 'id': les_id})
+
+    return {
+        'title': course.title,
+        'description': course.description,
+        'created_at': str(course.created_at),
+        'rating': course.rating,
+        'rating_count': course.rating_count,
+        **course_counters(course),
+        'sections': list(sections.values())
+    }
+
+
+def get_course_outline(course_id: int):
+    """Course with its sections and lessons, built with two queries
+    no matter how many sections the course has."""
+    course_query, rows_query = course_outline_queries(course_id)
+    course = db.session.execute(course_query).one_or_none()
+    if not course:
+        return None
+    return build_course_outline(course, db.session.execute(rows_query).all())
+
+
+async def get_course_outline_async(session, course_id: int):
+    """get_course_outline on an AsyncSession."""
+    course_query, rows_query = course_outline_queries(course_id)
+    course = (await session.execute(course_query)).one_or_none()
+    if not course:
+        return None
+    return build_course_outline(course, (await session.execute(rows_query)).all())
+
+
+def list_courses(query):
+    """One catalog page for a CourseListQuery plus the cursor of the next one.
+    Pages continue from the last (sort value, id) seen, so the index on
+    (sort column, id) is read from that point and every page costs the same."""
+    column, descending, parse = CATALOG_SORTS[query.sort]
+
+    stmt = select(Course.id, Course.title, Course.author_id, Course.created_at, Course.rating,
+                  Course.enrollments_count, Course.sections_count, Course.lessons_count, Course.steps_count)
+    if query.author_id is not None:
+        stmt = stmt.where(Course.author_id == query.author_id)
+    if query.min_rating is not None:
+        stmt = stmt.where(Course.rating >= query.min_rating)
+
+    if query.cursor:
+        values = decode_cursor(query.cursor)
+        try:
+            value, last_id = values
+            after = (parse(value), int(last_id))
+        except (ArithmeticError, TypeError, ValueError):
+            raise ValueError('Malformed cursor')
+        key = tuple_(column, Course.id)
+        stmt = stmt.where(key < after if descending else key > after)
+
+    if descending:
+        stmt = stmt.order_by(column.desc(), Course.id.desc())
+    else:
+        stmt = stmt.order_by(column, Course.id)
+
+    rows = db.session.execute(stmt.limit(query.limit + 1)).all()
+    next_cursor = None
+    if len(rows) > query.limit:
+        rows = rows[:query.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+
+    courses = [{
+        'id': r.id,
+        'title': r.title,
+        'author_id': r.author_id,
+        'created_at': str(r.created_at),
+        'rating': r.rating,
+        **course_counters(r)
+    } for r in rows]
+    return courses, next_cursor
@@ -0,0 +1,115 @@
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from sqlalchemy import select
+from ..extensions import db
+from ..models import Step
+from ..utils import TTLCache
+
+
+QUIZ_TYPES = ('single_question', 'multiple_question_choice', 'order_quiz')
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerKey:
+    """A quiz answer compiled for grading: the answer string for single
+    choice, a frozenset for multiple choice, option -> position for order quizzes."""
+    content_type: str
+    expected: str | frozenset | MappingProxyType
+
+    @classmethod
+    def compile(cls, content_type: str, quiz_data: dict) -> 'AnswerKey':
+        answer = quiz_data['answer']
+        if content_type == 'multiple_question_choice':
+            return cls(content_type, frozenset(answer))
+        if content_type == 'order_quiz':
+            return cls(content_type, MappingProxyType(dict(answer)))
+        return cls(content_type, answer)
+
+    def grade(self, submitted) -> bool:
+        if self.content_type == 'single_question':
+            return submitted == self.expected
+        if self.content_type == 'multiple_question_choice':
+            return isinstance(submitted, list) and frozenset(submitted) == self.expected
+        # order quiz: options listed in the submitted order, positions start at 1
+        return (isinstance(submitted, list) and len(submitted) == len(self.expected)
+                and all(self.expected.get(option) == pos for pos, option in enumerate(submitted, start=1)))
+
+
+def strip_answers(payload: dict) -> dict:
+    """Copy of a stored step payload without the quiz answer."""
+    model = payload.get('model') or {}
+    if model.get('content_type') not in QUIZ_TYPES:
+        return payload
+    quiz_data = {k: v for k, v in model.get('quiz_data', {}).items() if k != 'answer'}
+    return {**payload, 'model': {**model, 'quiz_data': quiz_data}}
+
+
+class AnswerKeyCache:
+    """Per-process cache of compiled answer keys by (step id, step version).
+    A changed step gets a new version, so cached keys never need invalidating."""
+
+    def __init__(self):
+        self.cache = TTLCache(maxsize=0)
+
+    def init_app(self, app):
+        self.cache = TTLCache(app.config['GRADING_CACHE_SIZE'], app.config['GRADING_CACHE_TTL'])
+        app.extensions['answer_keys'] = self
+
+    def get_many(self, steps) -> dict[int, AnswerKey]:
+        """step id -> AnswerKey for rows with id, version and content_type.
+        Payloads of the steps that aren't cached are loaded with one query."""
+        keys, missing = {}, {}
+        for step in steps:
+            key = self.cache.get((step.id, step.version))
+            if key is None:
+                missing[step.id] = step
+            else:
+                keys[step.id] = key
+
+        if missing:
+            rows = db.session.execute(
+                select(Step.id, Step.payload, Step.content_path).where(Step.id.in_(missing))
+            ).all()
+            for row in rows:
+                payload = _load_payload(row)
+                if payload is None:
+                    continue
+                step = missing[row.id]
+                key = AnswerKey.compile(step.content_type, payload['model']['quiz_data'])
+                self.cache.set((step.id, step.version), key)
+                keys[step.id] = key
+        return keys
+
+
+def _load_payload(row):
+    if row.payload is not None:
+        return row.payload
+    if row.content_path and os.path.isfile(row.content_path):
+        with open(row.content_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return None
+
+
+def grade_lesson_answers(lesson_id: int, answers: dict[int, object]):
+    """Grade submitted answers by step place within a lesson.
+    Returns results in submission order and the places that aren't quiz steps."""
+    steps = db.session.execute(
+        select(Step.id, Step.place, Step.version, Step.content_type)
+        .where(Step.lesson_id == lesson_id, Step.place.in_(answers), Step.content_type.in_(QUIZ_TYPES))
+    ).all()
+    by_place = {step.place: step for step in steps}
+    keys = answer_keys.get_many(steps)
+
+    results, unknown = [], []
+    for place, submitted in answers.items():
+        step = by_place.get(place)
+        if step is None or step.id not in keys:
+            unknown.append(place)
+            continue
+        results.append({'step_place': place, 'step_id': step.id, 'correct': keys[step.id].grade(submitted)})
+    return results, unknown
+
+
+answer_keys = AnswerKeyCache()
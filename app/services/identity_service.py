@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from sqlalchemy import select
+from ..extensions import db
+from ..models import User, Profile
+from ..utils import TTLCache
+
+
+@dataclass(frozen=True, slots=True)
+class Identity:
+    """What `current_user` is on JWT-protected routes: the id plus a few
+    hot fields. Routes that need the ORM User call `load()` explicitly."""
+    id: int
+    email: str
+    first_name: str | None
+    last_name: str | None
+
+    def load(self, *options) -> User | None:
+        return db.session.get(User, self.id, options=options)
+
+
+def identity_query(user_id: int):
+    return (
+        select(User.id, User.email, Profile.first_name, Profile.last_name)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .where(User.id == user_id)
+    )
+
+
+class IdentityResolver:
+    """Per-process identity cache. Entries are dropped by `invalidate()` on
+    profile/account changes in this process and expire after
+    IDENTITY_CACHE_TTL seconds everywhere else."""
+
+    def __init__(self):
+        self.cache = TTLCache(maxsize=0)
+
+    def init_app(self, app):
+        self.cache = TTLCache(app.config['IDENTITY_CACHE_SIZE'], app.config['IDENTITY_CACHE_TTL'])
+        app.extensions['identities'] = self
+
+    def resolve(self, user_id: int) -> Identity | None:
+        identity = self.cache.get(user_id)
+        if identity is not None:
+            return identity
+
+        row = db.session.execute(identity_query(user_id)).one_or_none()
+        return self._store(user_id, row)
+
+    async def resolve_async(self, session, user_id: int) -> Identity | None:
+        """resolve() on an AsyncSession, sharing the same cache."""
+        identity = self.cache.get(user_id)
+        if identity is not None:
+            return identity
+
+        row = (await session.execute(identity_query(user_id))).one_or_none()
+        return self._store(user_id, row)
+
+    def _store(self, user_id: int, row) -> Identity | None:
+        if row is None:
+            return None
+        identity = Identity(*row)
+        self.cache.set(user_id, identity)
+        return identity
+
+    def invalidate(self, user_id: int):
+        self.cache.delete(user_id)
+
+
+identities = IdentityResolver()
@@ -0,0 +1,97 @@
+from sqlalchemy import select, update, func
+from ..extensions import db
+from ..models import Course, Section, Lesson, Step
+
+
+# Distance between neighbouring sort keys. Inserting between two rows takes
+# the midpoint, so a gap of 1024 allows ~10 inserts at the same spot before
+# the siblings have to be respaced.
+ORDER_GAP = 1024
+
+
+# child model -> counter of the parent row with the next free place for it
+PLACE_COUNTERS = {
+    Section: Course.next_section_place,
+    Lesson: Section.next_lesson_place,
+    Step: Lesson.next_step_place,
+}
+
+
+def reserve_places(model, parent_id: int, count: int = 1) -> int:
+    """Reserve `count` places for new `model` rows of the parent and return the first one.
+
+    Places are stable identifiers used in urls: moves and deletes never renumber
+    them, and a place is never handed out twice. The parent's counter is incremented
+    by the database, whose row lock is held until commit, so concurrent inserts get
+    disjoint places; unique constraints on (parent, place) back this up.
+    """
+    counter = PLACE_COUNTERS[model]
+    parent = counter.class_
+    stmt = (
+        update(parent).where(parent.id == parent_id).values({counter: counter + count})
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        last = db.session.execute(stmt.returning(counter)).scalar_one()
+    else:
+        db.session.execute(stmt)
+        last = db.session.execute(select(counter).where(parent.id == parent_id)).scalar_one()
+    return last - count
+
+
+def next_place(model, parent_id: int) -> int:
+    return reserve_places(model, parent_id)
+
+
+def find_sibling(model, parent_col, parent_id: int, place: int):
+    return db.session.execute(
+        select(model).where(parent_col == parent_id, model.place == place)
+    ).scalar_one_or_none()
+
+
+def last_sort_key(model, parent_col, parent_id: int) -> int:
+    return db.session.execute(
+        select(func.coalesce(func.max(model.sort_key), 0)).where(parent_col == parent_id)
+    ).scalar_one() + ORDER_GAP
+
+
+def allocate_tail(model, parent_col, parent_id: int, count: int) -> list[tuple[int, int]]:
+    """(place, sort_key) pairs for `count` rows appended to the end."""
+    first_place = reserve_places(model, parent_id, count)
+    max_key = db.session.execute(
+        select(func.coalesce(func.max(model.sort_key), 0)).where(parent_col == parent_id)
+    ).scalar_one()
+    return [(first_place + i, max_key + (i + 1) * ORDER_GAP) for i in range(count)]
+
+
+def sort_key_before(model, parent_col, parent_id: int, before) -> int:
+    """Sort key that puts a row right before `before` (or last, if None).
+    Only when two neighbours have no free key between them the siblings are respaced."""
+    if before is None:
+        return last_sort_key(model, parent_col, parent_id)
+
+    prev_key = db.session.execute(
+        select(func.coalesce(func.max(model.sort_key), 0))
+        .where(parent_col == parent_id, model.sort_key < before.sort_key)
+    ).scalar_one()
+
+    if before.sort_key - prev_key < 2:
+        respace(model, parent_col, parent_id)
+        return sort_key_before(model, parent_col, parent_id, before)
+    return (prev_key + before.sort_key) // 2
+
+
+def move_before(obj, parent_col, parent_id: int, before):
+    """Reorder one row; siblings keep their keys."""
+    if before is not None and before.id == obj.id:
+        return
+    obj.sort_key = sort_key_before(type(obj), parent_col, parent_id, before)
+
+
+def respace(model, parent_col, parent_id: int):
+    siblings = db.session.execute(
+        select(model).where(parent_col == parent_id).order_by(model.sort_key, model.id)
+    ).scalars().all()
+    for i, sibling in enumerate(siblings, start=1):
+        sibling.sort_key = i * ORDER_GAP
+    db.session.flush()
@@ -0,0 +1,81 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full or a job timed out; routes answer 503."""
+
+
+class PasswordHasher:
+    """Runs the password KDF on a bounded process pool so slow hashes don't
+    hold request workers. At most PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE
+    jobs are in flight per process, the rest are rejected right away. A job
+    keeps its slot until it's done, also after its caller timed out.
+    PASSWORD_HASH_WORKERS = 0 hashes inline.
+
+    Workers are started with forkserver (spawn where that's unavailable)
+    by default: forking a threaded web worker could copy locks held by
+    its other threads into the children."""
+
+    def __init__(self):
+        self.method = 'scrypt:32768:8:1'
+        self.workers = 0
+        self.timeout = None
+        self._slots = None
+        self._executor = None
+        self._mp_context = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self._mp_context = app.config['PASSWORD_HASH_MP_CONTEXT'] or (
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        )
+        self._slots = threading.BoundedSemaphore(self.workers + app.config['PASSWORD_HASH_MAX_QUEUE'])
+        self._executor = None
+        app.extensions['password_hasher'] = self
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self._mp_context)
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusyError('Too many password hashing jobs in flight')
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()   # only a job still waiting for a worker can be cancelled
+            raise HashingBusyError('Password hashing timed out')
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Werkzeug hashes start with their full method, e.g. 'scrypt:32768:8:1$salt$hash'."""
+        return pwhash.split('$', 1)[0] != self.method
+
+
+password_hasher = PasswordHasher()
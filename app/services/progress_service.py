@@ -0,0 +1,123 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, update
+from ..extensions import db
+from ..models import Course, Section, Lesson, Step, Progress
+
+
+# Completed steps are kept as one bitset per Progress row: bit n (little-endian,
+# byte n // 8) stands for the step with ordinal n. Ordinals are handed out per
+# course and never reused, so a deleted step only leaves a hole; percentages
+# only count bits that are also set in the course's live-step mask.
+MAX_CAS_RETRIES = 5
+
+
+class ProgressConflictError(RuntimeError):
+    pass
+
+
+def decode_bits(data: bytes | None) -> int:
+    return int.from_bytes(data or b'', 'little')
+
+
+def encode_bits(bits: int) -> bytes:
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def ordinals_mask(ordinals) -> int:
+    mask = 0
+    for ordinal in ordinals:
+        mask |= 1 << ordinal
+    return mask
+
+
+def allocate_step_ordinals(course_id: int, count: int) -> int:
+    """Reserve `count` ordinals in the course and return the first one.
+    The increment is done by the database, so concurrent inserts get disjoint ranges."""
+    db.session.execute(
+        update(Course).where(Course.id == course_id)
+        .values(step_ordinal_seq=Course.step_ordinal_seq + count)
+        .execution_options(synchronize_session=False)
+    )
+    last = db.session.execute(
+        select(Course.step_ordinal_seq).where(Course.id == course_id)
+    ).scalar_one()
+    return last - count + 1
+
+
+def course_step_mask(course_id: int) -> int:
+    """Bitset of the ordinals of the course's current steps."""
+    return ordinals_mask(db.session.execute(
+        select(Step.ordinal)
+        .join(Lesson, Lesson.id == Step.lesson_id)
+        .join(Section, Section.id == Lesson.section_id)
+        .where(Section.course_id == course_id)
+    ).scalars())
+
+
+def step_ordinals(course_id: int, step_ids) -> dict[int, int]:
+    """step id -> ordinal for those of `step_ids` that belong to the course."""
+    return dict(db.session.execute(
+        select(Step.id, Step.ordinal)
+        .join(Lesson, Lesson.id == Step.lesson_id)
+        .join(Section, Section.id == Lesson.section_id)
+        .where(Section.course_id == course_id, Step.id.in_(step_ids))
+    ).all())
+
+
+def progress_summary(done: int, live: int, is_completed: bool):
+    total = live.bit_count()
+    completed = (done & live).bit_count()
+    return {
+        'completed_steps': completed,
+        'total_steps': total,
+        'percent': round(completed * 100 / total, 1) if total else 0.0,
+        'is_completed': is_completed
+    }
+
+
+def get_progress(user_id: int, course_id: int):
+    row = db.session.execute(
+        select(Progress.done_steps, Progress.is_completed)
+        .where(Progress.user_id == user_id, Progress.course_id == course_id)
+    ).one_or_none()
+    if not row:
+        return None
+    return progress_summary(decode_bits(row.done_steps), course_step_mask(course_id), row.is_completed)
+
+
+def mark_steps_done(user_id: int, course_id: int, ordinals):
+    """OR the ordinals into the user's bitset with a compare-and-swap on
+    Progress.version, retried in a fresh transaction when another request
+    won the race. Returns the new summary, None when the user isn't enrolled."""
+    bits = ordinals_mask(ordinals)
+    live = course_step_mask(course_id)
+
+    for _ in range(MAX_CAS_RETRIES):
+        row = db.session.execute(
+            select(Progress.id, Progress.done_steps, Progress.version, Progress.is_completed)
+            .where(Progress.user_id == user_id, Progress.course_id == course_id)
+        ).one_or_none()
+        if not row:
+            return None
+
+        done = decode_bits(row.done_steps)
+        new = done | bits
+        if new == done:
+            return progress_summary(done, live, row.is_completed)
+
+        values = {'done_steps': encode_bits(new), 'version': Progress.version + 1}
+        is_completed = row.is_completed or (live != 0 and new & live == live)
+        if is_completed and not row.is_completed:
+            values.update(is_completed=True, completed_at=datetime.now(timezone.utc))
+
+        result = db.session.execute(
+            update(Progress)
+            .where(Progress.id == row.id, Progress.version == row.version)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            return progress_summary(new, live, is_completed)
+        db.session.rollback()
+
+    raise ProgressConflictError('Progress is being updated concurrently, try again')
@@ -0,0 +1,93 @@
+from sqlalchemy import select, update, func, case
+from ..extensions import db
+from ..models import Course, Review
+
+
+def apply_rating_delta(course_id: int, score_delta: int, count_delta: int):
+    """Shift a course's rating aggregates in the current transaction.
+    The new values are computed by the database from the stored ones,
+    so concurrent review writes can't overwrite each other's deltas."""
+    new_sum = Course.rating_sum + score_delta
+    new_count = Course.rating_count + count_delta
+    # rating goes first: MySQL evaluates SET left to right with updated values
+    db.session.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        .ordered_values(
+            (Course.rating, case((new_count > 0, func.round(new_sum * 1.0 / new_count, 1)), else_=0)),
+            (Course.rating_sum, new_sum),
+            (Course.rating_count, new_count),
+            (Course.version, Course.version + 1),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def list_reviews(query):
+    """One page of a course's reviews, newest first, plus the id to continue before."""
+    stmt = select(Review.id, Review.user_id, Review.text, Review.score, Review.review_datetime) \
+        .where(Review.course_id == query.course_id)
+    if query.before_id is not None:
+        stmt = stmt.where(Review.id < query.before_id)
+
+    rows = db.session.execute(stmt.order_by(Review.id.desc()).limit(query.limit + 1)).all()
+    next_before_id = None
+    if len(rows) > query.limit:
+        rows = rows[:query.limit]
+        next_before_id = rows[-1].id
+
+    reviews = [{
+        'id': r.id,
+        'user_id': r.user_id,
+        'text': r.text,
+        'score': r.score,
+        'review_datetime': str(r.review_datetime)
+    } for r in rows]
+    return reviews, next_before_id
+
+
+def reconcile_ratings(chunk_size: int = 1000, fix: bool = True, echo=print) -> int:
+    """Recompute rating aggregates from reviews in id-ordered chunks of courses
+    and report every course whose stored values drifted. Returns the drift count."""
+    last_id, drifted = 0, 0
+    while True:
+        courses = db.session.execute(
+            select(Course.id, Course.rating_sum, Course.rating_count)
+            .where(Course.id > last_id).order_by(Course.id).limit(chunk_size)
+        ).all()
+        if not courses:
+            break
+
+        actual = {
+            row.course_id: (int(row.total), row.count)
+            for row in db.session.execute(
+                select(Review.course_id, func.sum(Review.score).label('total'), func.count().label('count'))
+                .where(Review.course_id.between(courses[0].id, courses[-1].id))
+                .group_by(Review.course_id)
+            )
+        }
+
+        fixes = []
+        for course in courses:
+            total, count = actual.get(course.id, (0, 0))
+            if (course.rating_sum, course.rating_count) != (total, count):
+                drifted += 1
+                echo(f'Course {course.id}: stored {course.rating_sum}/{course.rating_count}, '
+                     f'actual {total}/{count}')
+                fixes.append({
+                    'id': course.id,
+                    'rating_sum': total,
+                    'rating_count': count,
+                    'rating': round(total / count, 1) if count else 0
+                })
+
+        if fix and fixes:
+            db.session.execute(update(Course), fixes)
+            db.session.execute(
+                update(Course).where(Course.id.in_([f['id'] for f in fixes]))
+                .values(version=Course.version + 1)
+            )
+        db.session.commit()
+        last_id = courses[-1].id
+
+    return drifted
@@ -0,0 +1,134 @@
+from sqlalchemy import DDL, event, select, text, or_
+from ..extensions import db
+from ..models import Course
+from .cource_service import course_counters
+
+
+# SQLite: external-content FTS5 table over courses, kept in sync by triggers,
+# so every write path (ORM, Core bulk inserts, raw SQL) updates it in the
+# same transaction. Server databases index an expression instead.
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+        title, description, content='courses', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE OF title, description ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+)
+POSTGRES_DOCUMENT = "to_tsvector('simple', title || ' ' || description)"
+POSTGRES_DDL = f"CREATE INDEX IF NOT EXISTS ix_courses_fts ON courses USING gin ({POSTGRES_DOCUMENT})"
+MYSQL_DDL = "CREATE FULLTEXT INDEX ix_courses_fts ON courses (title, description)"
+
+for _stmt in SQLITE_DDL:
+    event.listen(Course.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+event.listen(Course.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS courses_fts').execute_if(dialect='sqlite'))
+event.listen(Course.__table__, 'after_create', DDL(POSTGRES_DDL).execute_if(dialect='postgresql'))
+event.listen(Course.__table__, 'after_create', DDL(MYSQL_DDL).execute_if(dialect='mysql'))
+
+
+def _fts5_query(q: str) -> str:
+    # every word is quoted so user input can't use FTS5 syntax; the last one is a prefix
+    terms = ['"' + word.replace('"', '""') + '"' for word in q.split()]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+SEARCH_COLUMNS = (Course.id, Course.title, Course.author_id, Course.created_at, Course.rating,
+                  Course.enrollments_count, Course.sections_count, Course.lessons_count, Course.steps_count)
+
+
+def _search_text(sql: str):
+    # typed like the catalog's select, so rows have the same Python types
+    # (Decimal rating, datetime created_at) as the ones list_courses returns
+    return text(sql).columns(*(column.expression for column in SEARCH_COLUMNS))
+
+
+def search_courses(q: str, page: int, per_page: int):
+    """Courses matching `q`, best matches first."""
+    dialect = db.engine.dialect.name
+    columns = ', '.join(f'courses.{column.key}' for column in SEARCH_COLUMNS)
+    params = {'q': q, 'limit': per_page, 'offset': (page - 1) * per_page}
+
+    if dialect == 'sqlite':
+        params['q'] = _fts5_query(q)
+        if not params['q']:
+            return []
+        stmt = _search_text(f"""
+            SELECT {columns} FROM courses_fts JOIN courses ON courses.id = courses_fts.rowid
+            WHERE courses_fts MATCH :q
+            ORDER BY bm25(courses_fts, 10.0, 1.0) LIMIT :limit OFFSET :offset
+        """)
+    elif dialect == 'postgresql':
+        stmt = _search_text(f"""
+            SELECT {columns} FROM courses, plainto_tsquery('simple', :q) query
+            WHERE {POSTGRES_DOCUMENT} @@ query
+            ORDER BY ts_rank({POSTGRES_DOCUMENT}, query) DESC
+            LIMIT :limit OFFSET :offset
+        """)
+    elif dialect in ('mysql', 'mariadb'):
+        stmt = _search_text(f"""
+            SELECT {columns} FROM courses
+            WHERE MATCH(title, description) AGAINST (:q IN NATURAL LANGUAGE MODE)
+            ORDER BY MATCH(title, description) AGAINST (:q IN NATURAL LANGUAGE MODE) DESC
+            LIMIT :limit OFFSET :offset
+        """)
+    else:
+        pattern = f'%{q}%'
+        stmt = (select(*SEARCH_COLUMNS)
+                .where(or_(Course.title.ilike(pattern), Course.description.ilike(pattern)))
+                .order_by(Course.id).limit(per_page).offset(params['offset']))
+        params = {}
+
+    rows = db.session.execute(stmt, params).all()
+    return [{
+        'id': r.id,
+        'title': r.title,
+        'author_id': r.author_id,
+        'created_at': str(r.created_at),
+        'rating': r.rating,
+        **course_counters(r)
+    } for r in rows]
+
+
+def rebuild_search_index(chunk_size: int = 1000, echo=print):
+    """Refill the index from courses in id-ordered chunks, committing after each.
+    Only the SQLite table needs this; server-side indexes are rebuilt in one statement."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        db.session.execute(text('REINDEX INDEX ix_courses_fts'))
+        db.session.commit()
+        return
+    if dialect != 'sqlite':
+        echo(f'Nothing to rebuild for {dialect}')
+        return
+
+    for stmt in SQLITE_DDL:
+        db.session.execute(text(stmt))
+    db.session.execute(text("INSERT INTO courses_fts(courses_fts) VALUES ('delete-all')"))
+    db.session.commit()
+
+    last_id, total = 0, 0
+    while True:
+        ids = db.session.execute(
+            select(Course.id).where(Course.id > last_id).order_by(Course.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(text("""
+            INSERT INTO courses_fts(rowid, title, description)
+            SELECT id, title, description FROM courses WHERE id BETWEEN :first AND :last
+        """), {'first': ids[0], 'last': ids[-1]})
+        db.session.commit()
+        last_id, total = ids[-1], total + len(ids)
+        echo(f'Indexed {total} courses')
@@ -0,0 +1,212 @@
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+from sqlalchemy import select, insert, func, text
+from ..extensions import db
+from ..models import User, Profile, Course, Section, Lesson, Step, Progress, Review
+from ..schemas import StepIn
+from ..schemas.step_schemas import VIDEO_EXAMPLE, SINGLE_QUESTION_EXAMPLE, MULTIPLE_QUESTION_EXAMPLE, ORDER_QUIZ_EXAMPLE
+from .progress_service import encode_bits
+from .ordering_service import ORDER_GAP
+
+
+WORDS = ('python', 'data', 'web', 'design', 'music', 'math', 'history', 'biology', 'finance', 'english',
+         'physics', 'drawing', 'cooking', 'marketing', 'statistics', 'chemistry')
+STEP_MODELS = (VIDEO_EXAMPLE, SINGLE_QUESTION_EXAMPLE, MULTIPLE_QUESTION_EXAMPLE, ORDER_QUIZ_EXAMPLE)
+# timestamps are spread back from a fixed date so a seed never depends on when it ran
+SEED_EPOCH = datetime(2026, 1, 1)
+REVIEW_TEXTS = ('Clear explanations and good exercises', 'Too fast in the middle part',
+                'Exactly what I needed', 'Good course, but the quizzes are too easy')
+
+
+@dataclass(slots=True)
+class SeedShape:
+    users: int = 1000
+    authors: int = 100   # the first `authors` new users own all the new courses
+    courses: int = 200
+    sections: int = 5   # per course
+    lessons: int = 4   # per section
+    steps: int = 8   # per lesson
+    enrollments: int = 5   # average per user
+    review_rate: float = 0.3   # share of enrollments with a review
+    seed: int = 42
+
+    @property
+    def steps_per_course(self):
+        return self.sections * self.lessons * self.steps
+
+
+class _Ids:
+    """First id of every table, so a seed is added after the existing rows."""
+
+    def __init__(self):
+        self.first = {
+            model: db.session.execute(select(func.coalesce(func.max(model.id), 0))).scalar_one() + 1
+            for model in (User, Profile, Course, Section, Lesson, Step, Progress, Review)
+        }
+
+    def __getitem__(self, model):
+        return self.first[model]
+
+
+def _step_templates():
+    """Validated StepIn payloads, copied with a new title and step_id for every step."""
+    return [StepIn.model_validate({'title': 'template', 'model': model}).model_dump(mode='json')
+            for model in STEP_MODELS]
+
+
+def _enrollments(shape: SeedShape, ids: _Ids):
+    """(user_id, course_id, score or None) of every enrollment, in the same
+    order every time for the same shape and seed."""
+    rng = random.Random(f'{shape.seed}-enrollments')
+    first_course, first_user = ids[Course], ids[User]
+    for n in range(shape.users):
+        user_id = first_user + n
+        count = min(rng.randint(0, 2 * shape.enrollments), shape.courses)
+        for offset in sorted(rng.sample(range(shape.courses), count)):
+            if offset % shape.authors == n:   # authors don't enroll in their own courses
+                continue
+            score = rng.randint(1, 5) if rng.random() < shape.review_rate else None
+            yield user_id, first_course + offset, score
+
+
+def _users(shape, ids, password_hash, now):
+    rng = random.Random(f'{shape.seed}-users')
+    for n in range(shape.users):
+        yield {'id': ids[User] + n, 'email': f'seed{ids[User] + n}@example.com', 'password': password_hash,
+               'reg_datetime': now - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60))}
+
+
+def _profiles(shape, ids):
+    rng = random.Random(f'{shape.seed}-profiles')
+    for n in range(shape.users):
+        yield {'id': ids[Profile] + n, 'user_id': ids[User] + n,
+               'first_name': f'User{n}', 'last_name': rng.choice(WORDS).capitalize(),
+               'age': rng.randint(14, 70), 'bio': 'no bio'}
+
+
+def _courses(shape, ids, now, enrolled, ratings):
+    rng = random.Random(f'{shape.seed}-courses')
+    for n in range(shape.courses):
+        course_id = ids[Course] + n
+        word, other = rng.choice(WORDS), rng.choice(WORDS)
+        rating_sum, rating_count = ratings.get(course_id, (0, 0))
+        yield {
+            'id': course_id, 'author_id': ids[User] + n % shape.authors,
+            'title': f'{word.capitalize()} and {other} {course_id}',
+            'description': f'A practical course on {word} with {other} examples, quizzes and projects',
+            'created_at': now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60)),
+            'rating': round(rating_sum / rating_count, 1) if rating_count else 0,
+            'rating_sum': rating_sum, 'rating_count': rating_count,
+            'step_ordinal_seq': shape.steps_per_course, 'next_section_place': shape.sections + 1,
+            'enrollments_count': enrolled[course_id],
+            'sections_count': shape.sections, 'lessons_count': shape.sections * shape.lessons,
+            'steps_count': shape.steps_per_course,
+        }
+
+
+def _sections(shape, ids):
+    for n in range(shape.courses * shape.sections):
+        place = n % shape.sections + 1
+        yield {'id': ids[Section] + n, 'course_id': ids[Course] + n // shape.sections,
+               'title': f'Section number {place}', 'place': place, 'sort_key': place * ORDER_GAP,
+               'next_lesson_place': shape.lessons + 1}
+
+
+def _lessons(shape, ids):
+    for n in range(shape.courses * shape.sections * shape.lessons):
+        place = n % shape.lessons + 1
+        yield {'id': ids[Lesson] + n, 'section_id': ids[Section] + n // shape.lessons,
+               'title': f'Lesson number {place}', 'place': place, 'sort_key': place * ORDER_GAP,
+               'next_step_place': shape.steps + 1}
+
+
+def _steps(shape, ids):
+    templates = _step_templates()
+    for n in range(shape.courses * shape.steps_per_course):
+        step_id, place = ids[Step] + n, n % shape.steps + 1
+        template = templates[n % len(templates)]
+        yield {'id': step_id, 'lesson_id': ids[Lesson] + n // shape.steps,
+               'place': place, 'sort_key': place * ORDER_GAP, 'ordinal': n % shape.steps_per_course + 1,
+               'content_type': template['model']['content_type'],
+               'payload': {**template, 'title': f'Step {place}', 'step_id': step_id}}
+
+
+def _progresses(shape, ids, now):
+    rng = random.Random(f'{shape.seed}-progress')
+    full = ((1 << shape.steps_per_course) - 1) << 1   # ordinals start at 1
+    for n, (user_id, course_id, _) in enumerate(_enrollments(shape, ids)):
+        done = rng.getrandbits(shape.steps_per_course + 1) & full if rng.random() < 0.9 else full
+        completed = done == full
+        enrolled_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        yield {'id': ids[Progress] + n, 'user_id': user_id, 'course_id': course_id,
+               'enroll_datetime': enrolled_at, 'done_steps': encode_bits(done), 'is_completed': completed,
+               'completed_at': enrolled_at + timedelta(days=rng.randint(1, 90)) if completed else None}
+
+
+def _reviews(shape, ids, now):
+    rng = random.Random(f'{shape.seed}-reviews')
+    rows = ((user_id, course_id, score) for user_id, course_id, score in _enrollments(shape, ids) if score)
+    for n, (user_id, course_id, score) in enumerate(rows):
+        yield {'id': ids[Review] + n, 'user_id': user_id, 'course_id': course_id, 'score': score,
+               'text': rng.choice(REVIEW_TEXTS),
+               'review_datetime': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))}
+
+
+def _sync_sequences(models):
+    """Explicit ids don't advance Postgres sequences; move them past the new rows."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+        ))
+    db.session.commit()
+
+
+def seed_database(shape: SeedShape, password_hash: str, chunk_size: int = 5000, echo=print):
+    """Add synthetic users, profiles, course trees with StepIn payloads,
+    enrollments with progress bitsets and reviews with Core bulk inserts,
+    committing every `chunk_size` rows. The same shape and seed always
+    produce the same data. Returns {table: (rows, seconds)}."""
+    if shape.authors < 1 or shape.authors > shape.users:
+        raise ValueError('authors must be between 1 and users')
+    ids = _Ids()
+    now = SEED_EPOCH
+
+    # course counters are written with the courses, so count enrollments and ratings first
+    enrolled, ratings = Counter(), {}
+    for _, course_id, score in _enrollments(shape, ids):
+        enrolled[course_id] += 1
+        if score:
+            total, count = ratings.get(course_id, (0, 0))
+            ratings[course_id] = (total + score, count + 1)
+
+    plan = (
+        (User, _users(shape, ids, password_hash, now)),
+        (Profile, _profiles(shape, ids)),
+        (Course, _courses(shape, ids, now, enrolled, ratings)),
+        (Section, _sections(shape, ids)),
+        (Lesson, _lessons(shape, ids)),
+        (Step, _steps(shape, ids)),
+        (Progress, _progresses(shape, ids, now)),
+        (Review, _reviews(shape, ids, now)),
+    )
+    stats = {}
+    for model, rows in plan:
+        started, count = time.perf_counter(), 0
+        while chunk := list(islice(rows, chunk_size)):
+            db.session.execute(insert(model), chunk)
+            db.session.commit()
+            count += len(chunk)
+        elapsed = time.perf_counter() - started
+        stats[model.__tablename__] = (count, elapsed)
+        echo(f'{model.__tablename__:12} {count:>10,} rows {elapsed:8.1f} s '
+             f'{count / elapsed if elapsed else 0:>10,.0f} rows/s')
+
+    _sync_sequences(model for model, _ in plan)
+    return stats
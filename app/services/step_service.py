@@ -0,0 +1,118 @@
+import asyncio
+import json
+import os
+from flask import current_app
+from sqlalchemy import select, update
+from ..extensions import db
+from ..models import Course, Section, Lesson, Step
+from .grading_service import strip_answers
+
+
+def step_upload_dir(user_id: int, course_id: int, section_place: int, lesson_place: int):
+    return os.path.join(os.path.split(current_app.root_path)[0], 'uploads', f'user_{user_id}',
+                        f'course_{course_id}', f'section_{section_place}',
+                        f'lesson_{lesson_place}')
+
+
+def store_step_payload(step: Step, input_model, upload_dir: str):
+    """Save a validated StepIn either in steps.payload or as a json file,
+    depending on STEP_STORAGE. The step must already be flushed."""
+    input_model.step_id = step.id
+
+    if current_app.config['STEP_STORAGE'] == 'db':
+        step.payload = input_model.model_dump(mode='json')
+        return
+
+    os.makedirs(upload_dir, exist_ok=True)
+    step.content_path = _write_step_file(upload_dir, step.place, step.content_type, input_model)
+
+
+def store_step_payloads(steps: list[dict], input_models: list, upload_dir: str):
+    """Bulk version of store_step_payload for rows inserted with Core.
+    `steps` are dicts with id, place and content_type; all payloads
+    (or file paths) are saved with one executemany UPDATE."""
+    to_db = current_app.config['STEP_STORAGE'] == 'db'
+    if not to_db:
+        os.makedirs(upload_dir, exist_ok=True)
+
+    values = []
+    for step, input_model in zip(steps, input_models):
+        input_model.step_id = step['id']
+        if to_db:
+            values.append({'id': step['id'], 'payload': input_model.model_dump(mode='json')})
+        else:
+            path = _write_step_file(upload_dir, step['place'], step['content_type'], input_model)
+            values.append({'id': step['id'], 'content_path': path})
+
+    if values:
+        db.session.execute(update(Step), values)
+
+
+def _write_step_file(upload_dir: str, place: int, content_type: str, input_model):
+    path = os.path.join(upload_dir, f'step_{place}_{content_type}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(input_model.model_dump_json(indent=2))
+    return path
+
+
+def step_payload_query(course_id: int, section_place: int, lesson_place: int, step_place: int):
+    """One indexed query from the places of a step to its payload and course author."""
+    return (
+        select(Step.payload, Step.content_path, Course.author_id)
+        .join(Lesson, Lesson.id == Step.lesson_id)
+        .join(Section, Section.id == Lesson.section_id)
+        .join(Course, Course.id == Section.course_id)
+        .where(
+            Section.course_id == course_id,
+            Section.place == section_place,
+            Lesson.place == lesson_place,
+            Step.place == step_place
+        )
+    )
+
+
+def read_step_file(content_path: str | None):
+    """Payload of a step saved before STEP_STORAGE='db', None when there's no file."""
+    if not content_path or not os.path.isfile(content_path):
+        return None
+    with open(content_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def viewer_payload(payload, author_id: int, viewer_id: int | None):
+    """Quiz answers are only included for the course author."""
+    if payload is None or author_id == viewer_id:
+        return payload
+    return strip_answers(payload)
+
+
+def find_step_payload(course_id: int, section_place: int, lesson_place: int, step_place: int,
+                      viewer_id: int | None = None):
+    """Resolve a step by its places with one indexed query.
+    Steps saved before STEP_STORAGE='db' are read from content_path.
+    Quiz answers are only included for the course author."""
+    row = db.session.execute(
+        step_payload_query(course_id, section_place, lesson_place, step_place)
+    ).one_or_none()
+
+    if not row:
+        return None
+    payload = row.payload
+    if payload is None:
+        payload = read_step_file(row.content_path)
+    return viewer_payload(payload, row.author_id, viewer_id)
+
+
+async def find_step_payload_async(session, course_id: int, section_place: int, lesson_place: int,
+                                  step_place: int, viewer_id: int | None = None):
+    """find_step_payload on an AsyncSession; a content_path file is read in a worker thread."""
+    row = (await session.execute(
+        step_payload_query(course_id, section_place, lesson_place, step_place)
+    )).one_or_none()
+
+    if not row:
+        return None
+    payload = row.payload
+    if payload is None and row.content_path:
+        payload = await asyncio.to_thread(read_step_file, row.content_path)
+    return viewer_payload(payload, row.author_id, viewer_id)
@@ -0,0 +1,233 @@
+import json
+import os
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update
+from ..extensions import db
+from ..models import Course, Section, Lesson, Step
+from ..schemas import CourseIn, SectionIn, LessonIn, StepIn
+from .cource_service import adjust_course_counters
+from .ordering_service import ORDER_GAP
+from .progress_service import allocate_step_ordinals
+from .step_service import step_upload_dir, store_step_payloads
+
+
+# A course archive is NDJSON: one course line, then sections, each followed by its
+# lessons, each followed by its steps, all in display order, and an end line with
+# the counts so a truncated archive is never imported.
+#   {"type": "course", "format": 1, "title": ..., "description": ...}
+#   {"type": "section", "title": ...}
+#   {"type": "lesson", "title": ...}
+#   {"type": "step", "payload": {"title": ..., "model": {...}}}
+#   {"type": "end", "sections": 1, "lessons": 1, "steps": 1}
+ARCHIVE_FORMAT = 1
+EXPORT_YIELD_PER = 500
+
+
+class CourseImportError(ValueError):
+    def __init__(self, msg: str, line: int | None = None):
+        super().__init__(msg)
+        self.line = line
+
+
+def _line(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode() + b'\n'
+
+
+def export_course_lines(course_id: int):
+    """Generate the archive of a course line by line. The tree is read with
+    one outer-joined query fetched EXPORT_YIELD_PER rows at a time, so memory
+    doesn't grow with the number of steps. Needs an active app context."""
+    course = db.session.execute(
+        select(Course.title, Course.description).where(Course.id == course_id)
+    ).one()
+    yield _line({'type': 'course', 'format': ARCHIVE_FORMAT,
+                 'title': course.title, 'description': course.description})
+
+    rows = db.session.execute(
+        select(Section.id.label('section_id'), Section.title.label('section_title'),
+               Lesson.id.label('lesson_id'), Lesson.title.label('lesson_title'),
+               Step.id.label('step_id'), Step.payload, Step.content_path)
+        .outerjoin(Lesson, Lesson.section_id == Section.id)
+        .outerjoin(Step, Step.lesson_id == Lesson.id)
+        .where(Section.course_id == course_id)
+        .order_by(Section.sort_key, Section.id, Lesson.sort_key, Lesson.id, Step.sort_key, Step.id)
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+
+    section_id = lesson_id = None
+    counts = {'sections': 0, 'lessons': 0, 'steps': 0}
+    for row in rows:
+        if row.section_id != section_id:
+            section_id = row.section_id
+            counts['sections'] += 1
+            yield _line({'type': 'section', 'title': row.section_title})
+        if row.lesson_id is not None and row.lesson_id != lesson_id:
+            lesson_id = row.lesson_id
+            counts['lessons'] += 1
+            yield _line({'type': 'lesson', 'title': row.lesson_title})
+        if row.step_id is None:
+            continue
+
+        payload = row.payload
+        if payload is None and row.content_path and os.path.isfile(row.content_path):
+            with open(row.content_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        if payload is None:
+            continue
+        payload.pop('step_id', None)   # ids belong to this instance
+        counts['steps'] += 1
+        yield _line({'type': 'step', 'payload': payload})
+
+    yield _line({'type': 'end', **counts})
+
+
+class _CourseImport:
+    """Builds a new course from archive items. Sections and lessons are flushed
+    as they come, steps are collected and inserted `chunk_size` at a time."""
+
+    def __init__(self, author_id: int, chunk_size: int):
+        self.author_id = author_id
+        self.chunk_size = chunk_size
+        self.course_id = None
+        self.section = self.lesson = None   # (id, place)
+        self.lesson_place = self.step_place = 0
+        self.counts = {'sections': 0, 'lessons': 0, 'steps': 0}
+        self.pending = []   # (step row, section place, lesson place, StepIn)
+        # section / lesson id -> next place of a child, see reserve_places()
+        self.next_places = {Section: {}, Lesson: {}}
+
+    def add_course(self, item):
+        model = CourseIn.model_validate(item)
+        if db.session.execute(
+            select(Course.id).where(Course.author_id == self.author_id, Course.title == model.title)
+        ).first():
+            raise CourseImportError('Course title must be unique')
+        course = Course(title=model.title, description=model.description, author_id=self.author_id)
+        db.session.add(course)
+        db.session.flush()
+        self.course_id = course.id
+
+    def add_section(self, item):
+        self.counts['sections'] += 1
+        place = self.counts['sections']
+        section = Section(course_id=self.course_id, title=SectionIn.model_validate(item).title,
+                          place=place, sort_key=place * ORDER_GAP)
+        db.session.add(section)
+        db.session.flush()
+        self.section, self.lesson, self.lesson_place = (section.id, place), None, 0
+
+    def add_lesson(self, item):
+        if self.section is None:
+            raise CourseImportError('Lesson before any section')
+        self.counts['lessons'] += 1
+        self.lesson_place += 1
+        self.next_places[Section][self.section[0]] = self.lesson_place + 1
+        lesson = Lesson(section_id=self.section[0], title=LessonIn.model_validate(item).title,
+                        place=self.lesson_place, sort_key=self.lesson_place * ORDER_GAP)
+        db.session.add(lesson)
+        db.session.flush()
+        self.lesson, self.step_place = (lesson.id, self.lesson_place), 0
+
+    def add_step(self, item):
+        if self.lesson is None:
+            raise CourseImportError('Step before any lesson')
+        step_in = StepIn.model_validate(item.get('payload'))
+        self.step_place += 1
+        self.next_places[Lesson][self.lesson[0]] = self.step_place + 1
+        row = {'lesson_id': self.lesson[0], 'place': self.step_place, 'sort_key': self.step_place * ORDER_GAP,
+               'content_type': step_in.model.content_type}
+        self.pending.append((row, self.section[1], self.lesson[1], step_in))
+        if len(self.pending) >= self.chunk_size:
+            self.flush_steps()
+
+    def flush_steps(self):
+        if not self.pending:
+            return
+        rows = [row for row, _, _, _ in self.pending]
+        first_ordinal = allocate_step_ordinals(self.course_id, len(rows))
+        for i, row in enumerate(rows):
+            row['ordinal'] = first_ordinal + i
+        db.session.execute(insert(Step), rows)
+
+        step_ids = dict(((r.lesson_id, r.place), r.id) for r in db.session.execute(
+            select(Step.lesson_id, Step.place, Step.id)
+            .where(Step.lesson_id.in_({row['lesson_id'] for row in rows}), Step.ordinal >= first_ordinal)
+        ))
+        for row in rows:
+            row['id'] = step_ids[(row['lesson_id'], row['place'])]
+
+        # with STEP_STORAGE='files' every lesson has its own directory
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end == len(rows) or rows[end]['lesson_id'] != rows[start]['lesson_id']:
+                _, section_place, lesson_place, _ = self.pending[start]
+                store_step_payloads(rows[start:end], [step_in for *_, step_in in self.pending[start:end]],
+                                    step_upload_dir(self.author_id, self.course_id, section_place, lesson_place))
+                start = end
+
+        self.counts['steps'] += len(rows)
+        self.pending = []
+
+    def finish(self, item):
+        self.flush_steps()
+        expected = {key: item.get(key) for key in self.counts}
+        if expected != self.counts:
+            raise CourseImportError(f'Archive declares {expected}, found {self.counts}')
+        adjust_course_counters(self.course_id, **self.counts)
+        self.set_place_counters()
+
+    def set_place_counters(self):
+        """The places were numbered here, so the counters continue after the last ones."""
+        db.session.execute(
+            update(Course).where(Course.id == self.course_id)
+            .values(next_section_place=self.counts['sections'] + 1)
+            .execution_options(synchronize_session=False)
+        )
+        for model, counter in ((Section, 'next_lesson_place'), (Lesson, 'next_step_place')):
+            if self.next_places[model]:
+                db.session.execute(update(model), [{'id': row_id, counter: place}
+                                                   for row_id, place in self.next_places[model].items()])
+
+
+def import_course_lines(lines, author_id: int, chunk_size: int = 1000) -> tuple[int, dict]:
+    """Create a course of `author_id` from archive lines (bytes or str).
+    Every item is validated with the schema the API uses for it and steps are
+    inserted with one executemany per `chunk_size`. Everything happens in the
+    current transaction, so the caller commits, or rolls back on
+    CourseImportError / pydantic.ValidationError. Returns (course id, counts)."""
+    builder = _CourseImport(author_id, chunk_size)
+    handlers = {'section': builder.add_section, 'lesson': builder.add_lesson, 'step': builder.add_step}
+    line_no, finished = 0, False
+
+    try:
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            if finished:
+                raise CourseImportError('Data after the end line')
+            try:
+                item = json.loads(line)
+            except ValueError:
+                raise CourseImportError('Not a JSON line')
+            kind = item.get('type') if isinstance(item, dict) else None
+
+            if builder.course_id is None:
+                if kind != 'course' or item.get('format') != ARCHIVE_FORMAT:
+                    raise CourseImportError(f'Expected a course line of format {ARCHIVE_FORMAT}')
+                builder.add_course(item)
+            elif kind == 'end':
+                builder.finish(item)
+                finished = True
+            elif kind in handlers:
+                handlers[kind](item)
+            else:
+                raise CourseImportError(f'Unknown line type: {kind!r}')
+    except CourseImportError as e:
+        e.line = e.line or line_no
+        raise
+    except ValidationError as e:
+        raise CourseImportError(str(e), line_no) from e
+
+    if not finished:
+        raise CourseImportError('Archive is truncated, no end line', line_no)
+    return builder.course_id, builder.counts
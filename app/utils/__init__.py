@@ -1 +1,7 @@
-from .main_utils import delete_all_files, update_step_place
\ No newline at end of file
+from .main_utils import delete_all_files, encode_cursor, decode_cursor
+from .cache_utils import TTLCache
+from .profiling_utils import StartupProfile, measure_startup
+from .response_cache_utils import ResponseCache
+from .metrics_utils import Metrics
+from .async_db_utils import AsyncDatabase, async_database_url
+from .db_utils import configure_engines, DatabaseRouter, RoutingSession
@@ -0,0 +1,81 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from .db_utils import set_sqlite_pragmas
+
+
+# sync dialect -> async driver used when ASYNC_DATABASE_URL isn't set
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def async_database_url(url):
+    """The same database as `url` through its asyncio driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver for {backend}, set ASYNC_DATABASE_URL')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncDatabase:
+    """Async engine and session factory for the ASGI routes.
+
+    The URL is the app's database (after Flask-SQLAlchemy resolved relative
+    SQLite paths) with its asyncio driver, or ASYNC_DATABASE_URL. Both the URL
+    and the engine, and sqlalchemy.ext.asyncio with it, are only resolved on
+    first use, so the WSGI app never loads the async drivers and still runs on
+    databases without one. Connections belong to the event loop that opened
+    them; `dispose()` the engine when that loop shuts down.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.app = None
+        self.url = None
+        self._engine = None
+        self._sessionmaker = None
+
+    def init_app(self, app):
+        self.app, self.url = app, None
+        self._engine = self._sessionmaker = None
+        app.extensions['async_db'] = self
+
+    def _engine_options(self, url, config):
+        """(create_async_engine options, SQLite pragmas) for `url`."""
+        if url.get_backend_name() == 'sqlite':
+            options, pragmas = {}, config['SQLITE_PRAGMAS']
+        else:
+            options, pragmas = {'pool_pre_ping': True}, {}
+        if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+            # in-memory SQLite gets a StaticPool, which has no size
+            options.update(pool_size=config['ASYNC_DATABASE_POOL_SIZE'],
+                           max_overflow=config['ASYNC_DATABASE_MAX_OVERFLOW'])
+        return options, pragmas
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+            with self.app.app_context():
+                self.url = self.app.config['ASYNC_DATABASE_URL'] or async_database_url(self.db.engine.url)
+            options, pragmas = self._engine_options(make_url(self.url), self.app.config)
+            self._engine = create_async_engine(self.url, **options)
+            if pragmas:
+                event.listen(self._engine.sync_engine, 'connect',
+                             lambda dbapi_connection, record: set_sqlite_pragmas(dbapi_connection, pragmas))
+            self._sessionmaker = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._engine
+
+    def session(self):
+        """New AsyncSession, to be used as `async with async_db.session() as session:`."""
+        self.engine
+        return self._sessionmaker()
+
+    async def dispose(self):
+        if self._engine is not None:
+            engine, self._engine = self._engine, None
+            await engine.dispose()
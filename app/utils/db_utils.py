@@ -0,0 +1,142 @@
+import time
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# pool settings by DATABASE_PROFILE; keys set in SQLALCHEMY_ENGINE_OPTIONS win
+ENGINE_PROFILES = {
+    # threaded or ASGI web workers: about one connection per busy thread
+    'web': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 10, 'pool_recycle': 1800, 'pool_pre_ping': True},
+    # flask commands and scripts
+    'cli': {'pool_size': 1, 'max_overflow': 2, 'pool_timeout': 30, 'pool_recycle': 1800, 'pool_pre_ping': True},
+    # behind PgBouncer in transaction mode, which does the pooling
+    'pgbouncer': {'poolclass': NullPool, 'pool_pre_ping': False},
+}
+# a local file has no server that drops idle connections
+SQLITE_SKIPPED_OPTIONS = ('pool_recycle', 'pool_pre_ping')
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def profile_engine_options(url, profile: str) -> dict:
+    """ENGINE_PROFILES[profile] fitted to the database at `url`."""
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f'Unknown DATABASE_PROFILE: {profile}')
+    url = make_url(url)
+    if _is_memory_sqlite(url):
+        return {}   # Flask-SQLAlchemy gives it a StaticPool, which has no size
+    options = dict(ENGINE_PROFILES[profile])
+    if url.get_backend_name() == 'sqlite':
+        for key in SQLITE_SKIPPED_OPTIONS:
+            options.pop(key, None)
+    return options
+
+
+def configure_engines(config):
+    """Fill SQLALCHEMY_ENGINE_OPTIONS from DATABASE_PROFILE and add the
+    DATABASE_REPLICA_URL bind. Runs before db.init_app()."""
+    url = config['SQLALCHEMY_DATABASE_URI']
+    options = profile_engine_options(url, config['DATABASE_PROFILE'])
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+    replica_url = config['DATABASE_REPLICA_URL']
+    if replica_url:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = {'url': replica_url, **profile_engine_options(replica_url, config['DATABASE_PROFILE'])}
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def set_sqlite_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+def listen_sqlite(engine, pragmas: dict):
+    """Apply SQLITE_PRAGMAS to every new connection of a SQLite engine.
+
+    The sqlite3 module only sends BEGIN before the first INSERT/UPDATE/DELETE,
+    so the write lock is taken late and held until commit. In WAL mode readers
+    don't block that writer and it doesn't block them, and busy_timeout makes
+    other writers wait for the lock instead of failing with "database is locked".
+    """
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, pragmas)
+
+
+class RoutingSession(Session):
+    """db.session that sends the reads of safe requests to the replica bind.
+
+    Everything else goes to the primary: flushes, INSERT/UPDATE/DELETE
+    statements, work outside of a request, and every statement of a request
+    after it wrote. DatabaseRouter decides per request whether the replica
+    may be used at all.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('db_replica'):
+            if self._flushing or (clause is not None and clause.is_dml):
+                g.db_replica = False   # read-your-writes within the request
+                g.db_wrote = True
+            else:
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class DatabaseRouter:
+    """SQLite tuning and read-replica routing for the app's engines.
+
+    GET/HEAD/OPTIONS requests read from the DATABASE_REPLICA_URL bind, other
+    requests use the primary. A successful write request sets a cookie for
+    DATABASE_REPLICA_STICKY seconds, and while it's valid the client's reads
+    stay on the primary too, so it sees its own writes through the
+    replication lag.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.replica = False
+        self.sticky_seconds = 0
+        self.cookie_name = 'db_primary_until'
+
+    def init_app(self, app):
+        """Call after db.init_app()."""
+        self.replica = bool(app.config['DATABASE_REPLICA_URL'])
+        self.sticky_seconds = app.config['DATABASE_REPLICA_STICKY']
+        self.cookie_name = app.config['DATABASE_STICKY_COOKIE']
+        app.extensions['db_router'] = self
+
+        with app.app_context():
+            for engine in self.db.engines.values():
+                if engine.dialect.name == 'sqlite' and not _is_memory_sqlite(engine.url):
+                    listen_sqlite(engine, app.config['SQLITE_PRAGMAS'])
+
+        if self.replica:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    def _sticky(self) -> bool:
+        try:
+            return float(request.cookies.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _before_request(self):
+        g.db_replica = request.method in SAFE_METHODS and not self._sticky()
+
+    def _after_request(self, response):
+        wrote = g.get('db_wrote') or (request.method not in SAFE_METHODS and response.status_code < 400)
+        if wrote and self.sticky_seconds:
+            response.set_cookie(self.cookie_name, str(int(time.time() + self.sticky_seconds)),
+                                max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
@@ -1,3 +1,5 @@
+import base64
+import json
 import os
 
 
@@ -7,20 +9,19 @@ def delete_all_files(directory):
         if os.path.isfile(file_path):
             os.remove(file_path)
 
-def update_step_place(step_path: str, new_place: int, ignore_unexists: bool = False):
-    if not step_path or not isinstance(step_path, str):
-        raise ValueError('Path must be a not empty string')
-    if not os.path.exists(step_path) and ignore_unexists:
-        raise FileNotFoundError('File not found')
 
-    lesson_path, filename = os.path.split(step_path)
-    first_index = filename.find('_')
-    new_path = os.path.join(
-        lesson_path,
-        f'{filename[:first_index]}_{new_place}{filename[filename.find('_', first_index+1):]}',
-    )
-    os.rename(step_path, new_path)
-
-    return new_path
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
 
 
+def decode_cursor(cursor: str) -> list:
+    """Raises ValueError on malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Malformed cursor: {e}')
+    if not isinstance(values, list):
+        raise ValueError('Malformed cursor')
+    return values
@@ -0,0 +1,210 @@
+import hmac
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# IN (?, ?, ?) lists and inline numbers vary between otherwise identical statements
+PARAM_LIST = re.compile(r'\((?:\?|%s|:\w+)(?:,\s*(?:\?|%s|:\w+))*\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+
+def statement_shape(statement: str) -> str:
+    return NUMBER.sub('?', PARAM_LIST.sub('(?)', ' '.join(statement.split())))
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestStats:
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'redis_count', 'redis_seconds', 'shapes')
+
+    def __init__(self, track_shapes: bool):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.redis_count = 0
+        self.redis_seconds = 0.0
+        self.shapes = Counter() if track_shapes else None
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Per-process request metrics in the Prometheus text format.
+
+    Every request is timed from before_request to after_request and counts the
+    SQL statements (through engine events) and Redis calls (through the
+    RedisClient hook) it made, by endpoint. The totals are also sent back as a
+    Server-Timing header. With METRICS_N_PLUS_ONE_THRESHOLD > 0, a statement
+    shape repeated that many times within one request is logged as a likely N+1.
+
+    Each worker process keeps its own numbers, so scrape every worker
+    (or run a single one) to get the full picture.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+        self.enabled = False
+        self.server_timing = True
+        self.n_plus_one_threshold = 0
+        self.token = None
+        self._lock = threading.Lock()
+        self._listening = False
+        self._reset()
+
+    def init_app(self, app):
+        self.enabled = app.config['METRICS_ENABLED']
+        self.server_timing = app.config['METRICS_SERVER_TIMING']
+        self.n_plus_one_threshold = app.config['METRICS_N_PLUS_ONE_THRESHOLD']
+        self.token = app.config['METRICS_TOKEN']
+        self._reset()
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if self.redis is not None:
+            self.redis.on_call = self.record_redis
+        if not self._listening:
+            # on the Engine class, so engines created after init_app are covered too
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+
+    def _reset(self):
+        self.requests = Counter()   # (endpoint, method, status) -> count
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))   # (endpoint, method)
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))   # endpoint -> statements per request
+        self.sql_seconds = Counter()
+        self.redis_calls = Counter()
+        self.redis_seconds = Counter()
+        self.upload_bytes = Counter()
+        self.n_plus_one = Counter()
+
+    @staticmethod
+    def _current():
+        return g.get('request_stats') if has_request_context() else None
+
+    def _before_request(self):
+        g.request_stats = RequestStats(self.n_plus_one_threshold > 0)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None and self._current() is not None:
+            context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = self._current()
+        started = getattr(context, '_metrics_started', None)
+        if stats is None or started is None:
+            return
+        stats.sql_count += 1
+        stats.sql_seconds += time.perf_counter() - started
+        if stats.shapes is not None:
+            stats.shapes[statement_shape(statement)] += 1
+
+    def record_redis(self, seconds: float):
+        stats = self._current()
+        if stats is not None:
+            stats.redis_count += 1
+            stats.redis_seconds += seconds
+
+    def _after_request(self, response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'unmatched'
+        upload = (request.content_length or 0) if request.mimetype == 'multipart/form-data' else 0
+
+        repeated = []
+        if stats.shapes:
+            repeated = [(shape, n) for shape, n in stats.shapes.items() if n >= self.n_plus_one_threshold]
+            for shape, n in repeated:
+                current_app.logger.warning('Possible N+1 in %s: %d x %s', endpoint, n, shape)
+
+        with self._lock:
+            self.requests[(endpoint, request.method, response.status_code)] += 1
+            self.latency[(endpoint, request.method)].observe(elapsed)
+            self.queries[endpoint].observe(stats.sql_count)
+            self.sql_seconds[endpoint] += stats.sql_seconds
+            self.redis_calls[endpoint] += stats.redis_count
+            self.redis_seconds[endpoint] += stats.redis_seconds
+            self.upload_bytes[endpoint] += upload
+            self.n_plus_one[endpoint] += len(repeated)
+
+        if self.server_timing:
+            response.headers.add('Server-Timing', ', '.join((
+                f'app;dur={elapsed * 1000:.2f}',
+                f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.sql_count} queries"',
+                f'redis;dur={stats.redis_seconds * 1000:.2f};desc="{stats.redis_count} calls"',
+            )))
+        return response
+
+    def authorized(self, authorization: str | None) -> bool:
+        """Whether a scrape may read the metrics; anyone can when METRICS_TOKEN is unset."""
+        if not self.token:
+            return True
+        return hmac.compare_digest(authorization or '', f'Bearer {self.token}')
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            def histogram(name, labels, hist):
+                cumulative = 0
+                for bound, n in zip((*hist.buckets, '+Inf'), hist.counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {hist.sum}')
+                lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+            family('http_requests_total', 'counter', 'Finished requests.')
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{_label(endpoint)}",method="{method}",'
+                             f'status="{status}"}} {n}')
+
+            family('http_request_duration_seconds', 'histogram', 'Request latency.')
+            for (endpoint, method), hist in sorted(self.latency.items()):
+                histogram('http_request_duration_seconds', f'endpoint="{_label(endpoint)}",method="{method}"', hist)
+
+            family('http_request_sql_queries', 'histogram', 'SQL statements executed per request.')
+            for endpoint, hist in sorted(self.queries.items()):
+                histogram('http_request_sql_queries', f'endpoint="{_label(endpoint)}"', hist)
+
+            for name, kind, help_text, values in (
+                ('http_request_sql_seconds_total', 'counter', 'Time spent in SQL statements.', self.sql_seconds),
+                ('http_request_redis_calls_total', 'counter', 'Redis commands sent.', self.redis_calls),
+                ('http_request_redis_seconds_total', 'counter', 'Time spent in Redis commands.', self.redis_seconds),
+                ('http_request_upload_bytes_total', 'counter', 'Bytes of multipart uploads.', self.upload_bytes),
+                ('http_request_n_plus_one_total', 'counter',
+                 'Statement shapes repeated past METRICS_N_PLUS_ONE_THRESHOLD.', self.n_plus_one),
+            ):
+                family(name, kind, help_text)
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
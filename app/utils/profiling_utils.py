@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+
+# Runs in a fresh interpreter so nothing is imported yet
+STARTUP_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported}))
+"""
+
+
+@dataclass(slots=True)
+class StartupProfile:
+    import_seconds: float
+    create_app_seconds: float
+    # (module, self seconds, cumulative seconds, nesting depth) in -X importtime order
+    imports: list[tuple[str, float, float, int]] = field(default_factory=list)
+
+    @property
+    def total_seconds(self):
+        return self.import_seconds + self.create_app_seconds
+
+    def slowest(self, count: int, by: str = 'cumulative'):
+        index = 2 if by == 'cumulative' else 1
+        return sorted(self.imports, key=lambda item: item[index], reverse=True)[:count]
+
+
+def parse_importtime(stderr: str):
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        imports.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return imports
+
+
+def measure_startup(project_dir: str, env: dict | None = None) -> StartupProfile:
+    """Import the app and call create_app() in a new interpreter under -X importtime."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE],
+        cwd=project_dir, env={**os.environ, **(env or {})},
+        capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Startup probe failed:\n{result.stderr[-2000:]}')
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return StartupProfile(timings['import'], timings['create_app'], parse_importtime(result.stderr))
@@ -0,0 +1,320 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+
+# redis-py (with redis.asyncio) is imported on the first call, not at app start
+class RedisUnavailableError(Exception):
+    """A Redis command failed; the original RedisError is the __cause__."""
+
+
+class CircuitOpenError(RedisUnavailableError):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling Redis after `failure_threshold` consecutive errors.
+    After `reset_timeout` seconds one trial call is let through (half-open):
+    success closes the circuit again, failure keeps it open."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # let a single trial call through, the rest wait for its result
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RedisClient:
+    """Lazily created, pooled Redis connection shared by the app.
+    REDIS_URL='fakeredis://' uses fakeredis (for tests and benchmarks)."""
+
+    def __init__(self):
+        self._redis = None
+        self._lock = threading.Lock()
+        self.config = {}
+        self.breaker = CircuitBreaker()
+        self.on_call = None   # callback(seconds) after every command, set by Metrics
+        self.fake_server = None   # fakeredis server, shared with AsyncRedisClient
+
+    def init_app(self, app):
+        self.config = app.config
+        self._redis = None
+        self.breaker = CircuitBreaker(app.config['REDIS_BREAKER_THRESHOLD'],
+                                      app.config['REDIS_BREAKER_RESET'])
+        app.extensions['redis'] = self
+
+    @property
+    def connection(self):
+        if self._redis is None:
+            with self._lock:
+                if self._redis is None:
+                    self._redis = self._connect()
+        return self._redis
+
+    def _connect(self):
+        url = self.config['REDIS_URL']
+        if url.startswith('fakeredis://'):
+            import fakeredis
+            self.fake_server = fakeredis.FakeServer()
+            return fakeredis.FakeRedis(server=self.fake_server)
+
+        from redis import Redis, ConnectionPool
+
+        pool = ConnectionPool.from_url(
+            url,
+            max_connections=self.config['REDIS_MAX_CONNECTIONS'],
+            socket_timeout=self.config['REDIS_SOCKET_TIMEOUT'],
+            socket_connect_timeout=self.config['REDIS_SOCKET_TIMEOUT'],
+            health_check_interval=30
+        )
+        return Redis(connection_pool=pool)
+
+    def call(self, method: str, *args, **kwargs):
+        return self.run(lambda r: getattr(r, method)(*args, **kwargs))
+
+    def run(self, fn):
+        """Run fn(redis) through the circuit breaker.
+        Raises RedisUnavailableError (CircuitOpenError while the circuit is open)."""
+        if not self.breaker.allow():
+            raise CircuitOpenError('Redis circuit is open')
+        from redis import RedisError
+
+        started = time.perf_counter()
+        try:
+            result = fn(self.connection)
+        except RedisError as e:
+            self.breaker.record_failure()
+            raise RedisUnavailableError(str(e)) from e
+        finally:
+            if self.on_call is not None:
+                self.on_call(time.perf_counter() - started)
+        self.breaker.record_success()
+        return result
+
+
+class AsyncRedisClient:
+    """redis.asyncio counterpart of RedisClient for the ASGI routes, with its
+    own connection pool and circuit breaker. The pool belongs to the event loop
+    it was first used on; `close()` it when that loop shuts down.
+    With 'fakeredis://' it shares the data of the sync client's fake server."""
+
+    def __init__(self, redis_client: RedisClient):
+        self.sync = redis_client
+        self._redis = None
+        self.config = {}
+        self.breaker = CircuitBreaker()
+
+    def init_app(self, app):
+        self.config = app.config
+        self._redis = None
+        self.breaker = CircuitBreaker(app.config['REDIS_BREAKER_THRESHOLD'],
+                                      app.config['REDIS_BREAKER_RESET'])
+        app.extensions['async_redis'] = self
+
+    @property
+    def connection(self):
+        # one event loop, no other thread touches it: no lock needed
+        if self._redis is None:
+            self._redis = self._connect()
+        return self._redis
+
+    def _connect(self):
+        url = self.config['REDIS_URL']
+        if url.startswith('fakeredis://'):
+            import fakeredis
+            self.sync.connection   # creates the shared fake server
+            return fakeredis.FakeAsyncRedis(server=self.sync.fake_server)
+
+        from redis.asyncio import Redis, ConnectionPool
+
+        pool = ConnectionPool.from_url(
+            url,
+            max_connections=self.config['REDIS_MAX_CONNECTIONS'],
+            socket_timeout=self.config['REDIS_SOCKET_TIMEOUT'],
+            socket_connect_timeout=self.config['REDIS_SOCKET_TIMEOUT'],
+            health_check_interval=30
+        )
+        return Redis(connection_pool=pool)
+
+    async def call(self, method: str, *args, **kwargs):
+        return await self.run(lambda r: getattr(r, method)(*args, **kwargs))
+
+    async def run(self, fn):
+        """Await fn(redis) through the circuit breaker, like RedisClient.run."""
+        if not self.breaker.allow():
+            raise CircuitOpenError('Redis circuit is open')
+        from redis import RedisError
+
+        try:
+            result = await fn(self.connection)
+        except RedisError as e:
+            self.breaker.record_failure()
+            raise RedisUnavailableError(str(e)) from e
+        self.breaker.record_success()
+        return result
+
+    async def close(self):
+        if self._redis is not None:
+            redis, self._redis = self._redis, None
+            await redis.aclose()
+
+
+class TokenBlocklist:
+    """JWT revocation list kept in Redis with a per-process cache.
+
+    Revoked jtis are remembered locally until they expire. Tokens that were
+    found not revoked are cached for REVOCATION_CACHE_TTL seconds; every
+    revoke bumps VERSION_KEY, and each process re-reads it at most once per
+    REVOCATION_VERSION_POLL seconds, dropping its negative cache when it changes.
+    So most requests are answered without a Redis round trip.
+
+    When Redis can't be reached, REDIS_FAIL_OPEN decides: True lets tokens
+    through (only locally known revocations apply), False rejects them.
+    """
+
+    VERSION_KEY = 'blocklist:version'
+
+    def __init__(self, redis_client: RedisClient, async_redis_client: AsyncRedisClient | None = None):
+        self.redis = redis_client
+        self.async_redis = async_redis_client
+        self.fail_open = True
+        self.negative_ttl = 60.0
+        self.version_poll = 1.0
+        self.max_size = 100_000
+        self._lock = threading.Lock()
+        self._reset()
+
+    def init_app(self, app):
+        self.fail_open = app.config['REDIS_FAIL_OPEN']
+        self.negative_ttl = app.config['REVOCATION_CACHE_TTL']
+        self.version_poll = app.config['REVOCATION_VERSION_POLL']
+        self.max_size = app.config['REVOCATION_CACHE_SIZE']
+        self._reset()
+        app.extensions['token_blocklist'] = self
+
+    def _reset(self):
+        self._revoked = OrderedDict()   # jti -> local expiry
+        self._not_revoked = OrderedDict()   # jti -> local expiry
+        self._version = None
+        self._next_version_check = 0.0
+
+    def revoke(self, jti: str, expires: timedelta):
+        with self._lock:
+            self._not_revoked.pop(jti, None)
+            self._remember(self._revoked, jti, time.monotonic() + expires.total_seconds())
+
+        self.redis.run(
+            lambda r: r.pipeline().set(jti, "", ex=expires).incr(self.VERSION_KEY).execute()
+        )
+
+    def is_revoked(self, jti: str) -> bool:
+        now = time.monotonic()
+        if self._known_revoked(jti, now):
+            return True
+
+        if self._version_due(now):
+            try:
+                self._apply_version(self.redis.call('get', self.VERSION_KEY))
+            except RedisUnavailableError:
+                pass
+        if self._known_not_revoked(jti, now):
+            return False
+
+        try:
+            ttl_ms = self.redis.call('pttl', jti)
+        except RedisUnavailableError:
+            return not self.fail_open
+        return self._remember_ttl(jti, now, ttl_ms)
+
+    async def is_revoked_async(self, jti: str) -> bool:
+        """is_revoked for the ASGI routes: the same local caches, Redis through the async client."""
+        now = time.monotonic()
+        if self._known_revoked(jti, now):
+            return True
+
+        if self._version_due(now):
+            try:
+                self._apply_version(await self.async_redis.call('get', self.VERSION_KEY))
+            except RedisUnavailableError:
+                pass
+        if self._known_not_revoked(jti, now):
+            return False
+
+        try:
+            ttl_ms = await self.async_redis.call('pttl', jti)
+        except RedisUnavailableError:
+            return not self.fail_open
+        return self._remember_ttl(jti, now, ttl_ms)
+
+    def _known_revoked(self, jti: str, now: float) -> bool:
+        with self._lock:
+            expiry = self._revoked.get(jti)
+            if expiry is not None:
+                if expiry > now:
+                    return True
+                del self._revoked[jti]
+        return False
+
+    def _known_not_revoked(self, jti: str, now: float) -> bool:
+        with self._lock:
+            expiry = self._not_revoked.get(jti)
+            return expiry is not None and expiry > now
+
+    def _remember_ttl(self, jti: str, now: float, ttl_ms: int) -> bool:
+        with self._lock:
+            if ttl_ms == -2:
+                self._remember(self._not_revoked, jti, now + self.negative_ttl)
+                return False
+            # -1 means the key never expires; keep it for the negative cache TTL then re-check
+            ttl = ttl_ms / 1000 if ttl_ms > 0 else self.negative_ttl
+            self._remember(self._revoked, jti, now + ttl)
+            return True
+
+    def _version_due(self, now: float) -> bool:
+        if now < self._next_version_check:
+            return False
+        self._next_version_check = now + self.version_poll
+        return True
+
+    def _apply_version(self, version):
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._not_revoked.clear()
+
+    def _remember(self, cache: OrderedDict, jti: str, expiry: float):
+        cache[jti] = expiry
+        cache.move_to_end(jti)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
@@ -0,0 +1,64 @@
+from .cache_utils import TTLCache
+from .redis_utils import RedisUnavailableError
+
+
+class ResponseCache:
+    """Serialized response bodies shared by all requests.
+
+    RESPONSE_CACHE_BACKEND picks the store: 'memory' (per-process LRU),
+    'redis' (shared by all workers, through the app's RedisClient) or 'none'.
+    Keys contain the version stamp of what was serialized, so entries never
+    have to be invalidated; old versions just age out. The ASGI routes use
+    the *_async methods and share the same entries.
+    """
+
+    def __init__(self, redis_client, async_redis_client=None):
+        self.redis = redis_client
+        self.async_redis = async_redis_client
+        self.backend = 'none'
+        self.ttl = 300
+        self.memory = TTLCache(maxsize=0)
+
+    def init_app(self, app):
+        self.backend = app.config['RESPONSE_CACHE_BACKEND']
+        if self.backend not in ('memory', 'redis', 'none'):
+            raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {self.backend}')
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        self.memory = TTLCache(app.config['RESPONSE_CACHE_SIZE'] if self.backend == 'memory' else 0, self.ttl)
+        app.extensions['response_cache'] = self
+
+    def get(self, key: str) -> bytes | None:
+        if self.backend == 'memory':
+            return self.memory.get(key)
+        if self.backend == 'redis':
+            try:
+                return self.redis.call('get', key)
+            except RedisUnavailableError:
+                return None
+        return None
+
+    def set(self, key: str, body: bytes):
+        if self.backend == 'memory':
+            self.memory.set(key, body)
+        elif self.backend == 'redis':
+            try:
+                self.redis.call('set', key, body, ex=self.ttl)
+            except RedisUnavailableError:
+                pass
+
+    async def get_async(self, key: str) -> bytes | None:
+        if self.backend == 'redis':
+            try:
+                return await self.async_redis.call('get', key)
+            except RedisUnavailableError:
+                return None
+        return self.get(key)
+
+    async def set_async(self, key: str, body: bytes):
+        if self.backend == 'redis':
+            try:
+                await self.async_redis.call('set', key, body, ex=self.ttl)
+            except RedisUnavailableError:
+                pass
+        else:
+            self.set(key, body)
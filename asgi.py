@@ -0,0 +1,5 @@
+from app.asgi import create_asgi_app
+
+
+# uvicorn asgi:app --workers 4
+app = create_asgi_app()
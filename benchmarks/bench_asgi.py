@@ -0,0 +1,183 @@
+"""Concurrent connections: the Flask app under a threaded WSGI server against
+the ASGI mode (app/asgi.py) under uvicorn, on the same seeded database.
+
+Both servers are started as subprocesses with the same number of worker
+processes. A single asyncio client then keeps N keep-alive connections busy
+with the async read routes (course outline, step payload and auth check, as
+one logged-in user) for a fixed time, for every N in --connections, and
+prints throughput, latency percentiles and errors (failed connections,
+timeouts and error statuses) per server and level.
+
+    python -m benchmarks.bench_asgi [--connections 10,50,200,500] [--duration 5] [--workers 1]
+
+BENCH_SYNC_CMD / BENCH_ASGI_CMD replace the server commands; {python}, {port}, {workers}
+and {threads} are filled in. BENCH_DATABASE_URL picks the database (see common.py).
+The client shares the machine with the servers, so compare the two rows of a
+level rather than reading the numbers as absolute capacity.
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import time
+from app.services import SeedShape, seed_database, password_hasher
+from app.extensions import db
+from .common import BenchConfig, make_app, login_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVERS = {
+    'sync': os.getenv('BENCH_SYNC_CMD',
+                      '{python} -m gunicorn --workers {workers} --worker-class gthread --threads {threads} '
+                      '--bind 127.0.0.1:{port} --log-level warning run:app'),
+    'asgi': os.getenv('BENCH_ASGI_CMD',
+                      '{python} -m uvicorn asgi:app --workers {workers} --host 127.0.0.1 --port {port} '
+                      '--log-level warning --no-access-log'),
+}
+REQUEST_TIMEOUT = 10  # seconds before a request counts as an error
+SHAPE = SeedShape(users=10, authors=2, courses=20, sections=3, lessons=3, steps=5, enrollments=0, review_rate=0)
+
+
+def prepare():
+    """Seed the benchmark database and log in; returns the access token cookie."""
+    app = make_app()
+    with app.app_context():
+        seed_database(SHAPE, password_hasher.hash('qwerty123'), echo=lambda message: None)
+        db.session.remove()
+    client = login_client(app, 'seed1@example.com', register=False)
+    return client.get_cookie(BenchConfig.JWT_ACCESS_COOKIE_NAME).value
+
+
+def request_paths():
+    paths = []
+    for course in range(1, SHAPE.courses + 1):
+        paths.append(f'/api/course/{course}')
+        for section in range(1, SHAPE.sections + 1):
+            paths.append(f'/api/course/{course}/{section}/1?step_place={section}')
+        paths.append('/api/auth/is-authorized')
+    return paths
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(name: str, workers: int, threads: int):
+    port = free_port()
+    command = SERVERS[name].format(python=sys.executable, port=port, workers=workers, threads=threads)
+    env = {**os.environ, 'DATABASE_URL': BenchConfig.SQLALCHEMY_DATABASE_URI, 'REDIS_URL': BenchConfig.REDIS_URL,
+           'JWT_SECRET_KEY': BenchConfig.JWT_SECRET_KEY, 'ASGI_THREADS': str(threads)}
+    process = subprocess.Popen(shlex.split(command), cwd=ROOT, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{name} server exited: {command}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/course/1')
+            if conn.getresponse().status == 200:
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{name} server didn\'t start: {command}')
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+
+async def read_response(reader) -> int:
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def keep_busy(port: int, requests: list[bytes], offset: int, deadline: float, stats: Stats):
+    """One keep-alive connection sending requests back to back until `deadline`."""
+    reader = writer = None
+    i = offset
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), REQUEST_TIMEOUT)
+            writer.write(requests[i % len(requests)])
+            status = await asyncio.wait_for(read_response(reader), REQUEST_TIMEOUT)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            stats.errors += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        i += 1
+        if status >= 400:
+            stats.errors += 1
+        else:
+            stats.latencies.append(time.perf_counter() - started)
+    if writer is not None:
+        writer.close()
+
+
+async def load(port: int, connections: int, duration: float, token: str):
+    requests = [
+        (f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n'
+         f'Cookie: {BenchConfig.JWT_ACCESS_COOKIE_NAME}={token}\r\n\r\n').encode()
+        for path in request_paths()
+    ]
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(keep_busy(port, requests, n, deadline, stats) for n in range(connections)))
+    return stats
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent-connection capacity, threaded WSGI vs ASGI.')
+    parser.add_argument('--connections', default='10,50,200,500', help='comma separated levels')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per level')
+    parser.add_argument('--workers', type=int, default=1, help='server processes')
+    parser.add_argument('--threads', type=int, default=32, help='threads per sync worker and ASGI_THREADS')
+    parser.add_argument('--servers', default='sync,asgi')
+    args = parser.parse_args()
+    levels = [int(n) for n in args.connections.split(',')]
+
+    token = prepare()
+    print(f'{"server":6} {"conns":>6} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for name in args.servers.split(','):
+        process, port = start_server(name, args.workers, args.threads)
+        try:
+            asyncio.run(load(port, 10, 1.0, token))   # warm up connections and caches
+            for connections in levels:
+                stats = asyncio.run(load(port, connections, args.duration, token))
+                print(f'{name:6} {connections:6} {len(stats.latencies) / args.duration:8.0f} '
+                      f'{percentile(stats.latencies, 0.5) * 1000:8.1f} '
+                      f'{percentile(stats.latencies, 0.99) * 1000:8.1f} {stats.errors:7}')
+                sys.stdout.flush()
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
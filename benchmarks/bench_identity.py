@@ -0,0 +1,38 @@
+"""Queries per authenticated request with and without the identity cache.
+
+    python -m benchmarks.bench_identity [requests]
+"""
+import sys
+from .common import make_app, login_client, StatementCounter, Timer
+
+
+ROUTES = ('/api/auth/is-authorized', '/api/user/my-profile', '/api/user/created-courses')
+
+
+def run(cache_size: int, requests: int):
+    app = make_app(IDENTITY_CACHE_SIZE=cache_size)
+    client = login_client(app, 'bench@gmail.com')
+
+    results = {}
+    for route in ROUTES:
+        client.get(route)
+        with StatementCounter(app) as counter, Timer() as timer:
+            for _ in range(requests):
+                assert client.get(route).status_code == 200
+        results[route] = (counter.count / requests, timer.elapsed / requests * 1000)
+    return results
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    before, after = run(0, requests), run(10_000, requests)
+
+    print(f'{"route":32} {"queries/req":>22} {"ms/req":>18}')
+    print(f'{"":32} {"no cache":>10} {"cache":>11} {"no cache":>8} {"cache":>9}')
+    for route in ROUTES:
+        (q0, t0), (q1, t1) = before[route], after[route]
+        print(f'{route:32} {q0:10.2f} {q1:11.2f} {t0:8.3f} {t1:9.3f}')
+
+
+if __name__ == '__main__':
+    main()
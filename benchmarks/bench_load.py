@@ -0,0 +1,413 @@
+"""Load test of the whole API: a seeded catalog, several logged-in users and a
+weighted mix of requests sent from concurrent threads, each with its own
+test client of one create_app() instance.
+
+    python -m benchmarks.bench_load [--mix mixed] [--concurrency 4] [--requests 500]
+                                    [--output results.json] [--compare baseline.json]
+
+Mixes: read (catalog, outlines, steps), mixed (reads plus auth, progress and
+some authoring) and authoring (mostly writes by course authors). Throughput
+and p50/p95/p99 latency are printed per route and saved as JSON. With
+--compare, routes whose p95 grew, or a total throughput that dropped, by more
+than --tolerance are reported and the exit status is 1, so it can gate CI.
+
+BENCH_DATABASE_URL / BENCH_REDIS_URL pick the database and Redis (see common.py).
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import Course, Section, Lesson, Step, Progress, Review
+from app.schemas import StepIn
+from app.schemas.step_schemas import VIDEO_EXAMPLE, SINGLE_QUESTION_EXAMPLE, MULTIPLE_QUESTION_EXAMPLE
+from app.services import reconcile_ratings
+from app.services.ordering_service import ORDER_GAP
+from .common import make_app, login_client
+
+
+WORDS = ('python', 'data', 'web', 'design', 'music', 'math', 'history', 'biology', 'finance', 'english')
+STEP_MODELS = (VIDEO_EXAMPLE, SINGLE_QUESTION_EXAMPLE, MULTIPLE_QUESTION_EXAMPLE)
+PASSWORD = 'qwerty123'
+
+
+@dataclass
+class Catalog:
+    """Shape of the seeded data; ids are sequential so they can be computed."""
+    authors: int
+    courses_per_author: int
+    sections: int
+    lessons: int
+    steps: int
+
+    @property
+    def courses(self):
+        return self.authors * self.courses_per_author
+
+    def courses_of(self, user_id: int):
+        first = (user_id - 1) * self.courses_per_author + 1
+        return range(first, first + self.courses_per_author)
+
+    def enrolled_in(self, user_id: int):
+        return self.courses_of(user_id % self.authors + 1)
+
+    def section_id(self, course_id: int, section_place: int):
+        return (course_id - 1) * self.sections + section_place
+
+    def lesson_id(self, course_id: int, section_place: int, lesson_place: int):
+        return (self.section_id(course_id, section_place) - 1) * self.lessons + lesson_place
+
+    def step_ids(self, course_id: int):
+        first = (self.lesson_id(course_id, 1, 1) - 1) * self.steps + 1
+        return range(first, first + self.sections * self.lessons * self.steps)
+
+
+def seed(app, catalog: Catalog):
+    """Register one user per author through the API, then bulk insert their
+    courses, outlines, step payloads, enrollments and reviews with Core."""
+    clients = [login_client(app, f'author{i}@load.io', PASSWORD) for i in range(1, catalog.authors + 1)]
+
+    course_rows, section_rows, lesson_rows, step_rows = [], [], [], []
+    steps_per_course = catalog.sections * catalog.lessons * catalog.steps
+    for course_id in range(1, catalog.courses + 1):
+        word = WORDS[course_id % len(WORDS)]
+        course_rows.append({
+            'id': course_id, 'author_id': (course_id - 1) // catalog.courses_per_author + 1,
+            'title': f'{word.capitalize()} course {course_id}',
+            'description': f'Learn {word} step by step, from the basics to real projects',
+            'step_ordinal_seq': steps_per_course, 'next_section_place': catalog.sections + 1,
+            'sections_count': catalog.sections,
+            'lessons_count': catalog.sections * catalog.lessons, 'steps_count': steps_per_course,
+            'enrollments_count': 1,   # by the one user enrolled_in() maps to this author
+        })
+        ordinal = 0
+        for s in range(1, catalog.sections + 1):
+            section_id = catalog.section_id(course_id, s)
+            section_rows.append({'id': section_id, 'course_id': course_id, 'title': f'Section number {s}',
+                                 'place': s, 'sort_key': s * ORDER_GAP, 'next_lesson_place': catalog.lessons + 1})
+            for l in range(1, catalog.lessons + 1):
+                lesson_id = catalog.lesson_id(course_id, s, l)
+                lesson_rows.append({'id': lesson_id, 'section_id': section_id, 'title': f'Lesson number {s}.{l}',
+                                    'place': l, 'sort_key': l * ORDER_GAP, 'next_step_place': catalog.steps + 1})
+                for t in range(1, catalog.steps + 1):
+                    ordinal += 1
+                    step_id = (lesson_id - 1) * catalog.steps + t
+                    model = STEP_MODELS[step_id % len(STEP_MODELS)]
+                    step_in = StepIn.model_validate({'title': f'Step {t}', 'model': model})
+                    step_in.step_id = step_id
+                    step_rows.append({'id': step_id, 'lesson_id': lesson_id, 'place': t, 'sort_key': t * ORDER_GAP,
+                                      'ordinal': ordinal, 'content_type': model['content_type'],
+                                      'payload': step_in.model_dump(mode='json')})
+
+    progress_rows, review_rows = [], []
+    for user_id in range(1, catalog.authors + 1):
+        for course_id in catalog.enrolled_in(user_id):
+            progress_rows.append({'user_id': user_id, 'course_id': course_id})
+            if catalog.authors > 1:
+                review_rows.append({'user_id': user_id, 'course_id': course_id,
+                                    'text': 'Clear explanations and good exercises',
+                                    'score': (user_id + course_id) % 5 + 1})
+
+    for model, rows in ((Course, course_rows), (Section, section_rows), (Lesson, lesson_rows),
+                        (Step, step_rows), (Progress, progress_rows), (Review, review_rows)):
+        if rows:
+            db.session.execute(insert(model), rows)
+    db.session.commit()
+    reconcile_ratings(echo=lambda message: None)
+    return clients
+
+
+class Worker:
+    def __init__(self, client, user_id: int, catalog: Catalog, seed_value: int):
+        self.client = client
+        self.user_id = user_id
+        self.catalog = catalog
+        self.rng = random.Random(seed_value)
+        self.own = catalog.courses_of(user_id)
+        self.enrolled = catalog.enrolled_in(user_id)
+
+    def course(self):
+        return self.rng.randint(1, self.catalog.courses)
+
+    def places(self):
+        return self.rng.randint(1, self.catalog.sections), self.rng.randint(1, self.catalog.lessons)
+
+    def get(self, url, **kwargs):
+        return self.client.get(url, headers=self.client.headers, **kwargs)
+
+    def send(self, method, url, **kwargs):
+        return self.client.open(url, method=method, headers=self.client.headers, **kwargs)
+
+
+def catalog_page(w):
+    return w.get('/api/course/', query_string={'sort': w.rng.choice(('created_at', 'rating', 'title'))})
+
+def search(w):
+    return w.get('/api/course/search', query_string={'q': w.rng.choice(WORDS)[:w.rng.randint(3, 6)]})
+
+def course_outline(w):
+    return w.get(f'/api/course/{w.course()}')
+
+def section_outline(w):
+    return w.get(f'/api/section/{w.catalog.section_id(w.course(), w.places()[0])}')
+
+def lesson_outline(w):
+    return w.get(f'/api/lesson/{w.catalog.lesson_id(w.course(), *w.places())}')
+
+def read_step(w):
+    s, l = w.places()
+    return w.get(f'/api/course/{w.rng.choice(w.enrolled)}/{s}/{l}',
+                 query_string={'step_place': w.rng.randint(1, w.catalog.steps)})
+
+def reviews(w):
+    return w.get('/api/review/', query_string={'course_id': w.course()})
+
+def profile(w):
+    return w.get(f'/api/user/{w.rng.randint(1, w.catalog.authors)}')
+
+def progress(w):
+    return w.get(f'/api/progress/{w.rng.choice(w.enrolled)}')
+
+def mark_done(w):
+    course_id = w.rng.choice(w.enrolled)
+    step_ids = w.rng.sample(w.catalog.step_ids(course_id), min(5, w.catalog.steps))
+    return w.send('POST', f'/api/progress/{course_id}/steps', json={'step_ids': step_ids})
+
+def is_authorized(w):
+    return w.get('/api/auth/is-authorized')
+
+def my_profile(w):
+    return w.get('/api/user/my-profile')
+
+def login(w):
+    response = w.client.post('/api/auth/login', json={'email': f'author{w.user_id}@load.io', 'password': PASSWORD})
+    w.client.headers = {'X-CSRF-TOKEN': w.client.get_cookie('csrf_access_token').value}
+    return response
+
+def add_step(w):
+    s, l = w.places()
+    return w.send('POST', f'/api/course/{w.rng.choice(w.own)}/{s}/{l}',
+                  json={'title': 'New step', 'model': VIDEO_EXAMPLE})
+
+def add_steps_batch(w):
+    s, l = w.places()
+    return w.send('POST', f'/api/course/{w.rng.choice(w.own)}/{s}/{l}/batch',
+                  json=[{'title': f'Batch step {i}', 'model': VIDEO_EXAMPLE} for i in range(10)])
+
+def move_step(w):
+    s, l = w.places()
+    return w.send('PATCH', f'/api/course/{w.rng.choice(w.own)}/{s}/{l}/move',
+                  query_string={'step_place': w.rng.randint(1, w.catalog.steps)}, json={'before_place': None})
+
+def add_lesson(w):
+    return w.send('POST', '/api/lesson/', query_string={'course_id': w.rng.choice(w.own), 'section_place': 1},
+                  json={'title': f'Extra lesson {w.rng.getrandbits(48):x}'})   # titles are unique per section
+
+def move_section(w):
+    course_id = w.rng.choice(w.own)
+    return w.send('PATCH', f'/api/section/{w.catalog.section_id(course_id, w.catalog.sections)}/move',
+                  json={'before_place': None})
+
+
+ROUTES = {
+    'GET /api/course/': catalog_page,
+    'GET /api/course/search': search,
+    'GET /api/course/<id>': course_outline,
+    'GET /api/section/<id>': section_outline,
+    'GET /api/lesson/<id>': lesson_outline,
+    'GET /api/course/<c>/<s>/<l>': read_step,
+    'GET /api/review/': reviews,
+    'GET /api/user/<id>': profile,
+    'GET /api/progress/<id>': progress,
+    'POST /api/progress/<id>/steps': mark_done,
+    'GET /api/auth/is-authorized': is_authorized,
+    'GET /api/user/my-profile': my_profile,
+    'POST /api/auth/login': login,
+    'POST /api/course/<c>/<s>/<l>': add_step,
+    'POST /api/course/<c>/<s>/<l>/batch': add_steps_batch,
+    'PATCH /api/course/<c>/<s>/<l>/move': move_step,
+    'POST /api/lesson/': add_lesson,
+    'PATCH /api/section/<id>/move': move_section,
+}
+
+# route -> relative weight
+MIXES = {
+    'read': {
+        'GET /api/course/': 20, 'GET /api/course/search': 10, 'GET /api/course/<id>': 20,
+        'GET /api/section/<id>': 10, 'GET /api/lesson/<id>': 10, 'GET /api/course/<c>/<s>/<l>': 25,
+        'GET /api/review/': 3, 'GET /api/user/<id>': 2,
+    },
+    'mixed': {
+        'GET /api/course/': 12, 'GET /api/course/search': 6, 'GET /api/course/<id>': 12,
+        'GET /api/section/<id>': 5, 'GET /api/lesson/<id>': 8, 'GET /api/course/<c>/<s>/<l>': 20,
+        'GET /api/review/': 3, 'GET /api/user/<id>': 2, 'GET /api/progress/<id>': 6,
+        'POST /api/progress/<id>/steps': 8, 'GET /api/auth/is-authorized': 5, 'GET /api/user/my-profile': 3,
+        'POST /api/auth/login': 1, 'POST /api/course/<c>/<s>/<l>': 3, 'PATCH /api/course/<c>/<s>/<l>/move': 2,
+        'POST /api/lesson/': 1,
+    },
+    'authoring': {
+        'POST /api/course/<c>/<s>/<l>': 30, 'POST /api/course/<c>/<s>/<l>/batch': 10,
+        'PATCH /api/course/<c>/<s>/<l>/move': 15, 'POST /api/lesson/': 8, 'PATCH /api/section/<id>/move': 5,
+        'GET /api/course/<id>': 12, 'GET /api/lesson/<id>': 12, 'GET /api/course/<c>/<s>/<l>': 8,
+    },
+}
+
+
+def percentile(ordered, p: float):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def run(args):
+    catalog = Catalog(args.concurrency, args.courses, args.sections, args.lessons, args.steps)
+    app = make_app()
+    with app.app_context():
+        clients = seed(app, catalog)
+
+    mix = MIXES[args.mix]
+    routes, weights = list(mix), list(mix.values())
+    workers = [Worker(client, user_id, catalog, args.seed * 1000 + user_id)
+               for user_id, client in enumerate(clients, start=1)]
+    plans = [w.rng.choices(routes, weights, k=args.warmup + args.requests) for w in workers]
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(workers) + 1)
+
+    def drive(worker, plan):
+        for route in plan[:args.warmup]:
+            ROUTES[route](worker)
+        barrier.wait()
+        timings = []
+        for route in plan[args.warmup:]:
+            started = time.perf_counter()
+            response = ROUTES[route](worker)
+            timings.append((route, time.perf_counter() - started, response.status_code))
+        with lock:
+            for route, seconds, status in timings:
+                latencies[route].append(seconds)
+                statuses[route][status] += 1
+
+    threads = [threading.Thread(target=drive, args=(w, plan)) for w, plan in zip(workers, plans)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result_routes = {}
+    for route in sorted(latencies):
+        ordered = sorted(latencies[route])
+        result_routes[route] = {
+            'requests': len(ordered),
+            'errors': sum(n for status, n in statuses[route].items() if status >= 500),
+            'statuses': {str(status): n for status, n in sorted(statuses[route].items())},
+            'rps': len(ordered) / elapsed,
+            'mean_ms': sum(ordered) / len(ordered) * 1000,
+            'p50_ms': percentile(ordered, 50) * 1000,
+            'p95_ms': percentile(ordered, 95) * 1000,
+            'p99_ms': percentile(ordered, 99) * 1000,
+        }
+
+    total = sum(r['requests'] for r in result_routes.values())
+    return {
+        'meta': {
+            'mix': args.mix, 'concurrency': args.concurrency, 'requests_per_worker': args.requests,
+            'warmup': args.warmup, 'seed': args.seed,
+            'catalog': {'courses': catalog.courses, 'sections': catalog.sections,
+                        'lessons': catalog.lessons, 'steps': catalog.steps},
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            'redis': app.config['REDIS_URL'].split(':', 1)[0],
+            'python': platform.python_version(),
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'total': {
+            'requests': total,
+            'errors': sum(r['errors'] for r in result_routes.values()),
+            'seconds': elapsed,
+            'rps': total / elapsed,
+        },
+        'routes': result_routes,
+    }
+
+
+def report(result):
+    meta, total = result['meta'], result['total']
+    print(f'mix {meta["mix"]}, {meta["concurrency"]} workers, {meta["catalog"]["courses"]} courses, '
+          f'{meta["database"]}/{meta["redis"]}')
+    print(f'{"route":38} {"reqs":>6} {"5xx":>4} {"rps":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    for route, r in result['routes'].items():
+        print(f'{route:38} {r["requests"]:6} {r["errors"]:4} {r["rps"]:8.1f} '
+              f'{r["p50_ms"]:8.2f} {r["p95_ms"]:8.2f} {r["p99_ms"]:8.2f}')
+    print(f'{"total":38} {total["requests"]:6} {total["errors"]:4} {total["rps"]:8.1f}')
+
+
+def compare(result, baseline, tolerance: float):
+    """Print the change of every route against a baseline run; returns the regressions."""
+    if baseline['meta']['mix'] != result['meta']['mix']:
+        print(f'warning: baseline mix is {baseline["meta"]["mix"]}, this run is {result["meta"]["mix"]}')
+
+    regressions = []
+    print(f'\n{"route":38} {"base p95":>9} {"p95":>9} {"change":>8}')
+    for route, r in result['routes'].items():
+        base = baseline['routes'].get(route)
+        if not base:
+            continue
+        change = r['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+        flag = ''
+        if change > tolerance:
+            regressions.append(route)
+            flag = '  REGRESSION'
+        print(f'{route:38} {base["p95_ms"]:9.2f} {r["p95_ms"]:9.2f} {change:+8.1%}{flag}')
+
+    change = result['total']['rps'] / baseline['total']['rps'] - 1
+    print(f'{"throughput":38} {baseline["total"]["rps"]:9.1f} {result["total"]["rps"]:9.1f} {change:+8.1%}')
+    if change < -tolerance:
+        regressions.append('throughput')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the API with a weighted request mix.')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    parser.add_argument('--concurrency', type=int, default=4, help='worker threads, one user each')
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per worker')
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured requests per worker')
+    parser.add_argument('--courses', type=int, default=25, help='courses per author')
+    parser.add_argument('--sections', type=int, default=3)
+    parser.add_argument('--lessons', type=int, default=3)
+    parser.add_argument('--steps', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='JSON results of a baseline run')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative p95/throughput change')
+    args = parser.parse_args()
+
+    result = run(args)
+    report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f'FAIL: {len(regressions)} regressed over {args.tolerance:.0%}: {", ".join(regressions)}')
+            sys.exit(1)
+        print(f'OK: no regression over {args.tolerance:.0%}')
+
+
+if __name__ == '__main__':
+    main()
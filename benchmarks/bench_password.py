@@ -0,0 +1,50 @@
+"""Login throughput with inline hashing vs the hashing process pool.
+
+    python -m benchmarks.bench_password [logins] [concurrency]
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models import User
+from .common import make_app, Timer
+
+
+def run(workers: int, logins: int, concurrency: int, method: str):
+    app = make_app(PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_MAX_QUEUE=concurrency,
+                   PASSWORD_HASH_METHOD=method)
+    with app.app_context():
+        pwhash = generate_password_hash('qwerty123', method)
+        db.session.add_all(User(email=f'user{i}@gmail.com', password=pwhash) for i in range(concurrency))
+        db.session.commit()
+
+    def login(i):
+        client = app.test_client()
+        response = client.post('/api/auth/login', json={'email': f'user{i % concurrency}@gmail.com',
+                                                        'password': 'qwerty123'})
+        return response.status_code
+
+    login(0)  # start the pool outside the measurement
+    with ThreadPoolExecutor(concurrency) as pool, Timer() as timer:
+        codes = list(pool.map(login, range(logins)))
+
+    assert all(code == 200 for code in codes), set(codes)
+    return logins / timer.elapsed
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    method = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    cores = os.cpu_count() or 1
+
+    print(f'{method}, {logins} logins, {concurrency} concurrent clients, {cores} cores')
+    for workers in (0, cores):
+        rate = run(workers, logins, concurrency, method)
+        used = max(workers, 1)
+        print(f'workers={workers:<3} {rate:8.1f} logins/s {rate / used:8.1f} logins/s per core')
+
+
+if __name__ == '__main__':
+    main()
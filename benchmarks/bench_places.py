@@ -0,0 +1,143 @@
+"""Concurrent writers appending to the same parents: every thread adds
+sections to one course, lessons to one section and steps (one at a time and
+in batches) to one lesson, as the same author, at the same time. Afterwards
+the places of each parent must be exactly 1..n, without duplicates or gaps,
+one per created row, and the parent's counter must point right after them.
+
+    python -m benchmarks.bench_places [--concurrency 8] [--requests 400]
+
+Prints throughput and errors per route and the checks; the exit status is 1
+if any request failed or any check doesn't hold. SQLite serializes writers
+with its database lock (see SQLITE_PRAGMAS), so BENCH_DATABASE_URL pointing
+at PostgreSQL is the more telling run, where the parents' row locks do it.
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from sqlalchemy import select
+from app.extensions import db
+from app.models import Course, Section, Lesson, Step
+from app.schemas.step_schemas import VIDEO_EXAMPLE
+from .bench_load import Catalog, PASSWORD, seed
+from .common import make_app, login_client
+
+CATALOG = Catalog(authors=1, courses_per_author=1, sections=1, lessons=1, steps=1)
+BATCH = 5
+
+
+def add_section(client, n):
+    return client.post('/api/section/', query_string={'course_id': 1}, headers=client.headers,
+                       json={'title': f'Stress section {n}'})
+
+def add_lesson(client, n):
+    return client.post('/api/lesson/', query_string={'course_id': 1, 'section_place': 1}, headers=client.headers,
+                       json={'title': f'Stress lesson {n}'})
+
+def add_step(client, n):
+    return client.post('/api/course/1/1/1', headers=client.headers, json={'title': f'Step {n}', 'model': VIDEO_EXAMPLE})
+
+def add_steps_batch(client, n):
+    return client.post('/api/course/1/1/1/batch', headers=client.headers,
+                       json=[{'title': f'Step {n}.{i}', 'model': VIDEO_EXAMPLE} for i in range(BATCH)])
+
+
+# route -> (scenario, model of the rows it creates, how many)
+ROUTES = {
+    'POST /api/section/': (add_section, Section, 1),
+    'POST /api/lesson/': (add_lesson, Lesson, 1),
+    'POST /api/course/<c>/<s>/<l>': (add_step, Step, 1),
+    'POST /api/course/<c>/<s>/<l>/batch': (add_steps_batch, Step, BATCH),
+}
+# child model, parent id, counter column
+PARENTS = (
+    (Section, Section.course_id, 1, Course.next_section_place),
+    (Lesson, Lesson.section_id, 1, Section.next_lesson_place),
+    (Step, Step.lesson_id, 1, Lesson.next_step_place),
+)
+
+
+def writer(client, jobs, lock, results):
+    while True:
+        with lock:
+            if not jobs:
+                return
+            n, route = jobs.pop()
+        scenario, _, _ = ROUTES[route]
+        response = scenario(client, n)
+        with lock:
+            results[route].append((response.status_code, response.get_json(silent=True)))
+
+
+def check_places(app, created: Counter) -> list[str]:
+    problems = []
+    with app.app_context():
+        for model, parent_col, parent_id, counter in PARENTS:
+            places = db.session.execute(select(model.place).where(parent_col == parent_id)).scalars().all()
+            next_place = db.session.execute(
+                select(counter).where(counter.class_.id == parent_id)
+            ).scalar_one()
+            duplicates = sorted(place for place, count in Counter(places).items() if count > 1)
+            name = model.__tablename__
+            print(f'{name:9} {len(places):6} rows, places 1..{max(places)}, next place {next_place}, '
+                  f'{len(duplicates)} duplicates')
+            if duplicates:
+                problems.append(f'{name}: duplicate places {duplicates[:10]}')
+            if sorted(places) != list(range(1, len(places) + 1)):
+                problems.append(f'{name}: places aren\'t 1..{len(places)}')
+            if len(places) != created[model] + 1:   # and the seeded one
+                problems.append(f'{name}: {len(places)} rows, {created[model]} were created')
+            if next_place != len(places) + 1:
+                problems.append(f'{name}: counter is {next_place}, expected {len(places) + 1}')
+        db.session.remove()
+    return problems
+
+
+def stress(app, concurrency: int, requests: int) -> list[str]:
+    """Seed the app's (empty) database, send the requests from concurrent
+    writers and return the failed requests and checks."""
+    with app.app_context():
+        seed(app, CATALOG)
+    clients = [login_client(app, 'author1@load.io', PASSWORD, register=False) for _ in range(concurrency)]
+
+    routes = list(ROUTES)
+    jobs = [(n, routes[n % len(routes)]) for n in range(requests)]
+    lock, results = threading.Lock(), defaultdict(list)
+    threads = [threading.Thread(target=writer, args=(client, jobs, lock, results)) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    problems, created = [], Counter()
+    print(f'{"route":36} {"requests":>8} {"errors":>7}')
+    for route, responses in results.items():
+        errors = [(status, body) for status, body in responses if status >= 400]
+        _, model, rows = ROUTES[route]
+        created[model] += rows * (len(responses) - len(errors))
+        print(f'{route:36} {len(responses):8} {len(errors):7}')
+        if errors:
+            problems.append(f'{route}: {len(errors)} failed, e.g. {errors[0]}')
+    print(f'{requests / elapsed:.0f} req/s with {concurrency} writers\n')
+
+    return problems + check_places(app, created)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent inserts must never share a place.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help='requests over all routes')
+    args = parser.parse_args()
+
+    problems = stress(make_app(), args.concurrency, args.requests)
+    for problem in problems:
+        print(f'FAIL {problem}')
+    print('OK: no place was handed out twice' if not problems else f'{len(problems)} problems')
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Per-step progress: bitset per enrollment vs one row per (user, step).
+
+Both designs record the same random completions; the benchmark reports
+the space taken by each table with its indexes, the time to mark steps
+done in batches and the time to compute one learner's percentage.
+
+    python -m benchmarks.bench_progress [users] [steps] [batch]
+"""
+import random
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import (Table, Column, Integer, DateTime, MetaData, PrimaryKeyConstraint,
+                        select, insert, func, text)
+from app.extensions import db
+from app.models import User, Course, Section, Lesson, Step, Progress
+from app.services import mark_steps_done, get_progress
+from .common import make_app, Timer
+
+
+metadata = MetaData()
+step_completions = Table(
+    'bench_step_completions', metadata,
+    Column('user_id', Integer, nullable=False),
+    Column('step_id', Integer, nullable=False),
+    Column('completed_at', DateTime, nullable=False),
+    PrimaryKeyConstraint('user_id', 'step_id'),
+)
+
+
+def populate(users: int, steps: int):
+    db.session.execute(insert(User), [{'email': f'learner{i}@bench.io', 'password': '-'} for i in range(users + 1)])
+    db.session.execute(insert(Course), [{'title': 'Bench course', 'description': 'Benchmark course',
+                                         'author_id': 1, 'step_ordinal_seq': steps}])
+    db.session.execute(insert(Section), [{'course_id': 1, 'title': 'Section', 'place': 1}])
+    db.session.execute(insert(Lesson), [{'section_id': 1, 'title': 'Lesson', 'place': 1}])
+    db.session.execute(insert(Step), [{'lesson_id': 1, 'place': i, 'sort_key': i, 'ordinal': i,
+                                       'content_type': 'text'} for i in range(1, steps + 1)])
+    db.session.execute(insert(Progress), [{'user_id': user_id, 'course_id': 1}
+                                          for user_id in range(2, users + 2)])
+    db.session.commit()
+
+
+def mark_rows(user_id: int, step_ids):
+    done = set(db.session.execute(
+        select(step_completions.c.step_id)
+        .where(step_completions.c.user_id == user_id, step_completions.c.step_id.in_(step_ids))
+    ).scalars())
+    now = datetime.now(timezone.utc)
+    new = [{'user_id': user_id, 'step_id': step_id, 'completed_at': now}
+           for step_id in step_ids if step_id not in done]
+    if new:
+        db.session.execute(insert(step_completions), new)
+
+
+def percent_rows(user_id: int):
+    total = db.session.execute(
+        select(func.count(Step.id))
+        .join(Lesson, Lesson.id == Step.lesson_id)
+        .join(Section, Section.id == Lesson.section_id)
+        .where(Section.course_id == 1)
+    ).scalar_one()
+    completed = db.session.execute(
+        select(func.count()).select_from(step_completions)
+        .join(Step, Step.id == step_completions.c.step_id)
+        .join(Lesson, Lesson.id == Step.lesson_id)
+        .join(Section, Section.id == Lesson.section_id)
+        .where(step_completions.c.user_id == user_id, Section.course_id == 1)
+    ).scalar_one()
+    return round(completed * 100 / total, 1) if total else 0.0
+
+
+def table_bytes(table: str):
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return db.session.execute(text(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = :table)"
+        ), {'table': table}).scalar()
+    if dialect == 'postgresql':
+        return db.session.execute(text('SELECT pg_total_relation_size(:table)'), {'table': table}).scalar()
+    return None
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    app = make_app()
+    with app.app_context():
+        metadata.drop_all(db.engine)
+        metadata.create_all(db.engine)
+        populate(users, steps)
+
+        rng = random.Random(42)
+        plan = []
+        for user_id in range(2, users + 2):
+            done = rng.sample(range(1, steps + 1), rng.randint(0, steps))
+            plan += [(user_id, done[i:i + batch]) for i in range(0, len(done), batch)]
+        marked = sum(len(ids) for _, ids in plan)
+
+        with Timer() as bitmap_write:
+            for user_id, ids in plan:
+                mark_steps_done(user_id, 1, ids)   # step id == ordinal here
+                db.session.commit()
+        with Timer() as rows_write:
+            for user_id, ids in plan:
+                mark_rows(user_id, ids)
+                db.session.commit()
+
+        readers = range(2, users + 2)
+        with Timer() as bitmap_read:
+            bitmap_percents = [get_progress(user_id, 1)['percent'] for user_id in readers]
+        with Timer() as rows_read:
+            rows_percents = [percent_rows(user_id) for user_id in readers]
+        assert bitmap_percents == rows_percents
+
+        sizes = (table_bytes('progresses'), table_bytes(step_completions.name))
+        metadata.drop_all(db.engine)
+
+    print(f'{users} learners, {steps} steps, {marked} completions in batches of {batch}')
+    print(f'{"":14} {"bytes":>12} {"mark ms/batch":>14} {"percent ms":>11}')
+    for name, size, write, read in (('bitmap', sizes[0], bitmap_write, bitmap_read),
+                                    ('row per step', sizes[1], rows_write, rows_read)):
+        size = f'{size:,}' if size is not None else 'n/a'
+        print(f'{name:14} {size:>12} {write.elapsed / len(plan) * 1000:14.3f} '
+              f'{read.elapsed / users * 1000:11.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Cold start: importing the app plus create_app(), each run in a new interpreter.
+Exits with status 1 when the median exceeds the budget, so it can gate CI.
+
+    python -m benchmarks.bench_startup [runs]
+
+STARTUP_BUDGET_MS sets the budget (default 1500).
+"""
+import os
+import statistics
+import sys
+from app.utils import measure_startup
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 1500))
+
+
+def measure(runs: int):
+    """(results, median import ms, median create_app ms, median total ms) of `runs` cold starts."""
+    # the probe imports the real app; keep it off the network
+    env = {'REDIS_URL': 'fakeredis://'}
+    results = [measure_startup(PROJECT_DIR, env) for _ in range(runs)]
+    return (
+        results,
+        statistics.median(r.import_seconds for r in results) * 1000,
+        statistics.median(r.create_app_seconds for r in results) * 1000,
+        statistics.median(r.total_seconds for r in results) * 1000,
+    )
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results, imports, create, total = measure(runs)
+
+    print(f'{runs} runs, median: import {imports:.1f} ms, create_app {create:.1f} ms, total {total:.1f} ms')
+    print('slowest imports of the last run:')
+    for name, _, cumulative_s, _ in results[-1].slowest(10):
+        print(f'{cumulative_s * 1000:9.1f} ms  {name}')
+
+    if total > STARTUP_BUDGET_MS:
+        print(f'FAIL: {total:.1f} ms is over the {STARTUP_BUDGET_MS:.0f} ms budget')
+        sys.exit(1)
+    print(f'OK: within the {STARTUP_BUDGET_MS:.0f} ms budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Course export/import: throughput and Python memory high-water mark
+(tracemalloc peak) of streaming a seeded course out and back in through the API.
+Two course sizes are run so it shows whether memory grows with the course.
+
+    python -m benchmarks.bench_transfer [steps] [chunk]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+from app.extensions import db
+from app.services import SeedShape, seed_database, password_hasher
+from .common import make_app, login_client, Timer
+
+
+def seed_course(app, steps: int):
+    # one author with one course of 10 sections x 10 lessons
+    shape = SeedShape(users=2, authors=1, courses=1, sections=10, lessons=10,
+                      steps=max(1, steps // 100), enrollments=0, review_rate=0)
+    with app.app_context():
+        seed_database(shape, password_hasher.hash('qwerty123'), echo=lambda message: None)
+        db.session.remove()
+    return shape.courses * shape.steps_per_course
+
+
+def export(client, path):
+    response = client.get('/api/course/1/export', headers=client.headers, buffered=False)
+    assert response.status_code == 200, response.status_code
+    with open(path, 'wb') as f:
+        for chunk in response.response:
+            f.write(chunk)
+    response.close()
+
+
+def import_(client, path):
+    with open(path, 'rb') as f:
+        response = client.post('/api/course/import', input_stream=f, content_length=os.path.getsize(path),
+                               headers={**client.headers, 'Content-Type': 'application/x-ndjson'})
+    assert response.status_code == 201, response.get_json()
+
+
+def measure(fn, *args, trace: bool):
+    if trace:
+        tracemalloc.start()
+    with Timer() as timer:
+        fn(*args)
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return timer.elapsed, peak
+
+
+def run(steps: int, chunk: int):
+    app = make_app(COURSE_IMPORT_CHUNK=chunk)
+    steps = seed_course(app, steps)
+    author = login_client(app, 'seed1@example.com', register=False)
+    others = [login_client(app, f'importer{i}@bench.io') for i in range(2)]
+    path = os.path.join(tempfile.gettempdir(), 'learnua_bench_course.ndjson')
+
+    export_s, _ = measure(export, author, path, trace=False)
+    _, export_peak = measure(export, author, path, trace=True)
+    size = os.path.getsize(path)
+    import_s, _ = measure(import_, others[0], path, trace=False)
+    _, import_peak = measure(import_, others[1], path, trace=True)
+    os.remove(path)
+    return steps, size, (export_s, export_peak), (import_s, import_peak)
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    print(f'{"":8} {"steps":>7} {"archive":>10} {"seconds":>8} {"steps/s":>9} {"MB/s":>7} {"peak MiB":>9}')
+    for size in (steps // 10, steps):
+        steps_done, archive, *results = run(size, chunk)
+        for name, (seconds, peak) in zip(('export', 'import'), results):
+            print(f'{name:8} {steps_done:7} {archive / 2 ** 20:9.1f}M {seconds:8.2f} '
+                  f'{steps_done / seconds:9.0f} {archive / 2 ** 20 / seconds:7.1f} {peak / 2 ** 20:9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Query-plan check: drives every API route against a seeded database,
+records each SQL statement with its parameters and the endpoint that sent it,
+then EXPLAINs them and fails when a statement reads a whole table.
+
+    python -m benchmarks.check_query_plans [--plans]
+
+On SQLite a full scan is a "SCAN <table>" step without an index. On
+PostgreSQL the statements are explained with enable_seqscan off, so a
+"Seq Scan" is only left where no index can be used at all. Scans of tables
+not in the app's metadata (the FTS index) aren't counted. The exit status
+is 1 when any route does a full scan, so it can run in CI next to bench_load.
+
+The upload routes (upload-ava, get_avatar) are left out: they write files
+into the project's uploads directory. BENCH_DATABASE_URL picks the database.
+"""
+import argparse
+import re
+import sys
+from collections import defaultdict
+from flask import request, has_request_context
+from sqlalchemy import event
+from app.extensions import db
+from app.schemas.step_schemas import VIDEO_EXAMPLE
+from .bench_load import Catalog, Worker, ROUTES, PASSWORD, seed
+from .common import make_app, login_client
+
+CATALOG = Catalog(authors=4, courses_per_author=25, sections=4, lessons=4, steps=5)
+RUNS = 3   # times every scenario runs, with different random places
+SKIPPED_STATEMENTS = ('PRAGMA', 'SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT', 'CREATE', 'DROP')
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def register(w):
+    n = w.rng.getrandbits(32)
+    return w.client.post('/api/auth/register', json={'email': f'new{n:x}@plans.io', 'password': PASSWORD,
+                                                     'password_again': PASSWORD})
+
+def refresh(w):
+    return w.client.post('/api/auth/refresh',
+                         headers={'X-CSRF-TOKEN': w.client.get_cookie('csrf_refresh_token').value})
+
+def create_course(w):
+    return w.send('POST', '/api/course/', json={'title': f'Plans course {w.rng.getrandbits(32):x}',
+                                                'description': 'A course created by the query plan check'})
+
+def create_section(w):
+    return w.send('POST', '/api/section/', query_string={'course_id': w.rng.choice(w.own)},
+                  json={'title': f'Extra section {w.rng.getrandbits(32):x}'})
+
+def move_lesson(w):
+    course_id = w.rng.choice(w.own)
+    return w.send('PATCH', f'/api/lesson/{w.catalog.lesson_id(course_id, 1, w.catalog.lessons)}/move',
+                  json={'before_place': 1})
+
+def delete_step(w):
+    course_id, (s, l) = w.rng.choice(w.own), w.places()
+    w.send('POST', f'/api/course/{course_id}/{s}/{l}', json={'title': 'Doomed step', 'model': VIDEO_EXAMPLE})
+    return w.send('DELETE', f'/api/course/{course_id}/{s}/{l}', query_string={'step_place': 1})
+
+def submit_answers(w):
+    s, l = w.places()
+    return w.send('POST', f'/api/course/{w.rng.choice(w.enrolled)}/{s}/{l}/answers',
+                  json={'answers': [{'step_place': 2, 'answer': '2'}]})
+
+def enroll_and_leave(w):
+    course_id = w.rng.choice([c for c in range(1, w.catalog.courses + 1)
+                              if c not in w.own and c not in w.enrolled])
+    w.send('POST', f'/api/course/{course_id}/enroll')
+    return w.send('DELETE', f'/api/course/{course_id}/enroll')
+
+def export_course(w):
+    response = w.get(f'/api/course/{w.rng.choice(w.own)}/export')
+    response.get_data()
+    return response
+
+def import_course(w):
+    archive = w.get(f'/api/course/{w.rng.choice(w.own)}/export').get_data()
+    archive = archive.replace(b'"title":"', f'"title":"Imported {w.rng.getrandbits(32):x} '.encode(), 1)
+    return w.send('POST', '/api/course/import', data=archive, content_type='application/x-ndjson')
+
+def review_lifecycle(w):
+    course_id = w.rng.choice([c for c in range(1, w.catalog.courses + 1)
+                              if c not in w.own and c not in w.enrolled])
+    w.send('POST', f'/api/course/{course_id}/enroll')
+    review_id = w.send('POST', '/api/review/', query_string={'course_id': course_id},
+                       json={'text': 'Checked by the query plan check', 'score': 4}).get_json().get('review_id')
+    w.send('PUT', f'/api/review/{review_id}', json={'text': 'Checked again by the plan check', 'score': 5})
+    return w.send('DELETE', f'/api/review/{review_id}')
+
+def created_courses(w):
+    return w.get('/api/user/created-courses')
+
+def update_profile(w):
+    return w.send('PUT', '/api/user/update-profile', json={'first_name': 'Plan', 'last_name': 'Checker',
+                                                           'age': 30, 'bio': 'Runs EXPLAIN on everything'})
+
+def logout(w):
+    response = w.send('DELETE', '/api/auth/logout')
+    w.client.post('/api/auth/login', json={'email': f'author{w.user_id}@load.io', 'password': PASSWORD})
+    w.client.headers = {'X-CSRF-TOKEN': w.client.get_cookie('csrf_access_token').value}
+    return response
+
+
+SCENARIOS = {
+    **ROUTES,
+    'POST /api/auth/register': register,
+    'POST /api/auth/refresh': refresh,
+    'DELETE /api/auth/logout': logout,
+    'POST /api/course/': create_course,
+    'POST /api/section/': create_section,
+    'PATCH /api/lesson/<id>/move': move_lesson,
+    'DELETE /api/course/<c>/<s>/<l>': delete_step,
+    'POST /api/course/<c>/<s>/<l>/answers': submit_answers,
+    'POST+DELETE /api/course/<id>/enroll': enroll_and_leave,
+    'GET /api/course/<id>/export': export_course,
+    'POST /api/course/import': import_course,
+    'POST+PUT+DELETE /api/review/': review_lifecycle,
+    'GET /api/user/created-courses': created_courses,
+    'PUT /api/user/update-profile': update_profile,
+}
+
+
+class StatementRecorder:
+    """Distinct statements sent while handling requests, by endpoint, with
+    the parameters of their first execution."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = defaultdict(dict)   # endpoint -> {statement: parameters}
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or statement.lstrip().upper().startswith(SKIPPED_STATEMENTS):
+            return
+        if executemany:
+            parameters = parameters[0]
+        self.statements[request.endpoint].setdefault(statement, parameters)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def full_scans(conn, statement: str, parameters, tables: set) -> tuple[list[str], list[str]]:
+    """(scanned tables, plan lines) of one statement."""
+    if conn.dialect.name == 'sqlite':
+        plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+        scans = [m.group(1) for m in map(SQLITE_SCAN.match, plan) if m]
+    elif conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        plan = [row[0] for row in conn.exec_driver_sql(f'EXPLAIN {statement}', parameters)]
+        scans = [m.group(1) for line in plan for m in [POSTGRES_SCAN.search(line)] if m]
+    else:
+        raise SystemExit(f'Query plans of {conn.dialect.name} aren\'t supported')
+    return [table for table in scans if table in tables], plan
+
+
+def record_statements(app) -> StatementRecorder:
+    """Seed the app's (empty) database and run every scenario against it."""
+    with app.app_context():
+        clients = seed(app, CATALOG)
+        engine = db.engine
+    workers = [Worker(client, user_id, CATALOG, user_id) for user_id, client in enumerate(clients, start=1)]
+    reader = Worker(login_client(app, 'reader@plans.io', PASSWORD), CATALOG.authors + 1, CATALOG, 0)
+
+    with StatementRecorder(engine) as recorder:
+        for name, scenario in SCENARIOS.items():
+            for run in range(RUNS):
+                response = scenario(workers[run % len(workers)] if name.split()[0] != 'GET' else reader)
+                if response.status_code >= 500:
+                    raise RuntimeError(f'{name}: {response.status_code} {response.get_data(as_text=True)}')
+    return recorder
+
+
+def explain_all(app, recorder: StatementRecorder):
+    """Yields (endpoint, statement, scanned tables, plan lines) of every recorded statement."""
+    with app.app_context():
+        tables = set(db.metadata.tables)
+        engine = db.engine
+    with engine.connect() as conn:
+        for endpoint, statements in sorted(recorder.statements.items()):
+            for statement, parameters in statements.items():
+                with conn.begin():
+                    scanned, plan = full_scans(conn, statement, parameters, tables)
+                yield endpoint, statement, scanned, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail when an API route makes a full table scan.')
+    parser.add_argument('--plans', action='store_true', help='print the plan of every statement')
+    args = parser.parse_args()
+
+    app = make_app()
+    recorder = record_statements(app)
+    checked = failures = 0
+    for endpoint, statement, scanned, plan in explain_all(app, recorder):
+        if scanned or args.plans:
+            print(f'{"FULL SCAN of " + ", ".join(scanned) if scanned else "ok"} in {endpoint}:')
+            print('    ' + ' '.join(statement.split()))
+            for line in plan:
+                print(f'      {line}')
+        checked += 1
+        failures += bool(scanned)
+
+    print(f'{checked} statements of {len(recorder.statements)} endpoints checked, {failures} with full scans')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+from sqlalchemy import event
+from app import create_app
+from app.config import Config
+from app.extensions import db
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'learnua_bench.db')
+    )
+    REDIS_URL = os.getenv('BENCH_REDIS_URL', 'fakeredis://')
+    JWT_SECRET_KEY = 'benchmark-jwt-secret-key-of-32-bytes!'
+
+
+def make_app(**overrides):
+    """Fresh app and empty schema; keyword arguments override BenchConfig."""
+    app = create_app(type('Config', (BenchConfig,), overrides))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def login_client(app, email: str, password: str = 'qwerty123', register: bool = True):
+    """Test client with auth cookies set; `client.headers` holds the CSRF header."""
+    client = app.test_client()
+    if register:
+        client.post('/api/auth/register', json={'email': email, 'password': password,
+                                                'password_again': password})
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    client.headers = {'X-CSRF-TOKEN': client.get_cookie('csrf_access_token').value}
+    return client
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the app's engine while active."""
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        with self.app.app_context():
+            self.engine = db.engine
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,51 @@
+"""denormalized course counters and one enrollment per user
+
+Revision ID: 0a7e4d92c6b8
+Revises: f5c92e4b8a13
+Create Date: 2026-10-18 17:48:09.561724
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7e4d92c6b8'
+down_revision = 'f5c92e4b8a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('enrollments_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('sections_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('lessons_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('steps_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('progresses', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_progresses_user_id_course_id', ['user_id', 'course_id'])
+
+    op.execute("""
+        UPDATE courses SET
+            enrollments_count = (SELECT COUNT(*) FROM progresses WHERE progresses.course_id = courses.id),
+            sections_count = (SELECT COUNT(*) FROM sections WHERE sections.course_id = courses.id),
+            lessons_count = (SELECT COUNT(*) FROM lessons
+                             JOIN sections ON sections.id = lessons.section_id
+                             WHERE sections.course_id = courses.id),
+            steps_count = (SELECT COUNT(*) FROM steps
+                           JOIN lessons ON lessons.id = steps.lesson_id
+                           JOIN sections ON sections.id = lessons.section_id
+                           WHERE sections.course_id = courses.id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('progresses', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_progresses_user_id_course_id', type_='unique')
+
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_column('steps_count')
+        batch_op.drop_column('lessons_count')
+        batch_op.drop_column('sections_count')
+        batch_op.drop_column('enrollments_count')
@@ -0,0 +1,26 @@
+"""step payload version
+
+Revision ID: 1b9f3c7a2e54
+Revises: 0a7e4d92c6b8
+Create Date: 2026-10-18 18:30:41.205817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b9f3c7a2e54'
+down_revision = '0a7e4d92c6b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.drop_column('version')
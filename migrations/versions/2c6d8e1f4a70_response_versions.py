@@ -0,0 +1,28 @@
+"""response versions
+
+Revision ID: 2c6d8e1f4a70
+Revises: 1b9f3c7a2e54
+Create Date: 2026-10-18 19:12:07.448305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c6d8e1f4a70'
+down_revision = '1b9f3c7a2e54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('courses', 'sections', 'lessons', 'profiles'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('profiles', 'lessons', 'sections', 'courses'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,55 @@
+"""composite indexes for place lookups
+
+Revision ID: 3d7f2a9c5b81
+Revises: 2c6d8e1f4a70
+Create Date: 2026-10-18 20:05:31.904216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7f2a9c5b81'
+down_revision = '2c6d8e1f4a70'
+branch_labels = None
+depends_on = None
+
+# urls address sections and lessons by (parent, place)
+CREATED = {
+    'sections': {'ix_sections_course_id_place': ['course_id', 'place']},
+    'lessons': {'ix_lessons_section_id_place': ['section_id', 'place']},
+}
+# single column indexes that are the leading column of a composite index
+# or unique constraint, and only slow down writes
+DROPPED = {
+    'courses': {'ix_courses_author_id': ['author_id']},        # ix_courses_author_id_*
+    'sections': {'ix_sections_course_id': ['course_id']},      # ix_sections_course_id_place
+    'lessons': {'ix_lessons_section_id': ['section_id']},      # ix_lessons_section_id_place
+    'steps': {'ix_steps_lesson_id': ['lesson_id']},            # ix_steps_lesson_id_place
+    'progresses': {'ix_progresses_user_id': ['user_id']},      # uq_progresses_user_id_course_id
+}
+
+
+def upgrade():
+    for table, indexes in CREATED.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes.items():
+                batch_op.create_index(name, columns, unique=False)
+
+    for table, indexes in DROPPED.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name in indexes:
+                batch_op.drop_index(name)
+
+
+def downgrade():
+    for table, indexes in DROPPED.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes.items():
+                batch_op.create_index(name, columns, unique=False)
+
+    for table, indexes in CREATED.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name in indexes:
+                batch_op.drop_index(name)
@@ -0,0 +1,34 @@
+"""store step payloads in steps table
+
+Revision ID: 4c1e9a7d2f30
+Revises: 033ffedbe836
+Create Date: 2026-10-18 10:12:41.530214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e9a7d2f30'
+down_revision = '033ffedbe836'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payload', sa.JSON(), nullable=True))
+        batch_op.alter_column('content_path',
+               existing_type=sa.String(length=256),
+               nullable=True)
+        batch_op.create_index('ix_steps_lesson_id_place', ['lesson_id', 'place'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.drop_index('ix_steps_lesson_id_place')
+        batch_op.alter_column('content_path',
+               existing_type=sa.String(length=256),
+               nullable=False)
+        batch_op.drop_column('payload')
@@ -0,0 +1,64 @@
+"""per-parent place counters and unique places
+
+Revision ID: 5e2b8c4f1a97
+Revises: 3d7f2a9c5b81
+Create Date: 2026-10-18 21:37:12.560843
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8c4f1a97'
+down_revision = '3d7f2a9c5b81'
+branch_labels = None
+depends_on = None
+
+# (table, parent column, parent table, counter of the parent)
+TABLES = (
+    ('sections', 'course_id', 'courses', 'next_section_place'),
+    ('lessons', 'section_id', 'sections', 'next_lesson_place'),
+    ('steps', 'lesson_id', 'lessons', 'next_step_place'),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, parent, parent_table, counter in TABLES:
+        # concurrent inserts could take the same place before; all but the first
+        # row of such a place move to the end of their parent
+        duplicates = bind.execute(sa.text(f"""
+            SELECT c.id, c.{parent} FROM {table} c
+            WHERE EXISTS (SELECT 1 FROM {table} o WHERE o.{parent} = c.{parent} AND o.place = c.place AND o.id < c.id)
+            ORDER BY c.id
+        """)).all()
+        if duplicates:
+            last = dict(bind.execute(sa.text(f'SELECT {parent}, MAX(place) FROM {table} GROUP BY {parent}')).all())
+            places = []
+            for row_id, parent_id in duplicates:
+                last[parent_id] += 1
+                places.append({'id': row_id, 'place': last[parent_id]})
+            bind.execute(sa.text(f'UPDATE {table} SET place = :place WHERE id = :id'), places)
+
+        with op.batch_alter_table(parent_table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(counter, sa.Integer(), server_default='1', nullable=False))
+
+        op.execute(f"""
+            UPDATE {parent_table} SET {counter} = COALESCE(
+                (SELECT MAX(place) FROM {table} WHERE {table}.{parent} = {parent_table}.id), 0) + 1
+        """)
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_{parent}_place')
+            batch_op.create_unique_constraint(f'uq_{table}_{parent}_place', [parent, 'place'])
+
+
+def downgrade():
+    for table, parent, parent_table, counter in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'uq_{table}_{parent}_place', type_='unique')
+            batch_op.create_index(f'ix_{table}_{parent}_place', [parent, 'place'], unique=False)
+
+        with op.batch_alter_table(parent_table, schema=None) as batch_op:
+            batch_op.drop_column(counter)
@@ -0,0 +1,37 @@
+"""gapped sort keys for sections, lessons and steps
+
+Revision ID: 8d3b5f0e6a12
+Revises: 4c1e9a7d2f30
+Create Date: 2026-10-18 11:40:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3b5f0e6a12'
+down_revision = '4c1e9a7d2f30'
+branch_labels = None
+depends_on = None
+
+ORDER_GAP = 1024
+TABLES = (('sections', 'course_id'), ('lessons', 'section_id'), ('steps', 'lesson_id'))
+
+
+def upgrade():
+    for table, parent in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('sort_key', sa.Integer(), nullable=False, server_default='0'))
+
+        op.execute(f'UPDATE {table} SET sort_key = place * {ORDER_GAP}')
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_{parent}_sort_key', [parent, 'sort_key'], unique=False)
+
+
+def downgrade():
+    for table, parent in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_{parent}_sort_key')
+            batch_op.drop_column('sort_key')
@@ -0,0 +1,26 @@
+"""avatar version for etags
+
+Revision ID: a61f0c3b9d45
+Revises: 8d3b5f0e6a12
+Create Date: 2026-10-18 13:02:27.904511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61f0c3b9d45'
+down_revision = '8d3b5f0e6a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('profiles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('avatar_etag', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('profiles', schema=None) as batch_op:
+        batch_op.drop_column('avatar_etag')
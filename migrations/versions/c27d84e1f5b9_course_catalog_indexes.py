@@ -0,0 +1,37 @@
+"""composite indexes for the course catalog
+
+Revision ID: c27d84e1f5b9
+Revises: a61f0c3b9d45
+Create Date: 2026-10-18 14:21:50.377162
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27d84e1f5b9'
+down_revision = 'a61f0c3b9d45'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_courses_created_at_id': ['created_at', 'id'],
+    'ix_courses_rating_id': ['rating', 'id'],
+    'ix_courses_title_id': ['title', 'id'],
+    'ix_courses_author_id_created_at_id': ['author_id', 'created_at', 'id'],
+    'ix_courses_author_id_rating_id': ['author_id', 'rating', 'id'],
+    'ix_courses_author_id_title_id': ['author_id', 'title', 'id'],
+}
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        for name, columns in INDEXES.items():
+            batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        for name in INDEXES:
+            batch_op.drop_index(name)
@@ -0,0 +1,58 @@
+"""full-text search index over course title and description
+
+Revision ID: d94a27c6e0f1
+Revises: c27d84e1f5b9
+Create Date: 2026-10-18 15:08:12.640281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd94a27c6e0f1'
+down_revision = 'c27d84e1f5b9'
+branch_labels = None
+depends_on = None
+
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE courses_fts USING fts5(
+        title, description, content='courses', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER courses_fts_ai AFTER INSERT ON courses BEGIN
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER courses_fts_ad AFTER DELETE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER courses_fts_au AFTER UPDATE OF title, description ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    "INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for stmt in SQLITE_DDL:
+            op.execute(stmt)
+    elif dialect == 'postgresql':
+        op.execute("CREATE INDEX ix_courses_fts ON courses "
+                   "USING gin (to_tsvector('simple', title || ' ' || description))")
+    elif dialect in ('mysql', 'mariadb'):
+        op.execute("CREATE FULLTEXT INDEX ix_courses_fts ON courses (title, description)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('courses_fts_ai', 'courses_fts_ad', 'courses_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS courses_fts')
+    elif dialect in ('postgresql', 'mysql', 'mariadb'):
+        op.drop_index('ix_courses_fts', table_name='courses')
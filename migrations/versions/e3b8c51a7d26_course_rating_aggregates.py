@@ -0,0 +1,44 @@
+"""course rating aggregates and one review per user
+
+Revision ID: e3b8c51a7d26
+Revises: d94a27c6e0f1
+Create Date: 2026-10-18 16:21:45.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8c51a7d26'
+down_revision = 'd94a27c6e0f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_reviews_user_id_course_id', ['user_id', 'course_id'])
+
+    op.execute("""
+        UPDATE courses SET
+            rating_sum = COALESCE((SELECT SUM(score) FROM reviews WHERE reviews.course_id = courses.id), 0),
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.course_id = courses.id)
+    """)
+    op.execute("""
+        UPDATE courses SET rating = CASE WHEN rating_count > 0
+            THEN ROUND(rating_sum * 1.0 / rating_count, 1) ELSE 0 END
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_reviews_user_id_course_id', type_='unique')
+
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
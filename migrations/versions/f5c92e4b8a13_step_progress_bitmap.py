@@ -0,0 +1,63 @@
+"""per-step progress bitmap
+
+Revision ID: f5c92e4b8a13
+Revises: e3b8c51a7d26
+Create Date: 2026-10-18 17:04:51.372940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c92e4b8a13'
+down_revision = 'e3b8c51a7d26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('step_ordinal_seq', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('progresses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('done_steps', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ordinal', sa.Integer(), nullable=True))
+
+    # existing steps get ordinals 1..n per course in creation order
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("""
+        SELECT steps.id, sections.course_id FROM steps
+        JOIN lessons ON lessons.id = steps.lesson_id
+        JOIN sections ON sections.id = lessons.section_id
+        ORDER BY sections.course_id, steps.id
+    """)).all()
+    seq = {}
+    ordinals = []
+    for step_id, course_id in rows:
+        seq[course_id] = seq.get(course_id, 0) + 1
+        ordinals.append({'id': step_id, 'ordinal': seq[course_id]})
+    if ordinals:
+        bind.execute(sa.text('UPDATE steps SET ordinal = :ordinal WHERE id = :id'), ordinals)
+    if seq:
+        bind.execute(sa.text('UPDATE courses SET step_ordinal_seq = :seq WHERE id = :id'),
+                     [{'id': course_id, 'seq': last} for course_id, last in seq.items()])
+    bind.execute(sa.text('UPDATE steps SET ordinal = 0 WHERE ordinal IS NULL'))
+
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.alter_column('ordinal', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('steps', schema=None) as batch_op:
+        batch_op.drop_column('ordinal')
+
+    with op.batch_alter_table('progresses', schema=None) as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('done_steps')
+
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_column('step_ordinal_seq')
@@ -0,0 +1,13 @@
+import os
+import pytest
+
+# keep the app off the network unless a test run points it at a Redis
+os.environ.setdefault('REDIS_URL', 'fakeredis://')
+
+from benchmarks.common import make_app  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App on an empty SQLite database of its own; passwords are hashed inline."""
+    return make_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "test.db"}', PASSWORD_HASH_WORKERS=0)
@@ -0,0 +1,31 @@
+import io
+from PIL import Image
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import User, Profile
+
+
+def test_rebuild_serves_avatars_uploaded_before_the_variants(app, tmp_path):
+    app.root_path = str(tmp_path / 'app')   # uploads/ is next to the app package
+    with app.app_context():
+        db.session.execute(insert(User), [{'id': 1, 'email': 'old@avatars.io', 'password': '-'},
+                                          {'id': 2, 'email': 'broken@avatars.io', 'password': '-'}])
+        db.session.execute(insert(Profile), [{'user_id': 1}, {'user_id': 2}])
+        db.session.commit()
+    (tmp_path / 'uploads' / 'user_1' / 'ava').mkdir(parents=True)
+    Image.new('RGB', (300, 200), (200, 30, 30)).save(tmp_path / 'uploads' / 'user_1' / 'ava' / '1_ava.png')
+    (tmp_path / 'uploads' / 'user_2' / 'ava').mkdir(parents=True)
+    (tmp_path / 'uploads' / 'user_2' / 'ava' / '2_ava.jpg').write_bytes(b'not an image')
+
+    client = app.test_client()
+    assert client.get('/api/user/ava/1').status_code == 404
+
+    result = app.test_cli_runner().invoke(args=['avatars', 'rebuild'])
+    assert 'Rebuilt 1 avatars, 1 couldn\'t be decoded' in result.output
+
+    response = client.get('/api/user/ava/1', query_string={'size': 64, 'format': 'jpeg'})
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert Image.open(io.BytesIO(response.data)).size == (64, 64)
+    assert not (tmp_path / 'uploads' / 'user_1' / 'ava' / '1_ava.png').exists()
+    assert client.get('/api/user/ava/2').status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import User, Course, Section, Lesson
+from app.services import get_course_outline
+from app.services.ordering_service import ORDER_GAP
+from benchmarks.common import StatementCounter
+
+LESSONS_PER_SECTION = 3
+
+
+def create_course(course_id: int, sections: int):
+    db.session.execute(insert(Course), [{'id': course_id, 'author_id': 1, 'title': f'Course {course_id}',
+                                         'description': 'Outline query count', 'sections_count': sections}])
+    section_rows, lesson_rows = [], []
+    for s in range(1, sections + 1):
+        section_id = course_id * 1000 + s
+        section_rows.append({'id': section_id, 'course_id': course_id, 'title': f'Section {s}',
+                             'place': s, 'sort_key': s * ORDER_GAP})
+        lesson_rows += [{'section_id': section_id, 'title': f'Lesson {s}.{l}', 'place': l, 'sort_key': l * ORDER_GAP}
+                        for l in range(1, LESSONS_PER_SECTION + 1)]
+    db.session.execute(insert(Section), section_rows)
+    db.session.execute(insert(Lesson), lesson_rows)
+
+
+@pytest.fixture
+def courses(app):
+    """course id -> number of sections"""
+    shapes = {1: 1, 2: 10, 3: 50}
+    with app.app_context():
+        db.session.execute(insert(User), [{'id': 1, 'email': 'author@test.io', 'password': '-'}])
+        for course_id, sections in shapes.items():
+            create_course(course_id, sections)
+        db.session.commit()
+    return shapes
+
+
+def outline_statements(app, course_id: int) -> tuple[int, dict]:
+    with app.app_context():
+        with StatementCounter(app) as counter:
+            outline = get_course_outline(course_id)
+        db.session.remove()
+    return counter.count, outline
+
+
+def test_outline_statement_count_does_not_grow_with_sections(app, courses):
+    counts = {}
+    for course_id, sections in courses.items():
+        counts[course_id], outline = outline_statements(app, course_id)
+        assert len(outline['sections']) == sections
+        assert all(len(s['lessons']) == LESSONS_PER_SECTION for s in outline['sections'])
+
+    assert len(set(counts.values())) == 1, counts
+    assert counts[1] == 2   # the course row, then sections joined with lessons
+
+
+def test_missing_course_takes_one_statement(app, courses):
+    count, outline = outline_statements(app, 404)
+    assert outline is None
+    assert count == 1
@@ -0,0 +1,6 @@
+from benchmarks.bench_places import stress
+
+
+def test_concurrent_inserts_get_unique_places(app):
+    problems = stress(app, concurrency=4, requests=80)
+    assert not problems, '\n'.join(problems)
@@ -0,0 +1,9 @@
+from benchmarks.check_query_plans import record_statements, explain_all
+
+
+def test_no_route_scans_a_whole_table(app):
+    recorder = record_statements(app)
+    scans = [f'{endpoint}: {", ".join(scanned)} in {" ".join(statement.split())}'
+             for endpoint, statement, scanned, _ in explain_all(app, recorder) if scanned]
+    assert recorder.statements
+    assert not scans, 'full table scans:\n' + '\n'.join(scans)
@@ -0,0 +1,24 @@
+from decimal import Decimal
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import User, Course
+
+
+def test_search_returns_courses_like_the_catalog(app):
+    with app.app_context():
+        db.session.execute(insert(User), [{'id': 1, 'email': 'author@search.io', 'password': 'x'}])
+        db.session.execute(insert(Course), [
+            {'id': 1, 'author_id': 1, 'title': 'Searchable course', 'description': 'Found by its title',
+             'rating': Decimal('4.0'), 'rating_count': 2},
+            {'id': 2, 'author_id': 1, 'title': 'Another course', 'description': 'Not searchable at all',
+             'rating': Decimal('3.5'), 'rating_count': 2},
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    catalog = {c['id']: c for c in client.get('/api/course/', query_string={'limit': 10}).get_json()['courses']}
+    found = client.get('/api/course/search', query_string={'q': 'searchable'}).get_json()['courses']
+
+    assert [c['id'] for c in found] == [1, 2]
+    assert found == [catalog[1], catalog[2]]
+    assert found[0]['rating'] == '4.0'
@@ -0,0 +1,14 @@
+import os
+import pytest
+from benchmarks.bench_startup import measure, STARTUP_BUDGET_MS
+
+
+# wall-clock timing depends on the machine, so it only runs where a budget is set for it
+@pytest.mark.skipif('STARTUP_BUDGET_MS' not in os.environ, reason='set STARTUP_BUDGET_MS to check start-up time')
+def test_cold_start_is_within_budget():
+    results, imports, create, total = measure(runs=3)
+    slowest = ', '.join(f'{name} {cumulative_s * 1000:.0f} ms' for name, _, cumulative_s, _ in results[-1].slowest(5))
+    assert total <= STARTUP_BUDGET_MS, (
+        f'median cold start {total:.0f} ms (import {imports:.0f}, create_app {create:.0f}) '
+        f'is over the {STARTUP_BUDGET_MS:.0f} ms budget; slowest imports: {slowest}'
+    )